@@ -106,7 +106,8 @@ def save_keymap(operator_id, modal_keymap: ModalKeymap=None):
             "Freeze Edge": (',', 'PRESS', False, False, False),
             "Increase Loop Count": ('=', 'PRESS', False, False, False),
             "Decrease Loop Count": ('-', 'PRESS', False, False, False),
-            "Insert Loop At Midpoint": ('RIGHTMOUSE', 'PRESS', False, True, False)
+            "Insert Loop At Midpoint": ('RIGHTMOUSE', 'PRESS', False, True, False),
+            "Insert On Selected Rings": ('A', 'PRESS', False, True, False)
             }
         }
 
@@ -1,4 +1,11 @@
 import bpy
+from ..utils import mesh_revision
+from ..utils.mesh_snapshot import MeshSnapshot
+from ..utils.edge_catalog import EdgeCatalog
+from ..utils.edge_slide import EdgeSlideCache
+from ..utils.screen_vert_index import ScreenVertIndex
+from ..snapping.snapping import SnapDataCache
+from ..snapping.projected_verts import ProjectedVerts
 from . import internal
 from . import fast_loop
 from . import edge_slide
@@ -25,8 +32,17 @@ def register():
     for cls in classes:
         bpy.utils.register_class(cls)
 
+    mesh_revision.register()
     
 
 def unregister():
+    mesh_revision.unregister()
+    MeshSnapshot.invalidate()
+    EdgeCatalog.invalidate()
+    EdgeSlideCache.invalidate()
+    ScreenVertIndex.invalidate()
+    SnapDataCache.clear()
+    ProjectedVerts.invalidate()
+
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
@@ -7,6 +7,7 @@ import bpy, bmesh
 
 from ...utils.common import prefs
 from ...utils.ops import (get_m_button_map as btn, options)
+from ...utils.profiler import Profiler
 
 from ..fast_loop_actions import (DrawLoopsMixin, DrawDirectionArrowMixin, BaseAction)
 from ..fast_loop_helpers import (set_mode, Mode)
@@ -38,15 +39,18 @@ class InsertAction(DrawLoopsMixin, DrawDirectionArrowMixin, BaseAction, metaclas
             return
         self.context.scale = self.context.calculate_scale_value()
         self.context.is_single_edge = False
-        data = EdgeDataFactory.create(current_edge, self.context)
+        with Profiler.scope("Ring"):
+            data = EdgeDataFactory.create(current_edge, self.context)
         if data is not None:
             self.context.loop_data = data
 
             if self.context.update_loops():
                 props = self.context.get_all_props_no_snap()
-                self.context.edge_data = EdgeData(data, props)
+                with Profiler.scope("Points"):
+                    self.context.edge_data = EdgeData(data, props)
                 self.context.is_single_edge = self.context.loop_data.is_single_loop()
-                self.context.update_arrows()
+                with Profiler.scope("Arrows"):
+                    self.context.update_arrows()
                 return True
 
         return False
@@ -207,6 +211,12 @@ class InsertAction(DrawLoopsMixin, DrawDirectionArrowMixin, BaseAction, metaclas
                 self.context.create_geometry(select_new_edges=False)
                 bpy.ops.ed.undo_push(message="Insert Loop At Center")
                 handled = True
+
+        elif modal_event in {"Insert On Selected Rings"}:
+            if self.context.current_edge is not None and self.context.update_loops():
+                self.context.create_geometry_on_selected_rings(select_new_edges=False)
+                bpy.ops.ed.undo_push(message="Insert Loops On Selected Rings")
+                handled = True
                 
         return handled
 
@@ -1,22 +1,69 @@
-from typing import TYPE_CHECKING
+from typing import Dict, List, Tuple, TYPE_CHECKING
 if TYPE_CHECKING:
     from ..fast_loop_common import FastLoopCommon
 
 import bpy
 from bmesh.types import BMEdge
-from bmesh import ops, update_edit_mesh
+from bmesh import ops
+from mathutils import Vector
 
 from ...ops.fast_loop_actions import BaseAction
 from ...utils.ops import (get_m_button_map as btn)
 from ...utils import draw_3d, common
-from ...utils.mesh import (bmesh_edge_loop_walker, get_vertex_shared_by_edges)
+from ...utils.mesh_revision import MeshRevision
+from ...utils.mesh import (get_vertex_shared_by_edges, refresh_edit_bmesh)
+from ...utils.edge_catalog import EdgeCatalog
+from ..edge_ring import EdgeRingIndex
 
 from ..fast_loop_helpers import (set_mode, Mode)
 
 
+class EdgeLoopPreviewCache():
+    """ Remembers the preview points of the edge loops that were hovered over, by their EdgeCatalog loop id.
+        Hovering over any edge of a loop that was already walked is a dictionary lookup.
+        Until the catalog for the current topology is built the points are only remembered for the hovered edge.
+        Everything is thrown away when the mesh or the object's transform changes.
+    """
+    def __init__(self):
+        self.key = None
+        self.world_matrix = None
+        self.catalog: EdgeCatalog = None
+        self.loop_points: Dict[int, List[Vector]] = {}
+
+    def validate(self, edit_object_data, world_matrix):
+        name = edit_object_data.name
+        key = (edit_object_data.bm, name, MeshRevision.geometry(name))
+        if key != self.key or world_matrix != self.world_matrix:
+            self.clear()
+            self.key = key
+            self.world_matrix = world_matrix.copy()
+
+    def clear(self):
+        self.key = None
+        self.world_matrix = None
+        self.catalog = None
+        self.loop_points.clear()
+
+    def get_points(self, edge: BMEdge):
+        return self.loop_points.get(self.loop_key(edge))
+
+    def add(self, edge: BMEdge, points: List[Vector]):
+        self.loop_points[self.loop_key(edge)] = points
+
+    def loop_key(self, edge: BMEdge):
+        if self.catalog is None:
+            bm, name, _ = self.key
+            self.catalog = EdgeCatalog.get_current(bm, name)
+
+        if self.catalog is not None:
+            return self.catalog.loop_id(edge.index)
+        return ('edge', edge.index)
+
+
 class RemoveLoopAction(BaseAction):
     Mode = Mode.REMOVE_LOOP
     remove_loop_draw_points = []
+    loop_cache = EdgeLoopPreviewCache()
 
     def __init__(self, context) -> None:
         self.context: FastLoopCommon  = context
@@ -27,17 +74,19 @@ class RemoveLoopAction(BaseAction):
 
     
     def exit(self):
-       if self.context.dirty_mesh:
-            bpy.ops.object.mode_set(mode='OBJECT')
-            bpy.ops.object.mode_set(mode='EDIT')
-            self.context.dirty_mesh = False
+        self.loop_cache.clear()
     
 
     def update(self):
         current_edge = self.context.current_edge
         if current_edge is None or not current_edge.is_valid: #or self.context.current_face_index is None:
             return
-        self.remove_loop_draw_points = self.compute_remove_loop_draw_points()
+        self.loop_cache.validate(self.context.active_object, self.context.world_mat)
+        points = self.loop_cache.get_points(current_edge)
+        if points is None:
+            points, _ = self.compute_remove_loop_draw_points()
+            self.loop_cache.add(current_edge, points)
+        self.remove_loop_draw_points = points
 
     
     def handle_input(self, bl_context, bl_event):
@@ -66,32 +115,37 @@ class RemoveLoopAction(BaseAction):
     def draw_3d(self, bl_context):
         if self.remove_loop_draw_points:
             draw_3d.draw_lines(self.remove_loop_draw_points, line_color=(1.0, 0.0, 0.0, 0.9), depth_test=common.prefs().occlude_lines)
-            self.remove_loop_draw_points.clear()
+            # Don't clear the list, it's owned by the cache
+            self.remove_loop_draw_points = []
 
 
     def remove_edge_loop(self):
         bm = self.context.ensure_bmesh_(self.context.active_object)
         bm.edges.ensure_lookup_table()
         current_edge = self.context.current_edge
-        dissolve_edges = list(bmesh_edge_loop_walker(current_edge))
+        dissolve_edges = self.walk_edge_loop(bm, current_edge)
 
-        ops.dissolve_edges(bm, edges=dissolve_edges, use_verts=True)
-        self.context.dirty_mesh = True
+        ret = ops.dissolve_edges(bm, edges=dissolve_edges, use_verts=True)
         mesh = self.context.active_object.data
-        update_edit_mesh(mesh)
+        MeshRevision.topology_changed(mesh.name)
+        refresh_edit_bmesh(bm, mesh, ret['region'])
 
     
-    def compute_remove_loop_draw_points(self):
+    def walk_edge_loop(self, bm, edge: BMEdge)-> List[BMEdge]:
+        return EdgeRingIndex.get(self.context.active_object).get_loop_edges(edge)
+
+
+    def compute_remove_loop_draw_points(self)-> Tuple[List[Vector], List[BMEdge]]:
 
         if self.context.current_edge is None:
-            return
+            return [], []
 
         points = []
 
         world_mat = self.context.world_mat
         loop_edges  = []
         edge: BMEdge = self.context.current_edge
-        for i, loop_edge in enumerate(bmesh_edge_loop_walker(edge)):
+        for i, loop_edge in enumerate(self.walk_edge_loop(self.context.active_object.bm, edge)):
 
             if i >= 1:
                 vert = get_vertex_shared_by_edges([loop_edge, loop_edges[i-1]])
@@ -129,4 +183,4 @@ class RemoveLoopAction(BaseAction):
                 points.clear()
                 points.extend([world_mat @ loop_edges[0].verts[0].co, world_mat @ loop_edges[0].verts[1].co])
 
-        return points
\ No newline at end of file
+        return points, loop_edges
\ No newline at end of file
@@ -3,13 +3,15 @@ from dataclasses import dataclass, field
 
 import bpy, bmesh
 from bmesh.types import *
-from mathutils import Vector, Matrix
+from mathutils import Vector, Matrix, kdtree
 from mathutils.geometry import intersect_point_line, intersect_line_plane
 
 from .. ui.gizmos.gizmo_snapping import RP_GGT_SnapGizmoGroup
 from .. props import addon
 from .. import utils
 from .. utils import draw_3d, draw_2d
+from .. utils.mesh_revision import MeshRevision
+from .. utils.screen_vert_index import ScreenVertIndex
 from .. utils.ops import get_m_button_map as btn, match_event_to_keymap, get_undo_keymapping
 
 
@@ -75,6 +77,8 @@ class EdgeConstraintTranslationOperator(bpy.types.Operator):
     points_3d = []
 
     slide_verts: Dict[int ,EdgeVertexSlideData] = {}
+    # Original world positions of the slide verts. Used to find the vert nearest to the snap target
+    slide_verts_kd: kdtree.KDTree = None
     # ss_slide_directions: List[Vector] = []
 
     @classmethod
@@ -89,6 +93,7 @@ class EdgeConstraintTranslationOperator(bpy.types.Operator):
         self.world_mat = context.object.matrix_world.normalized()
         self.world_inv = context.object.matrix_world.inverted_safe()
         self.slide_verts.clear()
+        self.slide_verts_kd = None
         self.mode = Mode.EDGE_SLIDE
         self.is_sliding = False
         self.snap_location = None
@@ -215,9 +220,7 @@ class EdgeConstraintTranslationOperator(bpy.types.Operator):
                 bm = self.ensure_bmesh()
 
                 mouse_coords = (event.mouse_region_x, event.mouse_region_y)
-                selected_verts = [vert for vert in bm.verts if vert.select]
-                
-                vert = self.get_nearest_vert_2d(selected_verts, mouse_coords)
+                vert = self.get_nearest_vert_2d(mouse_coords)
                 if vert is not None:
                     self.nearest_vert_3d = vert
                     self.nearest_vert_co_3d = vert.co.copy()
@@ -231,7 +234,9 @@ class EdgeConstraintTranslationOperator(bpy.types.Operator):
                 self.active_axis = event.type
                 self.axis_vec = self.get_axis(event.type, self.world_mat)
                 self.calculate_axis_draw_points(context, vert, self.world_mat) #, self.active_axis)
+                selected_verts = [v for v in bm.verts if v.select]
                 self.slide_verts = self.get_slide_edges(selected_verts, self.axis_vec, self.world_mat)
+                self.slide_verts_kd = self.build_slide_verts_kd(self.slide_verts, self.world_mat)
                 self.slide_edge_draw_lines =  self.calculate_slide_draw_lines(vert, self.slide_verts, self.world_mat)
 
                 self.is_sliding = True
@@ -256,6 +261,7 @@ class EdgeConstraintTranslationOperator(bpy.types.Operator):
         elif event.type in {'LEFTMOUSE', 'RIGHTMOUSE', 'MOUSEMOVE'} and not self.snap_enabled:
             if event.type == btn('LEFTMOUSE') and event.value == 'PRESS' and self.is_sliding:
                 self.slide_verts.clear()
+                self.slide_verts_kd = None
                 self.ensure_bmesh()
                 utils.mesh.ensure(self.bm)
                 self.is_sliding = False
@@ -302,9 +308,7 @@ class EdgeConstraintTranslationOperator(bpy.types.Operator):
                 bm = self.ensure_bmesh()
 
                 mouse_coords = (event.mouse_region_x, event.mouse_region_y)
-                selected_verts = [vert for vert in bm.verts if vert.select]
-                
-                vert = self.get_nearest_vert_2d(selected_verts, mouse_coords)
+                vert = self.get_nearest_vert_2d(mouse_coords)
                 if vert is not None:
                     self.nearest_vert_3d = vert
                     self.nearest_vert_co_3d = vert.co.copy()
@@ -322,6 +326,7 @@ class EdgeConstraintTranslationOperator(bpy.types.Operator):
         elif event.type == btn('LEFTMOUSE') and event.value == 'PRESS' and self.snap_enabled:
             self.disable_snapping(context)
             self.slide_verts.clear()
+            self.slide_verts_kd = None
             # self.ensure_bmesh()
             # utils.mesh.ensure(self.bm)
             self.is_sliding = False
@@ -392,46 +397,39 @@ class EdgeConstraintTranslationOperator(bpy.types.Operator):
         return lines
 
 
-    def get_nearest_vert_2d(self, selected_verts, mouse_coords):
-        self.ensure_bmesh()
+    def get_nearest_vert_2d(self, mouse_coords):
+        bm = self.ensure_bmesh()
+        bm.verts.ensure_lookup_table()
 
-        mouse_co: Vector = Vector(mouse_coords)
-        min_dist_sq = float('INF')
-        visited_verts = set()
-        nearest_vert = None
-
-        for vert in selected_verts:
-            if vert.index not in visited_verts:
-                vert_2d = utils.math.location_3d_to_2d(self.world_mat @ vert.co)
-                dist_sq = (mouse_co - vert_2d).length_squared
-                if dist_sq < min_dist_sq:
-                    nearest_vert = vert
-                    min_dist_sq = dist_sq
-                visited_verts.add(vert.index)
-        if nearest_vert is not None:
-            return nearest_vert
+        context = bpy.context
+        screen_index = ScreenVertIndex.get(bm, context.active_object.data.name, self.world_mat, context.region, context.space_data.region_3d)
+        vert_index, _ = screen_index.find_nearest(mouse_coords)
+        if vert_index is not None:
+            return bm.verts[vert_index]
 
         return None
 
     
-    def get_nearest_vert_3d(self, selected_verts, point):
-        self.ensure_bmesh()
-
-        min_dist_sq = float('INF')
+    def get_nearest_vert_3d(self, point):
+        if self.slide_verts_kd is None:
+            return None
 
-        for vert in selected_verts:
-            vert_orig_co = self.slide_verts[vert.index].vert_orig_co
-            vert_orig_co_world = self.world_mat @ vert_orig_co
-            dist_sq = (point - vert_orig_co_world).length_squared
-            if dist_sq < min_dist_sq:
-                nearest_vert = vert
-                min_dist_sq = dist_sq
-        if nearest_vert is not None:
-            return nearest_vert
+        _, index, _ = self.slide_verts_kd.find(point)
+        if index is not None:
+            return self.slide_verts[index].vert
 
         return None
 
 
+    @staticmethod
+    def build_slide_verts_kd(slide_verts, world_mat):
+        tree = kdtree.KDTree(len(slide_verts))
+        for index, data in slide_verts.items():
+            tree.insert(world_mat @ data.vert_orig_co, index)
+        tree.balance()
+        return tree
+
+
     def get_slide_edges(self, selected_verts, axis_vec_og, world_mat):
 
         to_origin = Matrix.Translation(-world_mat.to_translation()) @ world_mat
@@ -575,6 +573,7 @@ class EdgeConstraintTranslationOperator(bpy.types.Operator):
                     else:
                         vert.co = from_origin @ intersect_vec
                
+        MeshRevision.geometry_changed(context.active_object.data.name, self.slide_verts.keys())
         bmesh.update_edit_mesh(context.active_object.data, destructive=False)
 
     
@@ -650,6 +649,7 @@ class EdgeConstraintTranslationOperator(bpy.types.Operator):
                         # self.points_3d.append(from_origin @ intersect_vec)
 
                         vert.co = from_origin @ intersect_vec
+        MeshRevision.geometry_changed(context.active_object.data.name, self.slide_verts.keys())
         bmesh.update_edit_mesh(context.active_object.data, destructive=False)
         
     
@@ -694,8 +694,7 @@ class EdgeConstraintTranslationOperator(bpy.types.Operator):
         bm = self.ensure_bmesh()
         nearest_vert_3d = None
         if not use_active:
-            selected_verts = [vert for vert in bm.verts if vert.select]
-            nearest_vert_3d = self.get_nearest_vert_3d(selected_verts, snap_target_location)
+            nearest_vert_3d = self.get_nearest_vert_3d(snap_target_location)
         else:
             nearest_vert_3d = utils.mesh.get_active_vert(bm)
 
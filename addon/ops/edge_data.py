@@ -5,22 +5,33 @@ if TYPE_CHECKING:
     from .fast_loop import FastLoopOperator
 from functools import singledispatchmethod
 from collections import namedtuple
+from itertools import chain, count
 
+import numpy as np
 
 from mathutils.geometry import intersect_point_line
 from bmesh.types import BMEdge
 
 from .edge_ring import EdgeRing, TriFan, SingleLoop, LoopCollection
+from ..utils.mesh_snapshot import MeshSnapshot
 
 EdgeMetaData = namedtuple('ActiveEdgeData','bm_edge points')
 class EdgeData():
-    def __init__(self, loop_collection, props):
+    # Each EdgeData gets a new version. Used to know when the loop preview needs to be rebuilt.
+    _versions = count(1)
+
+    def __init__(self, loop_collection, props, flipped=None):
+        """ Args:
+                flipped: Flip the points of this ring instead of using the flipped option.
+        """
+        self.version = next(EdgeData._versions)
         self.points = []
         # self.distances = [] TODO
         self.edges = []
         self.edge_verts = []
         self.first_edge: EdgeMetaData = None
         self.other_edge: EdgeMetaData = None
+        self.flipped = props.common.flipped if flipped is None else flipped
 
         self.populate_data(loop_collection, props)
      
@@ -42,7 +53,10 @@ class EdgeData():
         context: FastLoopOperator = data.get_owner()
         context.loop_draw_points.clear()
 
-        for i, loop in enumerate(data.get_loops()):
+        loops = data.get_loops()
+        active_edge: BMEdge  = data.get_active_loop().edge
+        flipped_edges = []
+        for i, loop in enumerate(loops):
             if not loop.is_valid:
                 return False
             
@@ -51,9 +65,8 @@ class EdgeData():
             self.edge_verts.append((start_vert, end_vert))
             self.edges.append(loop.edge)
 
-            flipped = props.common.flipped
+            flipped = self.flipped
             opposite_edge = loop.link_loop_next.link_loop_next.edge
-            active_edge: BMEdge  = data.get_active_loop().edge
             if not loop.edge.is_manifold and not opposite_edge.is_manifold and loop.edge.index != active_edge.index:
                 flipped = not flipped
 
@@ -66,27 +79,43 @@ class EdgeData():
             elif not loop.edge.is_manifold and loop.edge.index != active_edge.index and i == 0:
                 if opposite_edge.is_manifold:
                     flipped = not flipped
+            flipped_edges.append(flipped)
             
-            if context.force_offset_value == -1:
-                position = context.current_position.world if not context.is_snapping else context.snap_position
-                start_pos, end_pos = data.get_active_loop_endpoints()
-                _, factor = intersect_point_line(position, start_pos, end_pos)
-    
+        if context.force_offset_value == -1:
+            position = context.current_position.world if not context.is_snapping else context.snap_position
+            start_pos, end_pos = data.get_active_loop_endpoints()
+            _, factor = intersect_point_line(position, start_pos, end_pos)
+
+        else:
+            factor = context.force_offset_value
+
+        algorithm = context.edge_pos_algorithm
+        if hasattr(algorithm, 'execute_batch'):
+            active_object = context.active_object
+            snapshot = MeshSnapshot.get_current(active_object.bm, active_object.name)
+            if snapshot is not None:
+                edge_cos = snapshot.edge_cos([(start_vert.index, end_vert.index) for start_vert, end_vert in self.edge_verts])
             else:
-                factor = context.force_offset_value
+                edge_cos = np.fromiter(chain.from_iterable(chain(start_vert.co, end_vert.co) for start_vert, end_vert in self.edge_verts), 
+                                       dtype=np.float64, count=len(self.edge_verts) * 6).reshape(-1, 2, 3)
+            results = zip(*algorithm.execute_batch(context, props, edge_cos, factor, flipped_edges, self.flipped))
+        else:
+            results = (algorithm.execute(context, props, start_vert.co.copy(), end_vert.co.copy(), factor, flipped, self.flipped) 
+                       for (start_vert, end_vert), flipped in zip(self.edge_verts, flipped_edges))
 
-            points_on_edge, is_reversed = context.edge_pos_algorithm.execute(context, props, start_vert.co.copy(), end_vert.co.copy(), factor, flipped)
+        other_edge = data.get_other_loop().edge
+        for edge, (points_on_edge, is_reversed) in zip(self.edges, results):
             self.points.append(points_on_edge)
             context.loop_draw_points.append(points_on_edge)
 
             if is_reversed:
                 points_on_edge = list(reversed(points_on_edge))
 
-            if loop.edge.index == active_edge.index:
+            if edge.index == active_edge.index:
                 self.first_edge = EdgeMetaData(active_edge, points_on_edge)
 
-            elif loop.edge.index == data.get_other_loop().edge.index:
-                self.other_edge = EdgeMetaData(loop.edge, points_on_edge)
+            elif edge.index == other_edge.index:
+                self.other_edge = EdgeMetaData(edge, points_on_edge)
 
 
     def calculate_points_on_edge(self, data: LoopCollection, props:AllPropsNoSnap)-> EdgeData:
@@ -106,7 +135,7 @@ class EdgeData():
         else:
             factor = context.force_offset_value
 
-        points_on_edge, is_reversed = context.edge_pos_algorithm.execute(context, props, start_vert.co.copy(), end_vert.co.copy(), factor, context.flipped)
+        points_on_edge, is_reversed = context.edge_pos_algorithm.execute(context, props, start_vert.co.copy(), end_vert.co.copy(), factor, self.flipped, self.flipped)
         active_edge: BMEdge  = data.get_active_loop().edge
         if is_reversed:
             points_on_edge = list(reversed(points_on_edge))
@@ -1,13 +1,22 @@
 from __future__ import annotations
 from abc import ABCMeta
-from typing import List, TYPE_CHECKING
+from typing import Dict, List, TYPE_CHECKING
 if TYPE_CHECKING:
     from ..props.fl_properties import AllPropsNoSnap
+    from .multi_object_edit import EditObjectData
     
 from collections import namedtuple
+from dataclasses import dataclass, field
+from itertools import count
 
-from ..utils.mesh import (WalkerMetadata,bmesh_edge_ring_walker, bmesh_edge_ring_walker_sel_only, 
-                        bm_tri_fan_walker, is_ngon, get_face_from_index, get_face_loop_for_edge, is_tri_fan)
+from bmesh.types import BMesh, BMEdge, BMLoop
+
+from ..utils.mesh import (WalkerMetadata, bmesh_edge_ring_walker, bmesh_edge_ring_walker_sel_only, bm_tri_fan_walker, bmesh_edge_loop_walker,
+                        is_ngon, get_face_from_index, get_face_loop_for_edge, is_tri_fan)
+from ..utils.mesh_revision import MeshRevision
+from ..utils.mesh_snapshot import MeshSnapshot
+from ..utils.edge_catalog import EdgeCatalog
+from ..utils.snapshot_walkers import IndexWalkerMetadata, edge_ring_walker, tri_fan_walker, edge_loop_walker
 
 LoopEndpoints = namedtuple('LoopEndpoints','start end')
 
@@ -84,6 +93,176 @@ class TriFan(LoopCollection):
 class SingleLoop(LoopCollection):
     pass
 
+
+@dataclass
+class EdgeRingRecord():
+    ring_id: int
+    loops: List[BMLoop]
+    is_loop: bool
+    loop_for_edge: Dict[int, BMLoop] = field(default_factory=dict)
+    shortest_edge_len: float = float('INF')
+    geometry_revision: int = -1
+    # Set for selected only rings and tri fans. The loop of the edge the walk started from.
+    active_loop: BMLoop = None
+
+    def get_shortest_edge_len(self, geometry_revision, snapshot: MeshSnapshot=None):
+        if geometry_revision != self.geometry_revision:
+            if snapshot is not None:
+                self.shortest_edge_len = snapshot.shortest_edge_len([loop.edge.index for loop in self.loops])
+            else:
+                self.shortest_edge_len = min((loop.edge.calc_length() for loop in self.loops), default=float('INF'))
+            self.geometry_revision = geometry_revision
+        return self.shortest_edge_len
+
+    def get_face_loop(self, edge: BMEdge) -> BMLoop:
+        """ The loop of edge in a face that the ring runs through. 
+            The loop two steps further is the loop of the next (or previous) edge of the ring.
+        """
+        for loop in edge.link_loops:
+            if loop.link_loop_next.link_loop_next.edge.index in self.loop_for_edge:
+                return loop
+        return None
+
+
+class EdgeRingIndex():
+    """ Maps edge indices to the edge ring they belong to.
+        The loops of a ring are walked the first time one of its edges is looked up. Every edge of the walk is then mapped
+        to the ring, so looking up another edge of the same ring doesn't walk again. Rings are kept until the topology of the mesh changes.
+        The shortest edge length of a ring is recalculated only when the geometry revision changes.
+        Selected only rings are kept until the state revision changes (it changes with the selection) and tri fans 
+        until the geometry revision changes. Both are keyed by the edge the walk started from.
+        Edge loops are keyed by their EdgeCatalog loop id, or by the edge until the catalog for the topology is built.
+        One index is shared per mesh, so anything that edits the mesh only needs to bump the MeshRevision.
+    """
+    _indices: Dict[str, EdgeRingIndex] = {}
+
+    def __init__(self, bm: BMesh, mesh_name):
+        self.bm = bm
+        self.mesh_name = mesh_name
+        self.stamp = MeshRevision.stamp(bm, mesh_name)
+        self._rings: Dict[int, EdgeRingRecord] = {}
+        self._ring_ids = count()
+        self._selected_rings: Dict[tuple, EdgeRingRecord] = {}
+        self._selected_state = None
+        self._tri_fans: Dict[tuple, EdgeRingRecord] = {}
+        self._loops: Dict[tuple, List[BMEdge]] = {}
+
+    @classmethod
+    def get(cls, edit_object_data: EditObjectData) -> EdgeRingIndex:
+        bm = edit_object_data.bm
+        mesh_name = edit_object_data.name
+        index = cls._indices.get(mesh_name)
+        if index is None or not index.is_current(bm):
+            index = EdgeRingIndex(bm, mesh_name)
+            cls._indices[mesh_name] = index
+        return index
+
+    @classmethod
+    def invalidate(cls, mesh_name=None):
+        if mesh_name is None:
+            cls._indices.clear()
+        else:
+            cls._indices.pop(mesh_name, None)
+
+    def is_current(self, bm: BMesh):
+        return bm is self.bm and bm.is_valid and self.stamp == MeshRevision.stamp(bm, self.mesh_name)
+
+    def get_ring(self, edge) -> EdgeRingRecord:
+        ring = self._rings.get(edge.index)
+        if ring is not None:
+            return ring
+
+        # Until the snapshot for the current topology is built the bmesh is walked instead
+        snapshot = MeshSnapshot.get_current(self.bm, self.mesh_name)
+        if snapshot is not None:
+            metadata = IndexWalkerMetadata()
+            loops = snapshot.bm_loops(list(edge_ring_walker(snapshot, edge.index, False, metadata)))
+        else:
+            metadata = WalkerMetadata()
+            loops = list(bmesh_edge_ring_walker(edge, False, metadata))
+        if not loops:
+            return None
+
+        ring = EdgeRingRecord(next(self._ring_ids), loops, metadata.is_loop)
+        ring.shortest_edge_len = metadata.shortest_edge_len
+        ring.geometry_revision = MeshRevision.geometry(self.mesh_name)
+        for loop in loops:
+            ring.loop_for_edge[loop.edge.index] = loop
+
+        # The walker doesn't step onto hidden edges or edges with more than two faces. 
+        # A walk that starts on one of those isn't the walk of the other edges in it.
+        if edge.hide or len(edge.link_faces) > 2:
+            self._rings[edge.index] = ring
+        else:
+            self._rings.update(dict.fromkeys(ring.loop_for_edge, ring))
+
+        return ring
+
+    def get_ring_id(self, edge):
+        """ Returns None for edges that aren't part of a ring.
+        """
+        ring = self.get_ring(edge)
+        return ring.ring_id if ring is not None else None
+
+    def get_selected_ring(self, edge) -> EdgeRingRecord:
+        """ The walk of bmesh_edge_ring_walker_sel_only() from edge. 
+            It can step across ngons, so it isn't keyed by the ring id of the edge.
+        """
+        state = MeshRevision.state(self.mesh_name)
+        if state != self._selected_state:
+            self._selected_rings.clear()
+            self._selected_state = state
+
+        key = (edge.index, True)
+        ring = self._selected_rings.get(key)
+        if ring is None:
+            metadata = WalkerMetadata()
+            loops = list(bmesh_edge_ring_walker_sel_only(edge, metadata))
+            ring = EdgeRingRecord(None, loops, metadata.is_loop, shortest_edge_len=metadata.shortest_edge_len, active_loop=metadata.active_loop)
+            self._selected_rings[key] = ring
+        return ring
+
+    def get_tri_fan(self, face_index, edge) -> EdgeRingRecord:
+        """ The walk of bm_tri_fan_walker() from edge of the face.
+            The loops may end with None when the fan ends on a boundary.
+        """
+        geometry = MeshRevision.geometry(self.mesh_name)
+        key = (face_index, edge.index)
+        fan = self._tri_fans.get(key)
+        if fan is not None and fan.geometry_revision == geometry:
+            return fan
+
+        snapshot = MeshSnapshot.get_current(self.bm, self.mesh_name)
+        if snapshot is not None:
+            metadata = IndexWalkerMetadata()
+            loops = snapshot.bm_loops(list(tri_fan_walker(snapshot, face_index, edge.index, metadata)))
+            active_loop = snapshot.bm_loop(metadata.active_loop) if metadata.active_loop is not None else None
+        else:
+            metadata = WalkerMetadata()
+            loops = list(bm_tri_fan_walker(self.bm, face_index, edge, metadata))
+            active_loop = metadata.active_loop
+
+        fan = EdgeRingRecord(None, loops, metadata.is_loop, shortest_edge_len=metadata.shortest_edge_len, 
+                             geometry_revision=geometry, active_loop=active_loop)
+        self._tri_fans[key] = fan
+        return fan
+
+    def get_loop_edges(self, edge) -> List[BMEdge]:
+        """ The edges of the edge loop, in the order bmesh_edge_loop_walker() walks them.
+        """
+        catalog = EdgeCatalog.get_current(self.bm, self.mesh_name)
+        key = ('loop', catalog.loop_id(edge.index)) if catalog is not None else ('edge', edge.index)
+        edges = self._loops.get(key)
+        if edges is None:
+            snapshot = MeshSnapshot.get_current(self.bm, self.mesh_name)
+            if snapshot is not None:
+                self.bm.edges.ensure_lookup_table()
+                edges = [self.bm.edges[index] for index in edge_loop_walker(snapshot, edge.index)]
+            else:
+                edges = list(bmesh_edge_loop_walker(edge))
+            self._loops[key] = edges
+        return list(edges)
+
      
 #TODO Put into own module
 #TODO Only instantiate Loop collection when the data changes
@@ -122,11 +301,23 @@ class EdgeDataFactory():
             return data
     
         metadata = WalkerMetadata()
+        ring_index = EdgeRingIndex.get(context.active_object)
         if not selected_only:
             active_loop = get_face_loop_for_edge(face, start_edge)
-            loops = list(bmesh_edge_ring_walker(start_edge, False, metadata))
+            ring = ring_index.get_ring(start_edge)
+            if ring is not None:
+                loops = list(ring.loops)
+                metadata.is_loop = ring.is_loop
+                metadata.active_loop = ring.loop_for_edge.get(start_edge.index)
+                active_object = context.active_object
+                snapshot = MeshSnapshot.get_current(active_object.bm, active_object.name)
+                metadata.shortest_edge_len = ring.get_shortest_edge_len(MeshRevision.geometry(active_object.name), snapshot)
         else:
-            loops = list(bmesh_edge_ring_walker_sel_only(current_edge, metadata))
+            selected_ring = ring_index.get_selected_ring(current_edge)
+            loops = list(selected_ring.loops)
+            metadata.is_loop = selected_ring.is_loop
+            metadata.active_loop = selected_ring.active_loop
+            metadata.shortest_edge_len = selected_ring.shortest_edge_len
 
             if loops and metadata.is_loop:
                 active_loop = metadata.active_loop
@@ -146,8 +337,13 @@ class EdgeDataFactory():
                     return data
 
         if len(loops) < 2 and not selected_only:
-            loops = list(bm_tri_fan_walker(context.active_object.bm, context.current_face_index, start_edge, metadata))
-            active_loop = metadata.active_loop
+            fan = ring_index.get_tri_fan(context.current_face_index, start_edge)
+            loops = list(fan.loops)
+            if len(loops) < 2:
+                return None
+            metadata.is_loop = fan.is_loop
+            metadata.shortest_edge_len = fan.shortest_edge_len
+            active_loop = metadata.active_loop = fan.active_loop
             if loops[1] is not None and active_loop:
                 data = TriFan()
                 data.set_owner(context)
@@ -178,4 +374,51 @@ class EdgeDataFactory():
             data.set_active_loop_endpoints(*get_loop_endpoints())
             return data
         else:
-            return None
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def create_selected_rings(context, exclude_ring_ids=()) -> List[EdgeRing]:
+        """ One EdgeRing for every edge ring that has a selected edge.
+            The first selected edge found in a ring is used as the active edge of that ring.
+        """
+        active_object = context.active_object
+        ring_index = EdgeRingIndex.get(active_object)
+        visited = set(exclude_ring_ids)
+
+        rings = []
+        for edge in active_object.bm.edges:
+            if not edge.select or edge.hide:
+                continue
+
+            ring_id = ring_index.get_ring_id(edge)
+            if ring_id in visited:
+                continue
+            visited.add(ring_id)
+
+            ring = ring_index.get_ring(edge)
+            if ring is None or len(ring.loops) < 2:
+                continue
+
+            active_loop = ring.loop_for_edge.get(edge.index)
+            face_loop = ring.get_face_loop(edge)
+            if active_loop is None or face_loop is None:
+                continue
+
+            start = context.world_mat @ active_loop.vert.co
+            end = context.world_mat @ active_loop.edge.other_vert(active_loop.vert).co
+            if context.flipped:
+                end, start = start, end
+
+            data = EdgeRing()
+            data.set_owner(context)
+            data.set_is_loop(ring.is_loop)
+            data.set_loop_data(list(ring.loops))
+            data.set_shortest_edge_len(ring.get_shortest_edge_len(MeshRevision.geometry(active_object.name), 
+                                                                  MeshSnapshot.get_current(active_object.bm, active_object.name)))
+            data.set_active_loop(active_loop)
+            data.set_active_face(face_loop.face)
+            data.set_other_loop(face_loop)
+            data.set_active_loop_endpoints(start, end)
+            rings.append(data)
+
+        return rings
\ No newline at end of file
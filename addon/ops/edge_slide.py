@@ -8,10 +8,12 @@ from bmesh.types import BMEdge, BMVert
 from mathutils import Vector
 
 from .multi_object_edit import MultiObjectEditing
+from .edge_ring import EdgeRingIndex
 from .. import utils
 from .. utils.observer import Subject
+from .. utils.mesh_revision import MeshRevision
 from .. utils.ops import get_m_button_map as btn, get_undo_keymapping, match_event_to_keymap
-from .. utils.edge_slide import EdgeVertexSlideData, VertSlideType, calculate_edge_slide_directions
+from .. utils.edge_slide import EdgeSlideArrays, EdgeSlideCache, EdgeVertexSlideData, VertSlideType, calculate_edge_slide_directions
 from .. snapping.snapping import SnapContext
 
 from ..ui.widgets import (VLayoutPanel, VLayoutDragPanel, make_hotkey_label)
@@ -77,6 +79,9 @@ class EdgeSlideOperator(bpy.types.Operator, Subject, MultiObjectEditing):
     points_3d = []
 
     slide_verts: Dict[int, EdgeVertexSlideData] = {}
+    slide_arrays: EdgeSlideArrays = None
+    slide_cache: EdgeSlideCache = None
+    slide_preview: utils.draw_3d.SlidePreviewBatch = None
     ss_slide_directions: List[Vector] = []
 
     # Edge Clone
@@ -129,7 +134,10 @@ class EdgeSlideOperator(bpy.types.Operator, Subject, MultiObjectEditing):
         # self.world_mat = context.object.matrix_world.normalized()
         # self.world_inv = context.object.matrix_world.inverted_safe()
 
-        self.slide_verts.clear()
+        self.slide_verts = {}
+        self.slide_arrays = None
+        self.slide_cache = None
+        self.slide_preview = None
         self.loop_vert_pairs.clear()
         self.edge_clones.clear()
         self.split_edges.clear()
@@ -180,6 +188,7 @@ class EdgeSlideOperator(bpy.types.Operator, Subject, MultiObjectEditing):
     def finished(self, context):
         # super().finished(context)
         # self.clear_draw()
+        self.end_slide_preview()
 
         SnapContext.remove(self)
 
@@ -216,6 +225,7 @@ class EdgeSlideOperator(bpy.types.Operator, Subject, MultiObjectEditing):
     def switch_modes(self, context, event):
         # super().finished(context)
         # self.clear_draw()
+        self.end_slide_preview()
         bpy.context.window.cursor_modal_restore()
         # context.workspace.status_text_set(None)
 
@@ -260,6 +270,7 @@ class EdgeSlideOperator(bpy.types.Operator, Subject, MultiObjectEditing):
             if event.type in {'S'}:
                 if not self.mode == Mode.PASS_THROUGH:
                     self.mode = Mode.PASS_THROUGH
+                    self.end_slide_preview()
                     self.is_sliding = False
                     context.area.tag_redraw()
                     return {'RUNNING_MODAL'}
@@ -279,6 +290,10 @@ class EdgeSlideOperator(bpy.types.Operator, Subject, MultiObjectEditing):
             return {'RUNNING_MODAL'}
 
         if match_event_to_keymap(event, get_undo_keymapping()):
+            if self.is_sliding:
+                # The undo reverts the slide, so the previewed positions are dropped
+                self.end_slide_preview(apply=False)
+                self.is_sliding = False
             bpy.ops.ed.undo()
             # self.init_setup(context)
             handled = True
@@ -331,9 +346,11 @@ class EdgeSlideOperator(bpy.types.Operator, Subject, MultiObjectEditing):
             if  event.type == btn('LEFTMOUSE') and event.value == 'PRESS' and not self.is_sliding:
                 mouse_coords = (event.mouse_region_x, event.mouse_region_y)
                 if element_index is not None:
+                    utils.mesh.ensure_indices(self.active_object.bm, self.active_object.data.name)
                     self.selected_edges = [edge.index for edge in self.active_object.bm.edges if edge.select]
+                    ring_index = EdgeRingIndex.get(self.active_object)
                     if not self.selected_edges:
-                        for edge in utils.mesh.bmesh_edge_loop_walker(self.current_edge):
+                        for edge in ring_index.get_loop_edges(self.current_edge):
                             edge.select = True
                             self.selected_edges.append(edge.index)
                             self.active_object.bm.select_flush(True)
@@ -344,7 +361,7 @@ class EdgeSlideOperator(bpy.types.Operator, Subject, MultiObjectEditing):
                                 bm_edge.select = False
 
                             self.selected_edges.clear()
-                            for edge in utils.mesh.bmesh_edge_loop_walker(self.current_edge):
+                            for edge in ring_index.get_loop_edges(self.current_edge):
                                 edge.select = True
                                 self.selected_edges.append(edge.index)
 
@@ -358,7 +375,12 @@ class EdgeSlideOperator(bpy.types.Operator, Subject, MultiObjectEditing):
                         self.nearest_vert_co_2d = utils.math.location_3d_to_2d(nearest_vert_co_world)
                         self.nearest_vert = vert.index
                         
-                        self.slide_verts, self.loops = calculate_edge_slide_directions(self.active_object.bm, edge, self.selected_edges, return_edges=True)
+                        self.slide_cache = EdgeSlideCache.get(self.active_object.bm, self.active_object.data.name, edge, self.selected_edges)
+                        self.slide_verts = self.slide_cache.slide_verts
+                        self.loops = self.slide_cache.edges
+                        self.slide_arrays = self.slide_cache.arrays
+                        if utils.common.prefs().edge_slide_preview:
+                            self.slide_preview = utils.draw_3d.SlidePreviewBatch(self.slide_arrays.bm_verts)
                         self.is_sliding = True
                     else:
                         self.report({'INFO'}, 'At least one edge must be highlighted before using.')
@@ -381,14 +403,20 @@ class EdgeSlideOperator(bpy.types.Operator, Subject, MultiObjectEditing):
 
             if event.type == btn('LEFTMOUSE') and event.value == 'RELEASE' and self.is_sliding:
 
-                utils.mesh.ensure(self.active_object.bm)
-                mesh = self.active_object.data
-                bmesh.update_edit_mesh(mesh)
+                if self.slide_preview is not None:
+                    self.apply_slide_preview()
 
-                bpy.ops.object.mode_set(mode='OBJECT')
-                bpy.ops.object.mode_set(mode='EDIT')
+                # Only vertex positions changed, so no loop indices need to be updated
+                mesh = self.active_object.data
+                MeshRevision.geometry_changed(mesh.name, self.slide_verts.keys() if not self.clone_edge else None)
+                utils.mesh.refresh_edit_bmesh(self.active_object.bm, mesh, destructive=False)
+                if self.slide_cache is not None:
+                    self.slide_cache.slide_finished()
                 
-                self.slide_verts.clear()
+                # The slide data is owned by the cache
+                self.slide_verts = {}
+                self.slide_arrays = None
+                self.slide_cache = None
                 self.loop_vert_pairs.clear()
                
                 self.is_sliding = False
@@ -427,6 +455,9 @@ class EdgeSlideOperator(bpy.types.Operator, Subject, MultiObjectEditing):
 
     
     def draw_callback_3d(self, context):
+        if self.slide_preview is not None:
+            line_color = utils.common.prefs().loop_color
+            self.slide_preview.draw((line_color[0], line_color[1], line_color[2], 0.2), utils.common.prefs().line_width)
 
         if self.points_3d:
             utils.draw_3d.draw_points(self.points_3d, size=5)
@@ -534,6 +565,8 @@ class EdgeSlideOperator(bpy.types.Operator, Subject, MultiObjectEditing):
         return None, None
 
     def edge_slide(self, context, mouse_coords, even, keep_shape):
+        # Cloning edits the topology, so it always writes to the mesh
+        preview = self.slide_preview is not None and not self.clone_edge
         face_slide = False
         mouse_co = Vector(mouse_coords)
         side = 0
@@ -595,85 +628,72 @@ class EdgeSlideOperator(bpy.types.Operator, Subject, MultiObjectEditing):
                             self.bm.edges[index].select = True
 
                         self.slide_verts, self.loops = calculate_edge_slide_directions(self.bm, current_edge, self.selected_edges, return_edges=True)
+                        self.slide_arrays = EdgeSlideArrays(self.bm, self.slide_verts)
                         loop_a, loop_b, _ = utils.mesh.clone_edges(self.bm, side, self.slide_verts, self.loops, True) #Clone
                         self.loop_vert_pairs.update({vert_a: vert_b for (vert_a, vert_b) in zip(loop_a, loop_b)}) #Clone
 
             edge_len = nearest_vert_slide_data.edge_len[side]
 
-            if slide_point is not None:
-                
+            if slide_point is not None and self.slide_arrays is not None:
                 d = (slide_point - vert_orig_co_world).length
-                for data in self.slide_verts.values():
-                    if data is None:
-                        continue
+                slide_arrays = self.slide_arrays
 
-                    vert_index = data.vert # if not clone edge
+                # Cloned edges slide a fixed distance along the side direction, same as keep shape
+                has_side, positions = slide_arrays.positions(side, d, fac, even, keep_shape or (self.clone_edge and not even), edge_len)
+                if preview:
+                    self.slide_preview.update(positions, has_side, self.world_mat, utils.common.prefs().loop_color)
+                    return
 
-                    if self.clone_edge:
-                        if data.slide_type[side] == VertSlideType.FACE_INSET or data.slide_type[side] == VertSlideType.FACE_OUTSET or data.slide_type[side] == VertSlideType.FACE_NGON:
-                            continue
+                if not self.clone_edge:
+                    bm_verts = slide_arrays.bm_verts
+                else:
+                    bm_verts = [self.loop_vert_pairs.get(index) for index in slide_arrays.vert_indices] #Clone
+                    bm_verts = [self.active_object.bm.verts[index] if index is not None else None for index in bm_verts]
+                    has_side = has_side & ~slide_arrays.face_slide[:, side]
 
-                        if data.vert not in self.loop_vert_pairs: #Clone
-                            continue #Clone
-                    
-                        vert_index = self.loop_vert_pairs[data.vert] #Clone
-                    try:
-                        vert = self.active_object.bm.verts[vert_index] 
-                    except IndexError:
-                        continue
-                    o_co = data.vert_orig_co # world_mat
-                    if data.dir_side[side] is None:
-                        continue
-                   
-                    face_slide = data.slide_type[side] == VertSlideType.FACE_INSET or data.slide_type[side] == VertSlideType.FACE_OUTSET or data.slide_type[side] == VertSlideType.FACE_NGON
-
-                    vec_len = data.edge_len[side]
-                    dir_vec_norm = data.dir_side[side]
-                    vert_side_index = data.vert_side[side]
-                    vert_other_side = self.active_object.bm.verts[vert_side_index]
-                    dir = vert_other_side.co # world_mat
-                    if face_slide or keep_shape:
-                     
-                        dir = o_co + (dir_vec_norm * d)
-                        #dir =  o_co + (((dir_vec_norm * d))/ edge_len) previous
-
-                    if even:
-                        l2 = utils.math.remap(0.0, vec_len, 0.0, edge_len, 1)
-                        shifted_point = dir.lerp(o_co, l2)
-                        vert.co = shifted_point + (dir-o_co).normalized() * d
-
-                    elif keep_shape:
-                        if not face_slide:
-                            vert.co = o_co + (dir_vec_norm.normalized() * d)
-                            # offset = o_co + (dir - o_co).normalized() * d
-                            # self.points_3d.append(offset)
-                            # plane_isect = intersect_line_plane(o_co, dir, offset, dir_vec_norm)
-                            # if plane_isect is not None:
-                            #     vert.co = plane_isect
-                        else:
-                            vert.co = dir
-                        
-                    else:
-                        if not face_slide:
-                            if not self.clone_edge:
-                                # factor = utils.math.inv_lerp(o_co, dir, slide_point)
-                                vert.co = o_co.lerp(dir, fac) # Previous prolly for better results when sliding actual percentage
-                            else:
-                                vert.co = o_co + (dir_vec_norm.normalized() * d) # better results when cloning
-                        else:
-                            # if not self.clone_edge:
-                            # vert.co = o_co.lerp(o_co + dir_vec_norm, 0.3)
-                            # else:
-                            vert.co = dir
+                for vert, co, valid in zip(bm_verts, positions.tolist(), has_side.tolist()):
+                    if valid and vert is not None and vert.is_valid:
+                        vert.co = co
 
-        self.active_object.bm.faces.index_update()
-        utils.mesh.bmesh_loop_index_update(self.active_object.bm)
-        self.active_object.bm.select_mode = {'EDGE'}
-        self.active_object.bm.select_flush_mode()
+        if preview:
+            return
 
+        # Only coordinates changed. Indices and selection are still valid from when the slide started
         mesh = self.active_object.data
+        # Cloning adds verts, so only the positions of a plain slide are tracked
+        MeshRevision.geometry_changed(mesh.name, self.slide_verts.keys() if not self.clone_edge else None)
         bmesh.update_edit_mesh(mesh)
     
+    def apply_slide_preview(self):
+        """ Write the last previewed positions to the slid verts.
+        """
+        slide_preview = self.slide_preview
+        self.slide_preview = None
+        if slide_preview.positions is None:
+            return
+
+        positions, valid = slide_preview.positions
+        for vert, co, is_valid in zip(self.slide_arrays.bm_verts, positions.tolist(), valid.tolist()):
+            if is_valid and vert.is_valid:
+                vert.co = co
+
+    def end_slide_preview(self, apply=True):
+        """ Called wherever a slide ends other than the left mouse release.
+            The previewed positions are written to the mesh, same as the slid verts are kept when there is no preview, or dropped.
+        """
+        if self.slide_preview is None:
+            return
+
+        bm = self.active_object.bm if self.active_object is not None else None
+        if not apply or bm is None or not bm.is_valid:
+            self.slide_preview = None
+            return
+
+        self.apply_slide_preview()
+        mesh = self.active_object.data
+        MeshRevision.geometry_changed(mesh.name, self.slide_verts.keys())
+        utils.mesh.refresh_edit_bmesh(bm, mesh, destructive=False)
+
     @staticmethod
     def ensure_bmesh_(edit_object_data):
         obj = edit_object_data.get_bl_object
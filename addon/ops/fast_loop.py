@@ -12,9 +12,14 @@ import bpy
 from mathutils import geometry, Vector 
 
 from ..utils import draw_3d, mesh, ops, common, ui, math
+from ..utils.profiler import Profiler
+from ..utils.result_memo import ResultMemo
+from ..utils.mesh_revision import MeshRevision
 from ..props.fl_properties import MultiLoopProps, SubProps, SnapProps, AllPropsNoSnap
 
 from .fast_loop_common import FastLoopCommon, CurrentPos
+from .edge_ring import EdgeDataFactory, EdgeRingIndex
+from .edge_data import EdgeData
 from .fast_loop_helpers import (Mode, get_active_mode, mode_enabled)
 
 from .actions.insert_single_loop import InsertSingleLoopAction
@@ -31,7 +36,7 @@ from ..keymaps.modal_keymapping import ModalOperatorKeymapCache as km_cache
 from ..ui.gizmos.gizmo_snapping import RP_GGT_SnapGizmoGroup
 
 from ..ui.widgets import (VLayoutPanel, VLayoutDragPanel, make_hotkey_label, make_property_label, 
-                            BL_UI_SliderMulti, make_property_label, make_hotkey_label)
+                            BL_UI_SliderMulti, make_property_label, make_hotkey_label, TextLabel)
 
 class FastLoopOperator(bpy.types.Operator, FastLoopCommon):
     bl_idname = 'fl.fast_loop'
@@ -63,6 +68,12 @@ class FastLoopOperator(bpy.types.Operator, FastLoopCommon):
     single_loop_panel: VLayoutPanel = None
     multi_loop_panel: VLayoutPanel = None
     extras_panel = None
+    profiler_panel = None
+    profiler_panel_updated = 0.0
+    # Scopes timed by the profiler. Displayed in this order in the HUD.
+    profiler_scopes = ("Modal", "Snapping", "Ring", "Points", "Arrows", "Slider", "Draw 3D", "Draw 2D")
+    # Skips the snap/update pass when nothing it depends on changed since the last event
+    update_memo: ResultMemo = None
 
     event_handler = None
     last_numeric_input_results: NumericInputResults = None
@@ -250,6 +261,13 @@ class FastLoopOperator(bpy.types.Operator, FastLoopCommon):
         self.main_panel_hud.add_child_widget("Extras", self.extras_panel)
         self.main_panel_hud.set_child_visibility_by_name("Extras", not common.prefs().panel_minimized)
 
+        Profiler.enabled = common.prefs().enable_profiler
+        Profiler.reset()
+        self.profiler_panel = None
+        if Profiler.enabled:
+            self.profiler_panel = self.create_profiler_panel(context)
+            self.main_panel_hud.add_child_widget("Profiler", self.profiler_panel)
+
         self.main_panel_hud.set_location(main_panel_hud_x,main_panel_hud_y)
         self.single_loop_panel.set_location(main_panel_hud_x,main_panel_hud_y)
         self.multi_loop_panel.set_location(main_panel_hud_x,main_panel_hud_y)
@@ -267,6 +285,8 @@ class FastLoopOperator(bpy.types.Operator, FastLoopCommon):
         self.slider_widget.show_min_max = False
         self.slider_widget.text_size = 10
 
+        self.update_memo = ResultMemo("Snap Update")
+
         self.push_action(InsertSingleLoopAction(self))
 
 
@@ -283,6 +303,15 @@ class FastLoopOperator(bpy.types.Operator, FastLoopCommon):
     def cleanup(self, context):
         super().cleanup(context)
 
+        if Profiler.enabled:
+            dump_path = common.prefs().profiler_dump_path
+            if dump_path:
+                try:
+                    Profiler.dump(bpy.path.abspath(dump_path), label=self.bl_idname)
+                except OSError as e:
+                    print(f"Unable to write the profiler timings: {e}")
+            Profiler.enabled = False
+
         if self.snap_context is not None:
             props = self.snap_props
             if props.use_snap_points:
@@ -377,7 +406,8 @@ class FastLoopOperator(bpy.types.Operator, FastLoopCommon):
                     self.current_position = CurrentPos(nearest_co, self.world_inv @ nearest_co)
 
                 self.current_action.update()
-                self.update_slider()
+                with Profiler.scope("Slider"):
+                    self.update_slider()
         
 
 
@@ -400,8 +430,16 @@ class FastLoopOperator(bpy.types.Operator, FastLoopCommon):
         else:
             return self.multi_loop_props.scale
 
-    # @utils.safety.decorator
     def modal(self, context, event):
+        with Profiler.scope("Modal"):
+            result = self.handle_modal(context, event)
+
+        if Profiler.enabled and self.profiler_panel is not None and not result & {'CANCELLED', 'FINISHED'}:
+            self.update_profiler_panel()
+        return result
+
+    # @utils.safety.decorator
+    def handle_modal(self, context, event):
         if context.mode != 'EDIT_MESH' or (self.invoked_by_tool and not \
         any(tool_name in {'fl.fast_loop_tool'} \
             for tool_name in [tool.idname for tool in context.workspace.tools])) or self.cancelled:
@@ -472,34 +510,12 @@ class FastLoopOperator(bpy.types.Operator, FastLoopCommon):
                 self.snap_context.add_object(editable_object_data.get_bl_object)
 
         if self.snap_context is not None and (not self.is_scaling and not mode_enabled(Mode.EDGE_SLIDE) or mode_enabled(Mode.REMOVE_LOOP)):  
-            self.update_snap_context()
-
             mouse_coords = (event.mouse_region_x, event.mouse_region_y)
-            try:
-                self.current_face_index, element_index, nearest_co = None, None, None
-                snap_results = self.snap_context.do_snap_objects([obj.get_bl_object for obj in self.selected_editable_objects.values()], mouse_coords, mouse_coords_win)
-                if snap_results is not None:
-                    self.current_face_index, element_index, nearest_co, bl_object = snap_results
-                    if not self.is_snapping:
-                        self.active_object = self.selected_editable_objects[bl_object.name]
-
-                        if not (self.is_snapping and self.snap_enabled):
-                            self.current_position = CurrentPos(nearest_co, self.world_inv @ nearest_co)
-                            self.update(element_index)
-
-                    elif self.freeze_edge and nearest_co is not None:
-                        self.update(self.frozen_edge_index, nearest_co)
-                
-                elif not self.freeze_edge and snap_results is None:
-                    self.current_edge = None
-                    self.loop_draw_points.clear()
-                    self.update_arrows()
-                    self.slider_widget.remove_all_thumbs()
-                 
-            except (ReferenceError, KeyError):
-                self.active_object = self.selected_editable_objects[context.active_object.name]
-            except Exception as e:
-                return self.exception_occured(context)
+            memo_key = self.get_update_memo_key(context, mouse_coords_win)
+            if not self.update_memo.lookup(memo_key):
+                result = self.update_snap_and_loops(context, mouse_coords, mouse_coords_win, memo_key)
+                if result is not None:
+                    return result
                 
         elif self.is_scaling:
             self.current_action.update()
@@ -524,6 +540,70 @@ class FastLoopOperator(bpy.types.Operator, FastLoopCommon):
             return {'PASS_THROUGH'}
 
 
+    def get_update_memo_key(self, context, mouse_coords_win):
+        """ Everything the snap/update pass depends on: the region under the cursor and its view, the mouse position,
+            the revisions of the edited meshes and the options. Returns None when the pass can't be skipped.
+        """
+        if self.loop_position_override or self.is_snapping:
+            return None
+
+        region, win_size, rv3d, is_perspective = ui.get_screen_data_for_3d_view(context, mouse_coords_win)
+        if not all((region, win_size, rv3d)):
+            return None
+
+        meshes = []
+        for editable_object_data in self.selected_editable_objects.values():
+            bm = editable_object_data.bm
+            if not bm.is_valid:
+                return None
+            name = editable_object_data.name
+            meshes.append((id(bm), MeshRevision.stamp(bm, name), MeshRevision.geometry(name), MeshRevision.state(name)))
+
+        options = self.fast_loop_options
+        option_values = tuple(getattr(options, name) for name in options.bl_rna.properties.keys() if name != 'rna_type')
+
+        return (region.as_pointer(), tuple(win_size), is_perspective, tuple(value for row in rv3d.perspective_matrix for value in row),
+                tuple(mouse_coords_win), tuple(meshes), option_values,
+                self.active_object.name, self.snap_enabled, self.frozen_edge_index, self.force_offset_value, type(self.current_action))
+
+
+    def update_snap_and_loops(self, context, mouse_coords, mouse_coords_win, memo_key):
+        self.update_snap_context()
+
+        try:
+            self.current_face_index, element_index, nearest_co = None, None, None
+            with Profiler.scope("Snapping"):
+                snap_results = self.snap_context.do_snap_objects([obj.get_bl_object for obj in self.selected_editable_objects.values()], mouse_coords, mouse_coords_win)
+            if snap_results is not None:
+                self.current_face_index, element_index, nearest_co, bl_object = snap_results
+                if not self.is_snapping:
+                    self.active_object = self.selected_editable_objects[bl_object.name]
+
+                    if not (self.is_snapping and self.snap_enabled):
+                        self.current_position = CurrentPos(nearest_co, self.world_inv @ nearest_co)
+                        self.update(element_index)
+
+                elif self.freeze_edge and nearest_co is not None:
+                    self.update(self.frozen_edge_index, nearest_co)
+            
+            elif not self.freeze_edge and snap_results is None:
+                self.current_edge = None
+                self.loop_draw_points.clear()
+                self.update_arrows()
+                self.slider_widget.remove_all_thumbs()
+
+            # The key is taken before the pass. Anything the pass changed (the active object, ...) makes the next lookup miss.
+            self.update_memo.store(memo_key)
+             
+        except (ReferenceError, KeyError):
+            self.update_memo.clear()
+            self.active_object = self.selected_editable_objects[context.active_object.name]
+        except Exception as e:
+            self.update_memo.clear()
+            return self.exception_occured(context)
+        return None
+
+
     def disable_snapping(self, context):
         context.window_manager.gizmo_group_type_unlink_delayed(RP_GGT_SnapGizmoGroup.bl_idname)
         bpy.context.scene.tool_settings.use_snap = False
@@ -654,6 +734,59 @@ class FastLoopOperator(bpy.types.Operator, FastLoopCommon):
 
         return selected_edges
 
+
+    def create_geometry_on_selected_rings(self, select_new_edges=False):
+        """ Insert the loops shown under the cursor and the same cut on every edge ring that has a selected edge.
+            The factor along the active edge is reused for each ring. All the rings are split in one bmesh pass.
+            The loops of a ring run in the direction it was walked, so the points of rings that run against the active edge are flipped.
+            That way the factor is measured from the same side on every ring. The flipped option itself is left alone.
+        """
+        if self.edge_data is None or self.loop_data is None:
+            return None
+
+        if self.force_offset_value == -1:
+            position = self.current_position.world if not self.is_snapping else self.snap_position
+            start_pos, end_pos = self.loop_data.get_active_loop_endpoints()
+            _, factor = geometry.intersect_point_line(position, start_pos, end_pos)
+        else:
+            factor = self.force_offset_value
+
+        rings = [(self.edge_data.edges, self.edge_data.points, self.edge_data.edge_verts, self.is_loop)]
+        active_start, active_end = self.loop_data.get_active_loop_endpoints()
+        active_direction = active_end - active_start
+
+        # The point algorithms read the ring being computed from the operator
+        current_edge = self.current_edge
+        loop_data = self.loop_data
+        force_offset_value = self.force_offset_value
+        flipped = self.flipped
+        self.force_offset_value = factor
+        try:
+            props = self.get_all_props_no_snap()
+            exclude = {EdgeRingIndex.get(self.active_object).get_ring_id(current_edge)}
+            with Profiler.scope("Ring"):
+                selected_rings = EdgeDataFactory.create_selected_rings(self, exclude)
+
+            for ring in selected_rings:
+                # Both endpoint pairs are swapped when flipped, so the comparison doesn't depend on it
+                start, end = ring.get_active_loop_endpoints()
+                reversed_ring = active_direction.dot(end - start) < 0.0
+
+                self.loop_data = ring
+                self.current_edge = ring.get_active_loop().edge
+                with Profiler.scope("Points"):
+                    edge_data = EdgeData(ring, props, flipped != reversed_ring)
+                rings.append((edge_data.edges, edge_data.points, edge_data.edge_verts, ring.get_is_loop()))
+        finally:
+            self.current_edge = current_edge
+            self.loop_data = loop_data
+            self.force_offset_value = force_offset_value
+
+        selected_edges = self.create_geometry_on_rings(rings, select_new_edges=select_new_edges)
+        self.loop_draw_points.clear()
+
+        return selected_edges
+
     # TODO: Refactor. This should not be in this class.
     def update_slider(self):
         static_slider = not self.loop_position_override
@@ -706,7 +839,7 @@ class FastLoopOperator(bpy.types.Operator, FastLoopCommon):
         panel.visible = False
         ignore = {"use_multi_loop_offset", "loop_space_value",
                 "insert_verts", "insert_on_selected_edges", "freeze_edge", "use_snap_points", "lock_snap_points", 
-                "increase_loop_count", "decrease_loop_count", "insert_midpoint"}
+                "increase_loop_count", "decrease_loop_count", "insert_midpoint", "insert_on_selected_rings"}
 
         self.populate_panel(context, panel, ignore)
         return panel
@@ -717,7 +850,7 @@ class FastLoopOperator(bpy.types.Operator, FastLoopCommon):
         panel.bg_color = (0.8, 0.8, 0.8, 0.1)
         panel.visible = False
         ignore = {"insert_verts", "insert_on_selected_edges", "freeze_edge", "use_snap_points", "lock_snap_points", 
-                "increase_loop_count", "decrease_loop_count", "insert_midpoint"}
+                "increase_loop_count", "decrease_loop_count", "insert_midpoint", "insert_on_selected_rings"}
 
         self.populate_panel(context, panel, ignore)
         return panel
@@ -726,14 +859,37 @@ class FastLoopOperator(bpy.types.Operator, FastLoopCommon):
         extras_panel = VLayoutPanel(context, 100, 100, (70,100), 1, None)
         extras_panel.bg_color = (0.8, 0.0, 0.0, 0.0)
 
-        hotkey_only = {"increase_loop_count", "decrease_loop_count"}
+        hotkey_only = {"increase_loop_count", "decrease_loop_count", "insert_on_selected_rings"}
         misc = {"Set Loop Count": "(1-9)", "Remove Loop": "(Ctrl+Shift)", "Slide Loop": "Alt" if not common.prefs().use_spacebar else "Spacebar"}
         ignore = {"use_even", "flipped", "mirrored", "perpendicular", "use_multi_loop_offset", "loop_space_value",
-                "increase_loop_count", "decrease_loop_count", "insert_midpoint"}
+                "increase_loop_count", "decrease_loop_count", "insert_midpoint", "insert_on_selected_rings"}
         
         self.populate_panel(context, extras_panel, ignore, hotkey_only, misc)
         return extras_panel
 
+    def create_profiler_panel(self, context):
+        profiler_panel = VLayoutPanel(context, 100, 100, (70,100), 1, None)
+        profiler_panel.bg_color = (0.8, 0.0, 0.0, 0.0)
+
+        profiler_panel.add_child_widget("Profiler", TextLabel(0, 0, 20, 10, 1, context, "Profiler: p50 / p95 / max"))
+        for scope in self.profiler_scopes:
+            profiler_panel.add_child_widget(scope, TextLabel(0, 0, 20, 10, 1, context, f"{scope}: -"))
+        profiler_panel.add_child_widget("Snap Memo", TextLabel(0, 0, 20, 10, 1, context, "Snap Memo: -"))
+        return profiler_panel
+
+    def update_profiler_panel(self):
+        # Updating the labels on every event would show up in the timings
+        now = time.perf_counter()
+        if now - self.profiler_panel_updated < 0.25:
+            return
+        self.profiler_panel_updated = now
+
+        for scope in self.profiler_scopes:
+            self.profiler_panel.update_widget(scope, Profiler.format_stats(scope))
+        memo = self.update_memo
+        self.profiler_panel.update_widget("Snap Memo", f"{memo.hits} hits / {memo.misses} misses ({memo.hit_rate:.0%})")
+        self.main_panel_hud.layout_widgets()
+
     def populate_panel(self, context, panel, ignore, hotkey_only=None, misc=None):
 
         hotkey_only = {} if hotkey_only is None else hotkey_only
@@ -7,30 +7,31 @@ from ..utils import draw_3d
 
 
 class DrawLoopsMixin():
+   # Shared by the actions so that switching actions doesn't rebuild the preview
+   loop_preview_batch = draw_3d.LoopPreviewBatch()
+
    def draw_3d(self, bl_context):
-        color = prefs().loop_color
-        line_width = prefs().line_width
-        transposed_array = list(map(list, zip(*self.context.loop_draw_points)))
-        for loop in transposed_array:
-            if self.context.is_loop:
-                draw_3d.draw_line_loop(loop, color, line_width, depth_test=prefs().occlude_lines)
-            else:
+        loop_draw_points = self.context.loop_draw_points
+        if loop_draw_points:
+            color = tuple(prefs().loop_color)
+            # The points only change when a new EdgeData is created
+            version = getattr(self.context.edge_data, 'version', None)
+            key = (version, len(loop_draw_points), self.context.is_loop, color)
+
+            batch = self.loop_preview_batch
+            if batch.key != key:
                 # TODO find out and fix the cause of a value exception after placing loops while used selected edges is enabled.
                 with suppress(ValueError):
-                    draw_3d.draw_line(loop, color, line_width, depth_test=prefs().occlude_lines)
+                    batch.rebuild(key, list(map(list, zip(*loop_draw_points))), self.context.is_loop, color)
+
+            batch.draw_lines(color, prefs().line_width, depth_test=prefs().occlude_lines)
             
-            if prefs().draw_loop_vertices:
-                draw_3d.draw_points(loop, prefs().vertex_color, prefs().vertex_size, depth_test=prefs().occlude_points)
+            if prefs().draw_loop_vertices or self.context.is_single_edge:
+                batch.draw_points(prefs().vertex_color, prefs().vertex_size, depth_test=prefs().occlude_points)
 
         start_pos = self.context.loop_data.get_active_loop_endpoints().start if self.context.loop_data is not None else None
         if self.context.use_even and start_pos is not None:
             draw_3d.draw_point(start_pos, color=(1.0, 0.0, 0.0, 0.4))
-            
-        if self.context.is_single_edge and self.context.loop_draw_points:
-            
-            for loop in self.context.loop_draw_points:
-                with suppress(ValueError):
-                    draw_3d.draw_points(loop, prefs().vertex_color, prefs().vertex_size, depth_test=prefs().occlude_points)
 
 class DrawDirectionArrowMixin():
     def draw_3d(self, bl_context):
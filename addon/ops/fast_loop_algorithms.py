@@ -6,6 +6,8 @@ if TYPE_CHECKING:
     from ..props.fl_properties import AllPropsNoSnap
 
 
+import numpy as np
+from mathutils import Vector
 from mathutils.geometry import intersect_line_plane
 from .. import utils
 
@@ -14,13 +16,13 @@ from .fast_loop_helpers import Mode, mode_enabled
 
 class ComputeEdgePostitonsStrategy(ABC):
     @staticmethod
-    def execute(context: FastLoopCommon, props: AllPropsNoSnap, start, end, factor, flipped):
+    def execute(context: FastLoopCommon, props: AllPropsNoSnap, start, end, factor, flipped, ring_flipped):
         pass
 
 
 class ComputeEdgePostitonsSingleAlgorithm(ComputeEdgePostitonsStrategy):
     @staticmethod
-    def execute(context: FastLoopCommon, props: AllPropsNoSnap, start, end, factor, flipped):
+    def execute(context: FastLoopCommon, props: AllPropsNoSnap, start, end, factor, flipped, ring_flipped):
         points = []
         mirrored_points = []
         world_mat = context.world_mat
@@ -77,11 +79,11 @@ class ComputeEdgePostitonsSingleAlgorithm(ComputeEdgePostitonsStrategy):
             points.extend(mirrored_points)
         is_reversed = False
         if mirrored:
-            if factor > 0.5 and not context.flipped:
+            if factor > 0.5 and not ring_flipped:
                 points.reverse()
                 is_reversed = True
 
-            elif factor < 0.5 and context.flipped:
+            elif factor < 0.5 and ring_flipped:
                 points.reverse()
                 is_reversed = True
 
@@ -90,7 +92,7 @@ class ComputeEdgePostitonsSingleAlgorithm(ComputeEdgePostitonsStrategy):
 
 class ComputeEdgePostitonsMultiAlgorithm(ComputeEdgePostitonsStrategy):
     @staticmethod
-    def execute(context: FastLoopCommon, props: AllPropsNoSnap, start, end, factor, flipped):
+    def execute(context: FastLoopCommon, props: AllPropsNoSnap, start, end, factor, flipped, ring_flipped):
         ml_props = props.multi_loop
         points = []
         mirrored_points = []
@@ -233,7 +235,7 @@ class ComputeEdgePostitonsMultiAlgorithm(ComputeEdgePostitonsStrategy):
 
         is_reversed = False
         if not ml_props.use_multi_loop_offset:
-            if not context.flipped or (context.flipped and mirrored):
+            if not ring_flipped or (ring_flipped and mirrored):
                 points.reverse()
 
             if mirrored:
@@ -244,36 +246,175 @@ class ComputeEdgePostitonsMultiAlgorithm(ComputeEdgePostitonsStrategy):
                 elif factor > 0.5 and not use_even:
                     points.extend(mirrored_points)
                 
-                if context.flipped:
+                if ring_flipped:
                     points.reverse()
                     is_reversed = True
         
         elif ml_props.use_multi_loop_offset:
-            if context.flipped:
+            if ring_flipped:
                 points.reverse()
 
             if mirrored:
-                if not context.flipped:
+                if not ring_flipped:
                     points.reverse()
 
                 if factor > 0.5:
                     if not perpendicular:
                         mirrored_points.reverse()
                     points.extend(mirrored_points)
-                    if not context.flipped:
+                    if not ring_flipped:
                         is_reversed = True
                 elif factor < 0.5:
                     if not perpendicular:
                         mirrored_points.reverse()
                     points[:0] = mirrored_points
-                    if context.flipped:
+                    if ring_flipped:
                         is_reversed = True
 
-                if not context.flipped:
+                if not ring_flipped:
                     points.reverse()
                     
         return points, is_reversed
 
+    @staticmethod
+    def execute_batch(context: FastLoopCommon, props: AllPropsNoSnap, edge_cos, factor, flipped, ring_flipped):
+        """ Vectorized version of execute() that computes the points for every edge of a ring in one call.
+            execute() is kept as the reference implementation; both must return the same points.
+
+            Args:
+                edge_cos: (N, 2, 3) array containing the local start and end coordinates of each edge.
+                factor: The factor shared by all of the edges.
+                flipped: (N,) bool array.
+                ring_flipped: The flipped state of the ring the edges belong to.
+
+            Returns:
+                A list containing the world space points for each edge and a list containing the is_reversed flag for each edge.
+        """
+        ml_props = props.multi_loop
+        use_even = props.common.use_even
+        perpendicular = props.common.perpendicular
+        mirrored = props.common.mirrored
+        use_offset = ml_props.use_multi_loop_offset
+        n = int(context.segments)
+
+        edge_cos = np.asarray(edge_cos, dtype=np.float64)
+        flipped = np.asarray(flipped, dtype=bool)
+        num_edges = len(edge_cos)
+        if num_edges == 0 or n <= 0:
+            return [[] for _ in range(num_edges)], [False] * num_edges
+
+        start = np.where(flipped[:, None], edge_cos[:, 1], edge_cos[:, 0])[:, None, :]
+        end = np.where(flipped[:, None], edge_cos[:, 0], edge_cos[:, 1])[:, None, :]
+        edge_len = np.linalg.norm(edge_cos[:, 1] - edge_cos[:, 0], axis=-1)[:, None, None]
+        degenerate = edge_len == 0.0
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            factors = np.full((num_edges, 1, 1), factor, dtype=np.float64)
+            if use_even and not perpendicular:
+                factors = _remap_from_edge_len(edge_len, context.current_edge.calc_length(), factors)
+            factors = np.clip(factors, 0.0, 1.0)
+
+            init_scale_factor = 0.0
+            if context.segments >= 2:
+                init_scale_factor = utils.math.remap(0.0, 1.0, 0.0, 1.0 + (2.0/( context.segments - 1.0)), utils.math.clamp(0, ml_props.scale, 1))
+            scale_factor = np.full((num_edges, 1, 1), init_scale_factor, dtype=np.float64)
+            if (not use_offset and use_even and not perpendicular) or (use_offset and not perpendicular):
+                scale_factor = _remap_from_edge_len(edge_len, context.loop_data.get_shortest_edge_len(), scale_factor)
+
+            percent = ((1.0 + np.arange(n, dtype=np.float64)) / (n + 1.0))[None, :, None]
+            mid = (start + end) * 0.5
+            origin = start + (end - start) * factors
+            origin_m = end + (start - end) * factors
+
+            endpoints_local = None
+            if perpendicular:
+                start_pos, end_pos = context.loop_data.get_active_loop_endpoints()
+                endpoints_local = (np.array(context.world_inv @ start_pos), np.array(context.world_inv @ end_pos))
+
+            points_m = None
+            if not use_offset:
+                pos = end + (start - end) * percent
+                scale = mid + (pos - mid) * scale_factor
+                points = _constrain_to_segments(start, scale + (origin - mid), end)
+                if perpendicular:
+                    points = _straight_multiloop(endpoints_local, end, start, percent, factors, scale_factor, False, points)
+                if mirrored:
+                    points = _constrain_to_segments(start, points, mid)
+
+                    points_m = scale + (origin_m - mid)
+                    if perpendicular:
+                        points_m = _straight_multiloop(endpoints_local, end, start, percent, factors, scale_factor, True, points_m)
+                    points_m = _constrain_to_segments(mid, points_m, end)
+            else:
+                pos = origin + (end - start) * percent
+                scale = origin + (pos - origin) * scale_factor
+                points = _constrain_to_segments(start, scale - ((scale_factor * (end - start)) / (n + 1)), end)
+                if perpendicular:
+                    points = _straight_multiloop_offset(endpoints_local, context.segments, start, end, percent, factors, scale_factor, False, points)
+                if mirrored:
+                    pos = origin_m - (end - start) * (1 - percent)
+                    scale = origin_m + (pos - origin_m) * scale_factor
+                    points_m = _constrain_to_segments(end, scale - ((scale_factor * (start - end)) / (n + 1)), start)
+                    if perpendicular:
+                        points_m = _straight_multiloop_offset(endpoints_local, context.segments, end, start, percent, factors, scale_factor, True, points_m)
+
+        # The reference implementation raises for zero length edges; collapse their points onto the edge instead.
+        points = np.where(degenerate, start, points)
+        points = _transform_points(context.world_mat, points).tolist()
+        if points_m is not None:
+            points_m = np.where(degenerate, start, points_m)
+            points_m = _transform_points(context.world_mat, points_m).tolist()
+
+        all_points = []
+        all_reversed = []
+        for i, edge_factor in enumerate(factors[:, 0, 0].tolist()):
+            edge_points = points[i]
+            edge_points_m = points_m[i] if points_m is not None else None
+            is_reversed = False
+
+            if not use_offset:
+                if not ring_flipped or (ring_flipped and mirrored):
+                    edge_points.reverse()
+
+                if mirrored:
+                    if edge_factor < 0.5:
+                        edge_points_m.reverse()
+                        edge_points.extend(edge_points_m)
+                    elif edge_factor > 0.5 and not use_even:
+                        edge_points.extend(edge_points_m)
+
+                    if ring_flipped:
+                        edge_points.reverse()
+                        is_reversed = True
+            else:
+                if ring_flipped:
+                    edge_points.reverse()
+
+                if mirrored:
+                    if not ring_flipped:
+                        edge_points.reverse()
+
+                    if edge_factor > 0.5:
+                        if not perpendicular:
+                            edge_points_m.reverse()
+                        edge_points.extend(edge_points_m)
+                        if not ring_flipped:
+                            is_reversed = True
+                    elif edge_factor < 0.5:
+                        if not perpendicular:
+                            edge_points_m.reverse()
+                        edge_points[:0] = edge_points_m
+                        if ring_flipped:
+                            is_reversed = True
+
+                    if not ring_flipped:
+                        edge_points.reverse()
+
+            all_points.append([Vector(point) for point in edge_points])
+            all_reversed.append(is_reversed)
+
+        return all_points, all_reversed
+
 def scale_point_along_edge(point, start, end, scale_fac):
             return utils.math.scale_points_along_line([point], start, end, scale_fac)[0]
         
@@ -287,6 +428,73 @@ def calc_line_plane_intersection(start, end, plane_normal, plane_origin, fallbac
     else:
         return fallback
 
+# Vectorized helpers used by ComputeEdgePostitonsMultiAlgorithm.execute_batch
+# Points are (N, n, 3) arrays where N is the number of edges and n the number of loops.
+def _remap_from_edge_len(edge_len, new_len, value):
+    # Same as utils.math.remap(0.0, edge_len, 0.0, new_len, value)
+    return np.where(edge_len == 0.0, 1.0 / value, (value / edge_len) * new_len)
+
+def _constrain_to_segments(seg_start, points, seg_end):
+    # Same as utils.math.constrain_point_to_line_seg
+    seg_vec = seg_end - seg_start
+    seg_len_sq = np.sum(seg_vec * seg_vec, axis=-1, keepdims=True)
+    percent = np.sum((points - seg_start) * seg_vec, axis=-1, keepdims=True)
+    percent = np.divide(percent, seg_len_sq, out=np.zeros_like(percent), where=seg_len_sq != 0.0)
+
+    constrained = np.where(percent < 0.0, seg_start, points)
+    return np.where(percent > 1.0, seg_end, constrained)
+
+def _intersect_lines_planes(start, end, plane_normal, plane_origins, fallback):
+    # Same as calc_line_plane_intersection
+    line_vec = end - start
+    dot = np.sum(line_vec * plane_normal, axis=-1, keepdims=True)
+    valid = np.abs(dot) > np.finfo(np.float32).eps
+    safe_dot = np.where(valid, dot, 1.0)
+    fac = -np.sum((start - plane_origins) * plane_normal, axis=-1, keepdims=True) / safe_dot
+    isect_points = _constrain_to_segments(start, start + line_vec * fac, end)
+    return np.where(valid, isect_points, fallback)
+
+def _normalized(vec):
+    length = np.linalg.norm(vec)
+    return vec / length if length != 0.0 else vec
+
+def _straight_multiloop(endpoints_local, start, end, percent, c_factor, scale_factor, mirrored, fallback):
+    # Same as straight_multiloop
+    start_pos_local, end_pos_local = endpoints_local
+    if not mirrored:
+        origin = start_pos_local + (end_pos_local - start_pos_local) * c_factor
+    else:
+        origin = end_pos_local + (start_pos_local - end_pos_local) * c_factor
+
+    mid = (start_pos_local + end_pos_local) * 0.5
+    pos = end_pos_local + (start_pos_local - end_pos_local) * percent
+    scale = mid + (pos - mid) * scale_factor
+
+    plane_normal = _normalized(end_pos_local - start_pos_local)
+    plane_origins = scale + (origin - mid)
+    return _intersect_lines_planes(start, end, plane_normal, plane_origins, fallback)
+
+def _straight_multiloop_offset(endpoints_local, segments, start, end, percent, c_factor, scale_factor, mirrored, fallback):
+    # Same as straight_multiloop_offset
+    start_pos_local, end_pos_local = endpoints_local
+    if not mirrored:
+        direction = end_pos_local - start_pos_local
+        origin = start_pos_local + direction * c_factor
+    else:
+        direction = start_pos_local - end_pos_local
+        origin = end_pos_local + direction * c_factor
+
+    pos = origin + direction * percent
+    scale = origin + (pos - origin) * scale_factor
+
+    plane_normal = _normalized(end_pos_local - start_pos_local)
+    plane_origins = scale - ((scale_factor * direction) / (segments + 1))
+    return _intersect_lines_planes(start, end, plane_normal, plane_origins, fallback)
+
+def _transform_points(matrix, points):
+    matrix = np.array(matrix, dtype=np.float64)
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
 def straight_multiloop(context, start, end, percent, c_factor, scale_factor, mirrored, fallback):
     start_pos, end_pos = context.loop_data.get_active_loop_endpoints()
 
@@ -333,7 +541,7 @@ def straight_multiloop_offset(context, start, end, percent, c_factor, scale_fact
 import bpy
 class ComputeEdgePostitonsOverrideAlgorithm(ComputeEdgePostitonsStrategy):
     @staticmethod
-    def execute(context, props: AllPropsNoSnap, start, end, factor, flipped):
+    def execute(context, props: AllPropsNoSnap, start, end, factor, flipped, ring_flipped):
         points = []
         mirrored_points = []
         world_mat = context.world_mat
@@ -1,26 +1,48 @@
 from __future__ import annotations
 from traceback import print_exc
-from collections import namedtuple
-from typing import List, Set, TYPE_CHECKING
+from collections import namedtuple, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, TYPE_CHECKING
 if TYPE_CHECKING:
-    from bmesh.types import BMEdge
+    from bmesh.types import BMEdge, BMFace
 
 import bpy, bmesh
 from bpy.types import Object
+from bmesh.types import BMVert
 
 from .. utils import common, draw_3d, mesh, math
+from .. utils.mesh_revision import MeshRevision
+from .. utils.profiler import Profiler
 from .. props import addon
 from ..props.fl_properties import CommonProps
 from .. snapping.snapping import SnapContext
 
 from . fast_loop_helpers import (get_options, get_props, set_prop)
-from .fast_loop_actions import Actions
+from .fast_loop_actions import Actions, DrawLoopsMixin
 from .multi_object_edit import MultiObjectEditing
 
 from .edge_ring import LoopCollection
 from .edge_data import EdgeData
      
 CurrentPos = namedtuple('CurrentPos','world local')
+
+@dataclass
+class EdgeSplit():
+    edge: BMEdge
+    vert_a: BMVert
+    vert_b: BMVert
+    # Sorted factors along the edge from vert_a to vert_b
+    factors: List[float]
+    # The uvs at vert_a and vert_b for each uv layer. Keyed by 1 if the face loop starts at vert_a, -1 if it starts at vert_b
+    face_uvs: Dict[int, List] = field(default_factory=dict)
+
+@dataclass
+class SplitPlan():
+    edge_splits: List[EdgeSplit]
+    cuts: int
+    # Every face that has one of the split edges
+    faces: Set[BMFace] = field(default_factory=set)
+
 class FastLoopCommon(Actions, MultiObjectEditing):
     common_props: CommonProps = CommonProps()
 #region -Properties
@@ -67,7 +89,6 @@ class FastLoopCommon(Actions, MultiObjectEditing):
 #endregion
     edge_pos_algorithm = None
 
-    dirty_mesh = False
     current_edge = None
     current_face_index = None
     current_face_index = None
@@ -157,13 +178,9 @@ class FastLoopCommon(Actions, MultiObjectEditing):
         self.points_3d.clear()
         self.selected_editable_objects.clear()
         self.loop_draw_points.clear()
+        DrawLoopsMixin.loop_preview_batch.clear()
         self.cancelled = False
 
-        if self.dirty_mesh:
-            bpy.ops.object.mode_set(mode='OBJECT')
-            bpy.ops.object.mode_set(mode='EDIT')
-            self.dirty_mesh = False
-
         if getattr(self, 'draw_handler_2d', None):
             self.draw_handler_2d = bpy.types.SpaceView3D.draw_handler_remove(self.draw_handler_2d, 'WINDOW')
 
@@ -178,7 +195,8 @@ class FastLoopCommon(Actions, MultiObjectEditing):
 
 
     def draw_3d(self, context):
-        self.current_action.draw_3d(context)
+        with Profiler.scope("Draw 3D"):
+            self.current_action.draw_3d(context)
         # Debug points
         # if self.points_3d and not self.points_3d_colors:
         draw_3d.draw_points(self.points_3d, size=5)
@@ -188,7 +206,8 @@ class FastLoopCommon(Actions, MultiObjectEditing):
             
     
     def draw_2d(self, context):
-        self.current_action.draw_ui(context)
+        with Profiler.scope("Draw 2D"):
+            self.current_action.draw_ui(context)
     
 
     def modal(self, context, event):
@@ -199,6 +218,218 @@ class FastLoopCommon(Actions, MultiObjectEditing):
     def create_geometry(self, edges, points, edge_verts, num_segments, select_new_edges=False)-> None | Set[BMEdge]:
         bm = self.ensure_bmesh_(self.active_object)
 
+        try:
+            plan = self.compute_split_plan(bm, edges, points, edge_verts)
+        except ReferenceError:
+           return self.exception_occured(bpy.context)
+
+        if plan is None:
+            return self.create_geometry_per_edge(edges, points, edge_verts, num_segments, select_new_edges)
+
+        return self.apply_split_plans(bm, [plan], select_new_edges)
+
+
+    def create_geometry_on_rings(self, rings, select_new_edges=False)-> None | Set[BMEdge]:
+        """ Insert the loops on several edge rings with one apply_split_plans() pass.
+            rings is a list of (edges, points, edge_verts, is_loop) tuples.
+            Rings that can't be cut with subdivide_edges or that share a face with a ring before them are skipped.
+        """
+        bm = self.ensure_bmesh_(self.active_object)
+
+        plans = []
+        used_faces = set()
+        skipped = 0
+        try:
+            for edges, points, edge_verts, is_loop in rings:
+                plan = self.compute_split_plan(bm, edges, points, edge_verts, is_loop)
+                if plan is None or not plan.faces.isdisjoint(used_faces):
+                    skipped += 1
+                    continue
+
+                used_faces.update(plan.faces)
+                plans.append(plan)
+        except ReferenceError:
+            # The caller expects the new edges or None. Cancelling here would hand it the cancel() result.
+            self.report({'ERROR'}, "Something went wrong. See console for more info.")
+            print_exc()
+            return None
+
+        if skipped:
+            self.report({'WARNING'}, f"Skipped {skipped} edge ring(s) that could not be cut together with the others")
+
+        if not plans:
+            return None
+
+        return self.apply_split_plans(bm, plans, select_new_edges)
+
+
+    def compute_split_plan(self, bm, edges, points, edge_verts, is_loop=None)-> None | SplitPlan:
+        """ Compute everything needed to insert the loops with a single subdivide_edges call.
+            Returns None when the ring can't be cut that way (tri fans, n-gons, uneven point counts, ...).
+            create_geometry_per_edge() is used for those.
+        """
+        if is_loop is None:
+            is_loop = self.is_loop
+
+        if not edges or len(edges) != len(points):
+            return None
+
+        cuts = len(points[0])
+        if cuts == 0 or any(len(pos) != cuts for pos in points):
+            return None
+
+        ring_edges = set(edges)
+        if len(ring_edges) != len(edges):
+            return None
+
+        # Every pair of consecutive edges must be opposite edges of a quad
+        edge_pairs = list(zip(edges, edges[1:]))
+        if is_loop and len(edges) > 2:
+            edge_pairs.append((edges[-1], edges[0]))
+
+        connecting_faces = set()
+        for edge, next_edge in edge_pairs:
+            shared_faces = set(edge.link_faces) & set(next_edge.link_faces)
+            if len(shared_faces) != 1:
+                return None
+
+            face = shared_faces.pop()
+            if len(face.verts) != 4 or set(edge.verts) & set(next_edge.verts):
+                return None
+            connecting_faces.add(face)
+
+        uv_layers = bm.loops.layers.uv.values()
+        edge_splits = []
+        for edge, pos, (vert_a, vert_b) in zip(edges, points, edge_verts):
+            if len(edge.link_faces) > 2:
+                return None
+
+            # subdivide_edges would connect the cuts across any other face that has two of the ring edges
+            for face in edge.link_faces:
+                if face not in connecting_faces and sum(1 for face_edge in face.edges if face_edge in ring_edges) > 1:
+                    return None
+
+            start = self.world_mat @ vert_a.co
+            end = self.world_mat @ vert_b.co
+            factors = sorted(math.inv_lerp(start, end, p) for p in pos)
+            if factors[0] <= 0.0 or factors[-1] >= 1.0:
+                return None
+
+            face_uvs = {}
+            for loop in edge.link_loops:
+                side = 1 if loop.vert == vert_a else -1
+                face_uvs[side] = [(loop[layer].uv.copy(), loop.link_loop_next[layer].uv.copy()) for layer in uv_layers]
+
+            if len(face_uvs) != len(edge.link_loops):
+                return None
+
+            edge_splits.append(EdgeSplit(edge, vert_a, vert_b, factors, face_uvs))
+
+        return SplitPlan(edge_splits, cuts, {face for edge in edges for face in edge.link_faces})
+
+
+    def apply_split_plans(self, bm, plans: List[SplitPlan], select_new_edges=False)-> None | Set[BMEdge]:
+        """ Cut every edge of every plan with one subdivide_edges call per cut count, then move the new vertices into place
+            and interpolate their uvs at the final positions.
+        """
+        plans_by_cuts = defaultdict(list)
+        for plan in plans:
+            plans_by_cuts[plan.cuts].append(plan)
+
+        uv_layers = bm.loops.layers.uv.values()
+        all_verts = set()
+        chain_verts = set()
+        chains = []
+        for cuts, cut_plans in plans_by_cuts.items():
+            edge_splits = [edge_split for plan in cut_plans for edge_split in plan.edge_splits]
+            ret = bmesh.ops.subdivide_edges(bm, edges=[edge_split.edge for edge_split in edge_splits], cuts=cuts, 
+                                            use_grid_fill=False, use_single_edge=False, use_only_quads=True)
+
+            new_verts = {elem for elem in ret['geom_inner'] if isinstance(elem, BMVert)}
+            for edge_split in edge_splits:
+                all_verts.add(edge_split.vert_a)
+                all_verts.add(edge_split.vert_b)
+
+                chain = self.get_split_chain(edge_split, new_verts, cuts)
+                if chain is not None:
+                    chains.append((edge_split, chain))
+                    chain_verts.update(chain)
+
+        for edge_split, chain in chains:
+            start = edge_split.vert_a.co.copy()
+            end = edge_split.vert_b.co.copy()
+            chain_index = {vert: i for i, vert in enumerate([edge_split.vert_a, *chain, edge_split.vert_b])}
+
+            for i, (vert, factor) in enumerate(zip(chain, edge_split.factors), start=1):
+                vert.co = start.lerp(end, factor)
+
+                for loop in vert.link_loops:
+                    next_index = chain_index.get(loop.link_loop_next.vert)
+                    prev_index = chain_index.get(loop.link_loop_prev.vert)
+                    if next_index is not None:
+                        side = 1 if next_index > i else -1
+                    elif prev_index is not None:
+                        side = 1 if prev_index < i else -1
+                    else:
+                        continue
+
+                    face_uvs = edge_split.face_uvs.get(side)
+                    if face_uvs is None:
+                        continue
+
+                    for layer, (uv_start, uv_end) in zip(uv_layers, face_uvs):
+                        if side == 1:
+                            loop[layer].uv = uv_start.lerp(uv_end, factor)
+                        else:
+                            loop[layer].uv = uv_end.lerp(uv_start, factor)
+
+        selected_edges = set()
+        if select_new_edges:
+            for edge_split, chain in chains:
+                for vert in chain:
+                    for edge in vert.link_edges:
+                        other_vert = edge.other_vert(vert)
+                        if other_vert in chain_verts and other_vert not in chain:
+                            edge.select = True
+                            selected_edges.add(edge)
+
+        all_verts.update(chain_verts)
+        if bpy.context.tool_settings.use_mesh_automerge:
+            threshold = bpy.context.tool_settings.double_threshold
+            bmesh.ops.remove_doubles(bm, verts=list(all_verts), dist=threshold)
+
+        bm.select_flush_mode()
+        mesh_data = self.active_object.data
+        MeshRevision.topology_changed(mesh_data.name)
+        bmesh.update_edit_mesh(mesh_data)
+        SnapContext.patch_faces(self.active_object.get_bl_object, {face for vert in all_verts if vert.is_valid for face in vert.link_faces})
+
+        return selected_edges if selected_edges else None
+
+
+    @staticmethod
+    def get_split_chain(edge_split: EdgeSplit, new_verts, cuts)-> None | List[BMVert]:
+        """ Return the new vertices created on the edge ordered from vert_a to vert_b.
+        """
+        start = edge_split.vert_a.co
+        end = edge_split.vert_b.co
+        chain = []
+        current_vert = edge_split.vert_a
+        for i in range(1, cuts + 1):
+            expected_co = start.lerp(end, i / (cuts + 1))
+            candidates = [edge.other_vert(current_vert) for edge in current_vert.link_edges 
+                          if edge.other_vert(current_vert) in new_verts and edge.other_vert(current_vert) not in chain]
+            if not candidates:
+                return None
+
+            current_vert = min(candidates, key=lambda vert: (vert.co - expected_co).length_squared)
+            chain.append(current_vert)
+        return chain
+
+
+    def create_geometry_per_edge(self, edges, points, edge_verts, num_segments, select_new_edges=False)-> None | Set[BMEdge]:
+        bm = self.ensure_bmesh_(self.active_object)
+
         all_verts = set()
         split_verts_start = []
         split_verts_end = []
@@ -267,7 +498,9 @@ class FastLoopCommon(Actions, MultiObjectEditing):
 
         bm.select_flush_mode()
         mesh_data = self.active_object.data
+        MeshRevision.topology_changed(mesh_data.name)
         bmesh.update_edit_mesh(mesh_data)
+        SnapContext.patch_faces(self.active_object.get_bl_object, {face for vert in all_verts if vert.is_valid for face in vert.link_faces})
 
         return selected_edges if selected_edges else None
 
@@ -84,6 +84,60 @@ class EdgeRingData():
             self.new_edge_loop_loops.append([loop for loop in utils.mesh.bmesh_edge_loop_walker(edge_loop_edges[0], selected_edges_only=True, yield_loop=True) if loop is not None])
 
 
+class SliceLog():
+    """Records the geometry created by the slices so it can be removed again inside the edit bmesh,
+    instead of rebuilding the edit mesh from the initial mesh data.
+
+    Attributes:
+        element_counts: Number of verts, edges and faces before slicing.
+        ring_verts: The vertex pairs of the selected edges. Used to find the edges again after the slices are removed.
+    """
+    def __init__(self, bm, edge_indices):
+        self.bm = bm
+        self.element_counts = (len(bm.verts), len(bm.edges), len(bm.faces))
+        self.ring_verts = [tuple(bm.edges[index].verts) for index in edge_indices]
+        self.new_verts = []
+        self.new_edges = []
+
+    def record(self, geom):
+        for elem in geom:
+            if isinstance(elem, BMVert):
+                self.new_verts.append(elem)
+            elif isinstance(elem, BMEdge):
+                self.new_edges.append(elem)
+
+    def rollback(self):
+        """ Dissolve the recorded geometry. 
+            Returns the selected edges or None if the mesh could not be restored in place.
+        """
+        bm = self.bm
+        if not bm.is_valid:
+            return None
+
+        edges = [edge for edge in self.new_edges if edge.is_valid]
+        if edges:
+            bmesh.ops.dissolve_edges(bm, edges=edges, use_verts=True, use_face_split=False)
+
+        verts = [vert for vert in self.new_verts if vert.is_valid]
+        if verts:
+            bmesh.ops.dissolve_verts(bm, verts=verts, use_face_split=False, use_boundary_tear=False)
+
+        self.new_verts.clear()
+        self.new_edges.clear()
+
+        if (len(bm.verts), len(bm.edges), len(bm.faces)) != self.element_counts:
+            return None
+
+        ring_edges = []
+        for vert_a, vert_b in self.ring_verts:
+            edge = bm.edges.get((vert_a, vert_b)) if vert_a.is_valid and vert_b.is_valid else None
+            if edge is None:
+                return None
+            ring_edges.append(edge)
+
+        return ring_edges
+
+
 def get_options():
     return utils.ops.ls_options()
     
@@ -120,6 +174,7 @@ class OT_LoopSlice(bpy.types.Operator):
     start_mouse_pos_x = None
 
     slider_widget: BL_UI_SliderMulti = None
+    slice_log: SliceLog = None
 
     # Debug 
     points_3d = []
@@ -366,6 +421,7 @@ class OT_LoopSlice(bpy.types.Operator):
             # else:
             #     self.selected_edge_set = {edge.index for edge in select_history}
 
+        self.slice_log = SliceLog(self.bm, self.selected_edge_set)
         edges_set = self.selected_edge_set.copy()
         #Loop until edges set is empty
         test_condition = True
@@ -419,7 +475,7 @@ class OT_LoopSlice(bpy.types.Operator):
     
     def cancel(self, context):
         self.report({'INFO'}, 'Cancelled')
-        self.revert_bmesh(context)
+        self.restore_initial_bmesh(context)
         self.cleanup(context)
         context.area.tag_redraw()
 
@@ -435,6 +491,7 @@ class OT_LoopSlice(bpy.types.Operator):
     
     def cleanup(self, context):
         self.selected_edge_set = None
+        self.slice_log = None
         self.points_3d.clear()
 
         if getattr(self, 'draw_handler_2d', None):
@@ -599,6 +656,27 @@ class OT_LoopSlice(bpy.types.Operator):
     
 
     def revert_bmesh(self, context):
+        # Remove the slices in place. The cost depends on the size of the edge rings instead of the whole mesh.
+        ring_edges = self.slice_log.rollback() if self.slice_log is not None else None
+        if ring_edges is None:
+            self.restore_initial_bmesh(context)
+            return
+
+        bm = self.bm
+        bm.verts.index_update()
+        bm.edges.index_update()
+        bm.faces.index_update()
+        utils.mesh.ensure(bm)
+
+        changed_faces = {face for edge in ring_edges for face in edge.link_faces}
+        utils.mesh.bmesh_loop_index_update(bm, [loop for face in changed_faces for loop in face.loops])
+
+        for edge in ring_edges:
+            edge.select = True
+        self.selected_edge_set = {edge.index for edge in ring_edges}
+
+
+    def restore_initial_bmesh(self, context):
         # Restore the initial state of the mesh data
         mesh = context.active_object.data
         bpy.ops.object.mode_set(mode='OBJECT')
@@ -606,6 +684,7 @@ class OT_LoopSlice(bpy.types.Operator):
         bpy.ops.object.mode_set(mode='EDIT')
 
         self.bm = bmesh.from_edit_mesh(mesh)
+        self.slice_log = None
         
 
     def modal(self, context, event):
@@ -672,6 +751,8 @@ class OT_LoopSlice(bpy.types.Operator):
         edges = edge_ring.edges
         ret = bmesh.ops.subdivide_edges(bm, edges=edges, cuts=slice_count, use_grid_fill=False)
         geom_inner = ret["geom_inner"]
+        if self.slice_log is not None:
+            self.slice_log.record(geom_inner)
         bm.verts.ensure_lookup_table()
         bm.edges.ensure_lookup_table()
 
@@ -688,8 +769,7 @@ class OT_LoopSlice(bpy.types.Operator):
             elif isinstance(elem, BMEdge):
                 inner_edges.append(elem.index)
                 elem.select = True
-                for loop in elem.link_loops:
-                    loop.index = next(utils.mesh.global_loop_index_counter)
+                utils.mesh.bmesh_loop_index_update(bm, elem.link_loops)
 
         chunks = list(divide_chunks(inner_verts, slice_count))
        
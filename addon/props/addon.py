@@ -630,6 +630,7 @@ class ModalKeymapDisplay(bpy.types.PropertyGroup):
     increase_loop_count: bpy.props.StringProperty(name="increase loop count")
     decrease_loop_count: bpy.props.StringProperty(name="decrease loop count")
     insert_midpoint: bpy.props.StringProperty(name="insert loop at midpointS")
+    insert_on_selected_rings: bpy.props.StringProperty(name="insert on selected rings")
 
     awaiting_input: bpy.props.BoolProperty(
         name='Awating Input',
@@ -653,7 +654,7 @@ class ModalKeymapDisplay(bpy.types.PropertyGroup):
                         break
 
         for attribute in self.__annotations__.keys():
-            if attribute in {'increase_loop_count','decrease_loop_count', 'insert_midpoint'}:
+            if attribute in {'increase_loop_count','decrease_loop_count', 'insert_midpoint', 'insert_on_selected_rings'}:
                 user_friendly_name = utils.ui.get_ordered_fl_keymap_actions().get(attribute, None)
                 for key, item in keymap.get_all_mappings():
         
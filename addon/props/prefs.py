@@ -284,6 +284,25 @@ class AddonPrefs(bpy.types.AddonPreferences):
         subtype='FACTOR' 
     )
 
+    edge_slide_preview: bpy.props.BoolProperty(
+        name='Preview Edge Slide',
+        description='Draw a preview of the slid loop while dragging and only write the mesh when the mouse is released. Faster on dense meshes',
+        default=False,
+    )
+
+    enable_profiler: bpy.props.BoolProperty(
+        name='Enable Profiler',
+        description='Time the stages of the Fast Loop operator (snapping, ring walking, drawing, ...) and display them in the HUD',
+        default=False,
+    )
+
+    profiler_dump_path: bpy.props.StringProperty(
+        name='Profiler Output File',
+        description='When set, the profiler timings are appended to this file when the operator finishes',
+        default='',
+        subtype='FILE_PATH',
+    )
+
     keymap_error: bpy.props.StringProperty(name="Keymap Error")
 
     kilometers: bpy.props.BoolProperty(name="Kilometers")
@@ -354,9 +373,17 @@ class AddonPrefs(bpy.types.AddonPreferences):
 
     def draw_general(self, context, layout):
         layout.prop(self, "use_spacebar", toggle=True)  
+        layout.prop(self, "edge_slide_preview")
 
         layout.operator("ui.reset_operator", text="Click this if an error occured while a fast Loop operator was running, and now it wont start.")
 
+        box = layout.box()
+        box.label(text="Profiler")
+        box.prop(self, "enable_profiler")
+        row = box.row()
+        row.enabled = self.enable_profiler
+        row.prop(self, "profiler_dump_path")
+
     def draw_display_settings(self, context, layout):
         layout.label(text="General")
 
@@ -0,0 +1,101 @@
+from __future__ import annotations
+from typing import Dict, TYPE_CHECKING
+if TYPE_CHECKING:
+    from .snapping import SnapObjectEditMeshData
+
+import numpy as np
+from mathutils import Matrix
+
+from ..utils.mesh_revision import MeshRevision
+from ..utils.mesh_snapshot import MeshSnapshot
+
+# Projection of every vert of an edit mesh to region pixels, cached per snap object.
+# The verts are read from the current MeshSnapshot and projected in one NumPy pass.
+# That only happens again when the view, the object matrix, the region size or the mesh changes,
+# so testing the edges of a face under the mouse is a lookup into the cached arrays.
+# The homogeneous coordinates (x, y, w) are kept instead of the final pixel coordinates.
+# They are linear along an edge, so the projection of any point on an edge is a lerp of the two vertex entries.
+# Without a current snapshot there is nothing to project. get() returns None and the edges are tested one at a time.
+
+def _matrix_key(matrix: Matrix):
+    return tuple(value for row in matrix for value in row)
+
+
+class ProjectedVerts():
+    _caches: Dict[str, ProjectedVerts] = {}
+
+    def __init__(self, key, snapshot: MeshSnapshot, object_matrix: Matrix, proj_matrix: Matrix, win_size, is_perspective):
+        self.key = key
+        self.snapshot = snapshot
+        self.win_half = np.array((win_size[0] * 0.5, win_size[1] * 0.5))
+
+        # Rows for x and y are scaled to pixels. Orthographic views use a w of 1.
+        mvp = np.array(proj_matrix @ object_matrix, dtype=np.float64)
+        scaled_mvp = np.stack((mvp[0] * self.win_half[0], mvp[1] * self.win_half[1], mvp[3] if is_perspective else np.array((0.0, 0.0, 0.0, 1.0))))
+
+        self.vert_co = snapshot.vert_co
+        self.vert_co_h = self.vert_co @ scaled_mvp[:, :3].T + scaled_mvp[:, 3]
+
+    @staticmethod
+    def make_key(snapshot: MeshSnapshot, object_matrix: Matrix, proj_matrix: Matrix, win_size, is_perspective):
+        mesh_key = (snapshot.key, MeshRevision.geometry(snapshot.mesh_name))
+        return (mesh_key, _matrix_key(object_matrix), _matrix_key(proj_matrix), (win_size[0], win_size[1]), is_perspective)
+
+    @classmethod
+    def get(cls, snap_object: SnapObjectEditMeshData, proj_matrix: Matrix, win_size, is_perspective) -> None | ProjectedVerts:
+        snapshot = MeshSnapshot.get_current(snap_object.bm, snap_object.name)
+        if snapshot is None:
+            return None
+
+        key = cls.make_key(snapshot, snap_object.object_matrix, proj_matrix, win_size, is_perspective)
+        projected = cls._caches.get(snap_object.name)
+        if projected is None or projected.snapshot is not snapshot or projected.key != key:
+            projected = ProjectedVerts(key, snapshot, snap_object.object_matrix, proj_matrix, win_size, is_perspective)
+            cls._caches[snap_object.name] = projected
+        return projected
+
+    @classmethod
+    def invalidate(cls, mesh_name=None):
+        if mesh_name is None:
+            cls._caches.clear()
+        else:
+            cls._caches.pop(mesh_name, None)
+
+    def nearest_face_edge_points(self, face_index, ray_origin, ray_direction, mval, radius):
+        """ Same test as cb_snap_edge() for every edge of a face at once.
+            For each edge find the point closest to the ray and check if its projection is within radius pixels of mval.
+
+            Returns:
+                A bool array with the edges that passed the test and a (N, 3) array with the local coordinates of the points.
+                Both are in the order of the face's loops.
+        """
+        snapshot = self.snapshot
+        loop_start = int(snapshot.face_loop_start[face_index])
+        edges = snapshot.loop_edge[loop_start:loop_start + int(snapshot.face_sizes[face_index])]
+        edge_verts = snapshot.edge_verts[edges]
+        va_co = self.vert_co[edge_verts[:, 0]]
+        vb_co = self.vert_co[edge_verts[:, 1]]
+        direction = np.array(ray_direction, dtype=np.float64)
+
+        # snap_math.isect_ray_line_v3
+        a = vb_co - va_co
+        t = va_co - np.array(ray_origin, dtype=np.float64)
+        n = np.cross(a, direction)
+        nlen = np.einsum('ij,ij->i', n, n)
+        intersects = nlen != 0.0
+        cray = np.cross(n - t, direction)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lambda_ = np.where(intersects, np.einsum('ij,ij->i', cray, n) / np.where(intersects, nlen, 1.0), 0.0)
+        lambda_ = np.clip(lambda_, 0.0, 1.0)[:, None]
+
+        h_a = self.vert_co_h[edge_verts[:, 0]]
+        h_b = self.vert_co_h[edge_verts[:, 1]]
+        h = h_a + (h_b - h_a) * lambda_
+        with np.errstate(divide='ignore', invalid='ignore'):
+            co_2d = h[:, :2] / h[:, 2:3]
+
+        mvals = np.array((mval[0], mval[1]), dtype=np.float64) - self.win_half
+        dist = np.sqrt(np.einsum('ij,ij->i', co_2d - mvals, co_2d - mvals))
+
+        hits = intersects & (dist < radius)
+        return hits, va_co + a * lambda_
@@ -0,0 +1,60 @@
+from __future__ import annotations
+from typing import Dict, List, Tuple, TYPE_CHECKING
+if TYPE_CHECKING:
+    from .snapping import SnapObjectEditMeshData
+
+from itertools import product
+
+import numpy as np
+from mathutils import Vector
+
+# Top level of the snap acceleration structure. The bvh trees of the objects are the bottom level.
+# Keeps a world space bounding box for every snap object and orders the objects front to back along a ray,
+# so the snap context can stop ray casting as soon as a hit is closer than the next box.
+# The world box of an object is only recalculated when its matrix or local bounds change.
+
+class SceneBounds():
+    def __init__(self):
+        self._boxes: Dict[int, Tuple[tuple, np.ndarray, np.ndarray]] = {}
+
+    def clear(self):
+        self._boxes.clear()
+
+    def _world_box(self, snap_object: SnapObjectEditMeshData):
+        matrix = snap_object.object_matrix
+        bb_min = tuple(snap_object.min)
+        bb_max = tuple(snap_object.max)
+        key = (tuple(value for row in matrix for value in row), bb_min, bb_max)
+
+        box = self._boxes.get(id(snap_object))
+        if box is None or box[0] != key:
+            corners = np.array(list(product(*zip(bb_min, bb_max))), dtype=np.float64)
+            mat = np.array(matrix, dtype=np.float64)
+            world_corners = corners @ mat[:3, :3].T + mat[:3, 3]
+            box = (key, world_corners.min(axis=0), world_corners.max(axis=0))
+            self._boxes[id(snap_object)] = box
+        return box[1], box[2]
+
+    def ray_order(self, snap_objects: List[SnapObjectEditMeshData], ray_origin: Vector, ray_direction: Vector)-> List[Tuple[float, SnapObjectEditMeshData]]:
+        """ The objects whose world box is hit by the ray, sorted by the ray parameter where the ray enters the box.
+        """
+        if not snap_objects:
+            return []
+
+        boxes = [self._world_box(snap_object) for snap_object in snap_objects]
+        mins = np.array([box[0] for box in boxes])
+        maxs = np.array([box[1] for box in boxes])
+
+        origin = np.array(ray_origin, dtype=np.float64)
+        direction = np.array(ray_direction, dtype=np.float64)
+        direction = np.where(np.abs(direction) < 1e-12, 1e-12, direction)
+        inv_direction = 1.0 / direction
+
+        t1 = (mins - origin) * inv_direction
+        t2 = (maxs - origin) * inv_direction
+        t_enter = np.maximum(np.minimum(t1, t2).max(axis=1), 0.0)
+        t_exit = np.maximum(t1, t2).min(axis=1)
+
+        hit = np.flatnonzero(t_exit >= t_enter)
+        order = hit[np.argsort(t_enter[hit], kind='stable')]
+        return [(float(t_enter[i]), snap_objects[i]) for i in order]
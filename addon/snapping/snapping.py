@@ -1,9 +1,10 @@
 from __future__ import annotations
 from typing import *
-from dataclasses import dataclass
-from collections import namedtuple
+from dataclasses import dataclass, field
+from collections import namedtuple, OrderedDict
 from enum import IntFlag
 from math import fabs
+import time
 
 import bpy
 from bpy.types import Object
@@ -13,9 +14,13 @@ from mathutils import Vector, Matrix
 from mathutils.bvhtree import BVHTree
 
 from .. import utils
+from ..utils.mesh_revision import MeshRevision
+from ..utils.mesh_snapshot import MeshSnapshot
 from . import snap_math
 from .snap_points import SnapPointsMixin
-from .snapping_utils import SnapEdgeParams, cb_snap_edge, do_raycast
+from .snapping_utils import SnapEdgeParams, cb_snap_edge, do_raycast, build_visible_bvh_tree
+from .projected_verts import ProjectedVerts
+from .scene_bounds import SceneBounds
 
 
 """ A partial adaptation of the object/mesh snapping code found in Blender's source code.
@@ -44,6 +49,19 @@ class SnapObjectEditMeshData():
     object_matrix_inv: Matrix = None
     bm: BMesh = None
     name: str = ''
+    # Only the visible faces are in bvh_tree. Face index for each polygon of the tree.
+    face_indices: List[int] = field(default_factory=list)
+    # Used to decide if the bvh tree can still be served after the mesh changed
+    topology_stamp: tuple = None
+    geometry_revision: int = -1
+    patched_stamp: tuple = None
+    anchor_face: BMFace = None
+    anchor_face_index: int = -1
+    # Faces changed since bvh_tree was built. They are ignored in bvh_tree and found in patch_bvh_tree instead.
+    patched_faces: Set[int] = field(default_factory=set)
+    patch_bvh_tree: BVHTree = None
+    patch_face_indices: List[int] = field(default_factory=list)
+    rebuild_pending: bool = False
    
 
 class SNAPMODE(IntFlag):
@@ -71,6 +89,41 @@ class Isect_Data():
 Ray = namedtuple("Ray", "origin direction")
 SnapResults = namedtuple("SnapResults", "face_index element_index nearest_point")
 
+# Seconds without mesh changes before a stale bvh tree is rebuilt
+BVH_REBUILD_DELAY = 0.25
+# Number of objects whose snap data is kept after their snap context is freed
+SNAP_DATA_CACHE_SIZE = 32
+
+
+class SnapDataCache():
+    """ LRU cache of the snap data (bvh trees, ...) of the objects of freed snap contexts, keyed by mesh datablock name.
+        The next snap context reuses it in add_object() when the edit mesh and its revision stamp still match.
+        Switching between Fast Loop, edge slide and back doesn't have to build the trees again.
+    """
+    _entries: OrderedDict[str, SnapObjectEditMeshData] = OrderedDict()
+
+    @classmethod
+    def put(cls, snap_object_data: SnapObjectEditMeshData):
+        cls._entries[snap_object_data.name] = snap_object_data
+        cls._entries.move_to_end(snap_object_data.name)
+        while len(cls._entries) > SNAP_DATA_CACHE_SIZE:
+            cls._entries.popitem(last=False)
+
+    @classmethod
+    def take(cls, mesh_name, bm: BMesh) -> None | SnapObjectEditMeshData:
+        snap_object_data = cls._entries.pop(mesh_name, None)
+        if snap_object_data is None or snap_object_data.bm is not bm or not bm.is_valid:
+            return None
+
+        stamp = MeshRevision.stamp(bm, mesh_name)
+        if stamp not in {snap_object_data.topology_stamp, snap_object_data.patched_stamp}:
+            return None
+        return snap_object_data
+
+    @classmethod
+    def clear(cls):
+        cls._entries.clear()
+
 class SnapContext(SnapPointsMixin):
 
     def __init__(self, context, depsgraph, owner, rv3d=None, region=None):
@@ -95,6 +148,10 @@ class SnapContext(SnapPointsMixin):
         self.snap_flags = SNAPMODE.EDGE
         self.nearest_2d = None
         self._isect_data: Isect_Data = Isect_Data()
+        self.scene_bounds = SceneBounds()
+
+        self._last_mesh_change = 0.0
+        self._rebuild_timer = self._rebuild_pending_objects
 
         self._draw_handler_3d = bpy.types.SpaceView3D.draw_handler_add(self._draw_callback_3d, (context, ), 'WINDOW', 'POST_VIEW')
         self._draw_handler_2d = bpy.types.SpaceView3D.draw_handler_add(self._draw_callback_2d, (context, ), 'WINDOW', 'POST_PIXEL')
@@ -118,10 +175,23 @@ class SnapContext(SnapPointsMixin):
                 return True
         return False
 
+    @staticmethod
+    def patch_faces(bl_object: Object, faces):
+        """ Tell the snap context which faces an operation created or changed, so that the bvh tree doesn't need to be rebuilt right away.
+        """
+        snap_context = getattr(GlobalSnapContext, 'snap_context', None)
+        if snap_context is not None:
+            snap_object_data = snap_context._get_snap_object_by_name(bl_object.name)
+            if snap_object_data is not None:
+                snap_context._patch_snap_object(snap_object_data, faces)
+
     def _free(self):
         handler = object.__getattribute__(self, '_handler')
         bpy.app.handlers.depsgraph_update_post.remove(handler)
 
+        if bpy.app.timers.is_registered(self._rebuild_timer):
+            bpy.app.timers.unregister(self._rebuild_timer)
+
         if getattr(self, '_draw_handler_3d', False):
             self.draw_handler_3d = bpy.types.SpaceView3D.draw_handler_remove(
                 self._draw_handler_3d, 'WINDOW')
@@ -130,6 +200,12 @@ class SnapContext(SnapPointsMixin):
             self._draw_handler_2d = bpy.types.SpaceView3D.draw_handler_remove(
                 self._draw_handler_2d, 'WINDOW')
 
+        for snap_object_data in self.snap_objects.values():
+            if snap_object_data.bvh_tree is not None:
+                SnapDataCache.put(snap_object_data)
+        self.snap_objects.clear()
+        self.scene_bounds.clear()
+
     def increment_mode_active(self):
         return self.snap_flags & SNAPMODE.INCREMENT
 
@@ -235,19 +311,120 @@ class SnapContext(SnapPointsMixin):
 
             if bl_object.mode == 'EDIT':
                 bm = bmesh.from_edit_mesh(bl_object.data)
-                object_data.bm = bm
-                object_data.bvh_tree = BVHTree.FromBMesh(bm)
+                cached_data = SnapDataCache.take(object_data.name, bm)
+                if cached_data is not None:
+                    cached_data.bl_object = bl_object
+                    cached_data.min = object_data.min
+                    cached_data.max = object_data.max
+                    cached_data.object_matrix = object_data.object_matrix
+                    cached_data.object_matrix_inv = object_data.object_matrix_inv
+                    # Let _update_snap_object() decide if the trees need to be rebuilt when it's first used
+                    cached_data.is_dirty = True
+                    cached_data.rebuild_pending = False
+                    self.snap_objects[bl_object.name] = cached_data
+                else:
+                    self._build_bvh_tree(object_data, bm)
+
+
+    def _build_bvh_tree(self, snap_object_data: SnapObjectEditMeshData, bm: BMesh):
+        snap_object_data.bm = bm
+        # Hiding faces changes the topology revision, so the tree is rebuilt when the hidden faces change
+        snap_object_data.bvh_tree, snap_object_data.face_indices = build_visible_bvh_tree(bm, MeshSnapshot.get_current(bm, snap_object_data.name))
+        snap_object_data.topology_stamp = MeshRevision.stamp(bm, snap_object_data.name)
+        snap_object_data.geometry_revision = MeshRevision.geometry(snap_object_data.name)
+        snap_object_data.patched_stamp = None
+        snap_object_data.patched_faces = set()
+        snap_object_data.patch_bvh_tree = None
+        snap_object_data.patch_face_indices = []
+        snap_object_data.rebuild_pending = False
+
+        # Used to detect if the indices of the faces in the tree were shifted by an operation
+        bm.faces.ensure_lookup_table()
+        snap_object_data.anchor_face = bm.faces[-1] if len(bm.faces) else None
+        snap_object_data.anchor_face_index = len(bm.faces) - 1
 
 
     def _update_snap_object(self, snap_object_data: SnapObjectEditMeshData):
             bl_object = snap_object_data.bl_object
             snap_object_data.object_matrix = bl_object.matrix_world
+            snap_object_data.object_matrix_inv = bl_object.matrix_world.inverted_safe()
 
             if bl_object.mode == 'EDIT':
                 bm = bmesh.from_edit_mesh(bl_object.data)
-                snap_object_data.bm = bm
-                snap_object_data.bvh_tree = BVHTree.FromBMesh(
-                    bm)
+                name = snap_object_data.name
+                stamp = MeshRevision.stamp(bm, name)
+                if bm is snap_object_data.bm and stamp in {snap_object_data.topology_stamp, snap_object_data.patched_stamp}:
+                    # The face indices in the tree are still valid. Keep serving it until the mesh stops changing.
+                    if stamp != snap_object_data.topology_stamp or MeshRevision.geometry(name) != snap_object_data.geometry_revision:
+                        self._schedule_rebuild(snap_object_data)
+                else:
+                    self._build_bvh_tree(snap_object_data, bm)
+
+
+    def _patch_snap_object(self, snap_object_data: SnapObjectEditMeshData, faces):
+        bm = snap_object_data.bm
+        if bm is None or not bm.is_valid or snap_object_data.bvh_tree is None:
+            return
+
+        bm.faces.index_update()
+        bm.faces.ensure_lookup_table()
+        anchor_face = snap_object_data.anchor_face
+        if anchor_face is not None and (not anchor_face.is_valid or anchor_face.index != snap_object_data.anchor_face_index):
+            # Faces were removed or reused, the indices in the tree can't be trusted anymore
+            self._build_bvh_tree(snap_object_data, bm)
+            return
+
+        snap_object_data.patched_faces.update(face.index for face in faces if face.is_valid)
+        snap_object_data.patched_faces = {index for index in snap_object_data.patched_faces if index < len(bm.faces)}
+
+        verts = []
+        vert_indices = {}
+        polygons = []
+        snap_object_data.patch_face_indices = []
+        for index in snap_object_data.patched_faces:
+            face = bm.faces[index]
+            if face.hide:
+                continue
+
+            polygon = []
+            for vert in face.verts:
+                if vert not in vert_indices:
+                    vert_indices[vert] = len(verts)
+                    verts.append(vert.co.copy())
+                polygon.append(vert_indices[vert])
+            polygons.append(polygon)
+            snap_object_data.patch_face_indices.append(index)
+
+        snap_object_data.patch_bvh_tree = BVHTree.FromPolygons(verts, polygons) if polygons else None
+        snap_object_data.patched_stamp = MeshRevision.stamp(bm, snap_object_data.name)
+        self._schedule_rebuild(snap_object_data)
+
+
+    def _schedule_rebuild(self, snap_object_data: SnapObjectEditMeshData):
+        snap_object_data.rebuild_pending = True
+        self._last_mesh_change = time.perf_counter()
+        if not bpy.app.timers.is_registered(self._rebuild_timer):
+            bpy.app.timers.register(self._rebuild_timer, first_interval=BVH_REBUILD_DELAY)
+
+
+    def _rebuild_pending_objects(self):
+        # Wait until the mesh stops changing, e.g. the user is still sliding an edge
+        time_since_change = time.perf_counter() - self._last_mesh_change
+        if time_since_change < BVH_REBUILD_DELAY:
+            return BVH_REBUILD_DELAY - time_since_change
+
+        for snap_object_data in self.snap_objects.values():
+            if not snap_object_data.rebuild_pending:
+                continue
+            try:
+                bl_object = snap_object_data.bl_object
+                if bl_object.mode == 'EDIT':
+                    self._build_bvh_tree(snap_object_data, bmesh.from_edit_mesh(bl_object.data))
+                else:
+                    snap_object_data.rebuild_pending = False
+            except ReferenceError:
+                snap_object_data.rebuild_pending = False
+        return None
     
     def _get_snap_object_by_name(self, name) -> SnapObjectEditMeshData:
         if name in self.snap_objects:
@@ -317,14 +494,16 @@ class SnapContext(SnapPointsMixin):
     
 
     def _update_internal_data_for_object(self, snap_object_data: SnapObjectEditMeshData)-> bool:
-        if snap_object_data.bm is None or snap_object_data.bvh_tree is None:
+        if snap_object_data.bm is None:
             #TODO Remove from snap objects
             return False
 
         if snap_object_data.is_dirty:
             self._update_snap_object(snap_object_data)
             snap_object_data.is_dirty = False
-        return True
+
+        # No tree when every face is hidden
+        return snap_object_data.bvh_tree is not None
     
 
     def _draw_callback_3d(self, context):
@@ -375,27 +554,37 @@ class SnapContext(SnapPointsMixin):
 
         ray_origin, ray_vector = utils.raycast.get_ray(
             self.region, self.rv3d, self.mvals)
-        
+
+        # Visit the objects front to back. The distances are ray parameters along the world space ray, 
+        # which is the same parameter along each object's local ray.
+        ordered = self.scene_bounds.ray_order(snap_objects, ray_origin, ray_vector)
+
         shortest_dist = float('INF')
         closest_ray_cast_result: None | Tuple = None
-        for snap_object in snap_objects:
+        closest_ray = None
+        closest_object_matrix = None
+        for entry_dist, snap_object in ordered:
+            # Nothing behind the closest hit found so far can be nearer
+            if entry_dist >= shortest_dist:
+                break
+
             mat_inv = snap_object.object_matrix_inv
             ray = Ray(mat_inv @ ray_origin, mat_inv.to_3x3() @ ray_vector)
-            MVP = self.proj_matrix @ snap_object.object_matrix
-
-            if snap_math.snap_bound_box_check_dist(snap_object.min, snap_object.max, MVP, self.win_size, self.mvals, self.radius, ray):
-                ray_cast_results = do_raycast(snap_object, ray.origin, ray.direction)
-                
-                if ray_cast_results is not None and ray_cast_results[2] < shortest_dist:
-                    distance = ray_cast_results[2]
-                    shortest_dist = distance
-                    isect_co = ray_cast_results[0]
-                    face = ray_cast_results[1]
-                    closest_ray_cast_result = (snap_object, face, isect_co)
-                    self.ray = Ray(mat_inv @ ray_origin, mat_inv.to_3x3() @ ray_vector)
-                    self.MVP = self.proj_matrix @ snap_object.object_matrix
-
-        if closest_ray_cast_result is not None and snap_object.bm.is_valid:
+            ray_cast_results = do_raycast(snap_object, ray.origin, ray.direction)
+            if ray_cast_results is None:
+                continue
+
+            isect_co, face, local_dist = ray_cast_results
+            dist = local_dist / ray.direction.length
+            if dist < shortest_dist:
+                shortest_dist = dist
+                closest_ray_cast_result = (snap_object, face, isect_co)
+                closest_ray = ray
+                closest_object_matrix = snap_object.object_matrix
+
+        if closest_ray_cast_result is not None and closest_ray_cast_result[0].bm.is_valid:
+            self.ray = closest_ray
+            self.MVP = self.proj_matrix @ closest_object_matrix
             snap_results = self.do_some_stuff(*closest_ray_cast_result)
             return None if snap_results is None else (*snap_results, closest_ray_cast_result[0].bl_object)
         else:
@@ -432,32 +621,26 @@ class SnapContext(SnapPointsMixin):
     def get_nearest_element(self, snap_object, ray_co, face, snap_elements_flag, nearest_2d):
         shortest_dist_edge = float('INF')
         ray_coo = snap_object.object_matrix @ ray_co
-        for loop in utils.mesh.bmesh_face_loop_walker(face):
-            nearest_co = None
-            edge = loop.edge
-            if snap_elements_flag & SNAPMODE.EDGE:
-                edge_params = SnapEdgeParams()
-                edge_params.is_perpective = self.is_perpective
-                edge_params.snap_object = snap_object
-                edge_params.edge_index =  edge.index
-                edge_params.ray_origin = self.ray.origin
-                edge_params.ray_direction = self.ray.direction
-                edge_params.radius = self.radius
-                edge_params.proj_matrix = self.proj_matrix.copy()
-                edge_params.win_size = self.win_size
-                edge_params.mval = self.mvals
-
-                results = cb_snap_edge(edge_params)
-
-                if results is not None:
-                    nearest_co, _ = results
-                    nearest_co = snap_object.object_matrix @ nearest_co
-                    dist = (nearest_co - ray_coo).length_squared
-
-                    if dist < shortest_dist_edge:
-                        shortest_dist_edge = dist
-                        nearest_2d.edge = edge
-                        nearest_2d.edge_co = nearest_co
+        if snap_elements_flag & SNAPMODE.EDGE:
+            edges = [loop.edge for loop in utils.mesh.bmesh_face_loop_walker(face)]
+            projected = ProjectedVerts.get(snap_object, self.proj_matrix, self.win_size, self.is_perpective)
+            if projected is not None:
+                hits, points = projected.nearest_face_edge_points(face.index, self.ray.origin, self.ray.direction, self.mvals, self.radius)
+                results = (Vector(point) if hit else None for hit, point in zip(hits.tolist(), points.tolist()))
+            else:
+                results = (self._snap_edge(snap_object, edge) for edge in edges)
+
+            for edge, nearest_co in zip(edges, results):
+                if nearest_co is None:
+                    continue
+
+                nearest_co = snap_object.object_matrix @ nearest_co
+                dist = (nearest_co - ray_coo).length_squared
+
+                if dist < shortest_dist_edge:
+                    shortest_dist_edge = dist
+                    nearest_2d.edge = edge
+                    nearest_2d.edge_co = nearest_co
 
         if nearest_2d.edge is not None:
             shortest_dist_vert = float('INF')
@@ -472,6 +655,23 @@ class SnapContext(SnapPointsMixin):
                 
         return True if (nearest_2d.vert is not None and nearest_2d.edge is not None) else False
 
+    def _snap_edge(self, snap_object, edge) -> None | Vector:
+        """ Edge test used until the mesh snapshot for ProjectedVerts is built.
+        """
+        edge_params = SnapEdgeParams()
+        edge_params.is_perpective = self.is_perpective
+        edge_params.snap_object = snap_object
+        edge_params.edge_index =  edge.index
+        edge_params.ray_origin = self.ray.origin
+        edge_params.ray_direction = self.ray.direction
+        edge_params.radius = self.radius
+        edge_params.proj_matrix = self.proj_matrix.copy()
+        edge_params.win_size = self.win_size
+        edge_params.mval = self.mvals
+
+        results = cb_snap_edge(edge_params)
+        return results[0] if results is not None else None
+
 
     def force_display_update(self, object_):
         nearest_2d = self.nearest_2d
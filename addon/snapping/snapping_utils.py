@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Tuple
+from typing import TYPE_CHECKING, List, Tuple
 
 if TYPE_CHECKING:
     from .snapping import SnapObjectEditMeshData
+    from ..utils.mesh_snapshot import MeshSnapshot
 
+import numpy as np
 from bmesh.types import *
 from mathutils import Vector, Matrix
+from mathutils.bvhtree import BVHTree
 from mathutils.geometry import intersect_point_line
 
 from . import snap_math
@@ -28,24 +31,75 @@ class SnapEdgeParams():
     proj_matrix: Matrix = None
     is_perpective: bool = False
 
+def build_visible_bvh_tree(bm: BMesh, snapshot: MeshSnapshot=None)-> Tuple[None | BVHTree, List[int]]:
+    """ Build a bvh tree from the faces that aren't hidden. 
+        The faces are read from the snapshot when there is a current one, otherwise from the bmesh.
+
+        Returns:
+            The tree (None if every face is hidden) and the face index of each polygon in the tree.
+    """
+    if snapshot is None:
+        bm.verts.index_update()
+        bm.faces.index_update()
+        face_indices = []
+        polygons = []
+        for face in bm.faces:
+            if not face.hide:
+                face_indices.append(face.index)
+                polygons.append([vert.index for vert in face.verts])
+
+        if not face_indices:
+            return None, []
+        return BVHTree.FromPolygons([vert.co for vert in bm.verts], polygons), face_indices
+
+    face_indices = np.flatnonzero(~snapshot.face_hide).tolist()
+    if not face_indices:
+        return None, []
+
+    loop_vert = snapshot.loop_vert.tolist()
+    face_loop_start = snapshot.face_loop_start.tolist()
+    face_sizes = snapshot.face_sizes.tolist()
+    polygons = [loop_vert[face_loop_start[index]:face_loop_start[index] + face_sizes[index]] for index in face_indices]
+
+    return BVHTree.FromPolygons(snapshot.vert_co.tolist(), polygons), face_indices
+
+
 def do_raycast(snap_object: SnapObjectEditMeshData, origin: Vector, direction: Vector)-> None | Tuple:
-            while True:
-                isect_co, _, face_index, distance = snap_object.bvh_tree.ray_cast(
-                    origin, direction)
-                bm = snap_object.bm
-                if face_index is None:
-                    return None
-            
-                try:
-                    face = bm.faces[face_index]
-                except IndexError:
-                    bm.faces.ensure_lookup_table()
-                    continue
-                
-                if face is not None and not face.hide:
-                    return isect_co, face, distance
-                elif face is not None and face.hide:
-                    origin = isect_co + direction*0.0001
+    """ The face lookup table is ensured when the trees are built or patched. 
+        Anything that invalidates it also changes the topology stamp, and with it the trees.
+    """
+    hit = _raycast_tree(snap_object.bvh_tree, snap_object.bm, origin, direction, snap_object.face_indices, skip_faces=snap_object.patched_faces)
+
+    if snap_object.patch_bvh_tree is not None:
+        patch_hit = _raycast_tree(snap_object.patch_bvh_tree, snap_object.bm, origin, direction, snap_object.patch_face_indices)
+        if patch_hit is not None and (hit is None or patch_hit[2] < hit[2]):
+            hit = patch_hit
+
+    return hit
+
+
+def _raycast_tree(bvh_tree, bm, origin: Vector, direction: Vector, face_indices, skip_faces=None)-> None | Tuple:
+    """ The trees only contain visible faces, so the first hit is the result. 
+        The ray is only cast again past faces of the main tree that were patched since it was built.
+    """
+    ray_origin = origin
+    while True:
+        isect_co, _, index, _ = bvh_tree.ray_cast(ray_origin, direction)
+        if index is None:
+            return None
+
+        face_index = face_indices[index]
+        if skip_faces and face_index in skip_faces:
+            ray_origin = isect_co + direction*0.0001
+            continue
+
+        try:
+            face = bm.faces[face_index]
+        except IndexError:
+            # The tree is out of date. It will be rebuilt.
+            return None
+
+        return isect_co, face, (isect_co - origin).length
 
 
 def cb_snap_edge(params: SnapEdgeParams)-> None | Tuple:
@@ -4,6 +4,12 @@ from . import ui
 from . import safety
 from . import math
 from . import mesh
+from . import mesh_revision
+from . import mesh_snapshot
+from . import edge_catalog
+from . import screen_vert_index
+from . import profiler
+from . import result_memo
 from . import edge_slide
 from . import draw_3d
 from . import draw_2d
@@ -4,6 +4,7 @@ from abc import ABCMeta
 
 from math import radians
 
+import numpy as np
 import bpy
 import blf
 import gpu
@@ -114,6 +115,145 @@ def batch_from_points(points, type_, shader):
     return batch_for_shader(shader, type_, {"pos": points})
 
 
+class LoopPreviewBatch():
+    """ GPU batches for the loop preview. All the loops are stored in a single LINES batch.
+        The batches are only rebuilt when the key changes, so redrawing the viewport (e.g. orbiting) doesn't upload anything.
+    """
+    def __init__(self):
+        self.key = None
+        self._line_batch = None
+        self._point_batch = None
+
+    def rebuild(self, key, loops, is_loop, line_color):
+        self.clear()
+
+        line_coords = []
+        point_coords = []
+        for loop in loops:
+            point_coords.extend(loop)
+            for start, end in zip(loop, loop[1:]):
+                line_coords.append(start)
+                line_coords.append(end)
+
+            if is_loop and len(loop) > 2:
+                line_coords.append(loop[-1])
+                line_coords.append(loop[0])
+
+        if line_coords:
+            shader = gpu.shader.from_builtin('POLYLINE_SMOOTH_COLOR')
+            self._line_batch = batch_for_shader(shader, 'LINES', {"pos": line_coords, "color": [line_color] * len(line_coords)})
+
+        if point_coords:
+            shader = gpu.shader.from_builtin('UNIFORM_COLOR')
+            self._point_batch = batch_for_shader(shader, 'POINTS', {"pos": point_coords})
+
+        self.key = key
+
+    def clear(self):
+        self.key = None
+        self._line_batch = None
+        self._point_batch = None
+
+    def draw_lines(self, line_color, line_width=1.0, depth_test=False):
+        if self._line_batch is None:
+            return
+
+        ui_scale = ui.get_ui_scale()
+        if depth_test:
+            state.depth_test_set('LESS_EQUAL')
+
+        state.blend_set('ALPHA') if line_color[3] < 1 else state.blend_set('NONE')
+
+        shader = gpu.shader.from_builtin('POLYLINE_SMOOTH_COLOR')
+        shader.bind()
+        shader.uniform_float("lineWidth", line_width * ui_scale)
+        shader.uniform_float("viewportSize", (bpy.context.area.width, bpy.context.area.height))
+        self._line_batch.draw(shader)
+
+        state.depth_test_set('NONE')
+        state.blend_set('NONE')
+
+    def draw_points(self, color, size=3.0, depth_test=False):
+        if self._point_batch is None:
+            return
+
+        ui_scale = ui.get_ui_scale()
+        state.point_size_set(size * ui_scale)
+
+        if depth_test:
+            state.depth_test_set('LESS_EQUAL')
+
+        shader = gpu.shader.from_builtin('UNIFORM_COLOR')
+        shader.bind()
+        shader.uniform_float("color", color)
+        self._point_batch.draw(shader)
+
+        state.depth_test_set('NONE')
+
+
+class SlidePreviewBatch():
+    """ GPU preview of an edge slide: the slid verts and the faces around them.
+        The faces are collected once when the slide starts. A mouse move only replaces the coordinates of the slid verts
+        and rebuilds the small batches of those faces. The edit mesh isn't touched until the slide is applied.
+    """
+    def __init__(self, bm_verts):
+        faces = list(dict.fromkeys(face for vert in bm_verts for face in vert.link_faces if not face.hide))
+        verts = list(dict.fromkeys(vert for face in faces for vert in face.verts))
+        local = {vert: i for i, vert in enumerate(verts)}
+
+        self.base_co = np.array([vert.co for vert in verts], dtype=np.float64).reshape(-1, 3)
+        self.slid = np.array([local.get(vert, -1) for vert in bm_verts], dtype=np.int64)
+
+        self.tris = []
+        for face in faces:
+            face_verts = [local[vert] for vert in face.verts]
+            self.tris.extend((face_verts[0], face_verts[i], face_verts[i + 1]) for i in range(1, len(face_verts) - 1))
+
+        self.lines = [(local[edge.verts[0]], local[edge.verts[1]]) for edge in dict.fromkeys(edge for face in faces for edge in face.edges)]
+
+        self._face_batch = None
+        self._line_batch = None
+        self.positions = None
+
+    def update(self, positions, valid, matrix, line_color):
+        """ Set the local coordinates of the slid verts. Rows of positions match the verts passed to the constructor.
+        """
+        self.positions = (positions, valid)
+
+        co = self.base_co.copy()
+        moved = valid & (self.slid >= 0)
+        co[self.slid[moved]] = positions[moved]
+
+        mat = np.array(matrix, dtype=np.float64)
+        world_co = (co @ mat[:3, :3].T + mat[:3, 3]).tolist()
+
+        self._face_batch = None
+        self._line_batch = None
+        if self.tris:
+            self._face_batch = batch_for_shader(gpu.shader.from_builtin('UNIFORM_COLOR'), 'TRIS', {"pos": world_co}, indices=self.tris)
+        if self.lines:
+            self._line_batch = batch_for_shader(gpu.shader.from_builtin('POLYLINE_SMOOTH_COLOR'), 'LINES', 
+                                                {"pos": world_co, "color": [line_color] * len(world_co)}, indices=self.lines)
+
+    def draw(self, face_color, line_width=1.0):
+        if self._face_batch is not None:
+            state.blend_set('ALPHA')
+            shader = gpu.shader.from_builtin('UNIFORM_COLOR')
+            shader.bind()
+            shader.uniform_float("color", face_color)
+            self._face_batch.draw(shader)
+
+        if self._line_batch is not None:
+            state.blend_set('ALPHA')
+            shader = gpu.shader.from_builtin('POLYLINE_SMOOTH_COLOR')
+            shader.bind()
+            shader.uniform_float("lineWidth", line_width * ui.get_ui_scale())
+            shader.uniform_float("viewportSize", (bpy.context.area.width, bpy.context.area.height))
+            self._line_batch.draw(shader)
+
+        state.blend_set('NONE')
+
+
 def draw_arrow(start:Vector, end:Vector, plane_normal:Vector, direction_vec:Vector, chevron_length=1.0, line_color=(1.0, 1.0, 1.0,.4),line_width=1.0):
     draw_line((start, end), line_color=line_color, line_width=line_width)
     line: Vector = direction_vec
@@ -0,0 +1,251 @@
+from __future__ import annotations
+from functools import partial
+from typing import Dict
+
+import numpy as np
+import bpy
+from bmesh.types import BMesh
+
+from .mesh_revision import MeshRevision
+from .mesh_snapshot import MeshSnapshot
+
+# Partitions every edge of a mesh into an edge ring id and an edge loop id.
+# Built from a MeshSnapshot with a union-find over the pairs of edges that the walkers step between,
+# so looking up the ring or loop of an edge is a list lookup instead of a walk.
+#
+# Rings: opposite edges of quads. Same edges as bmesh_edge_ring_walker would walk.
+# Loops: two edges are joined when the edge loop walker steps from one to the other through a shared vert
+# in both directions. Edges that bmesh_edge_loop_walker handles differently (wire edges and edges next to an ngon hub)
+# are kept as their own loop. Every edge that shares a loop id walks the same edge loop.
+#
+# The catalog only depends on the topology. It is kept when vertices are moved (edge slide, scale, ...).
+# After loops were inserted or dissolved get_current() returns None and the new catalog is built on a timer,
+# outside of the modal event. Callers walk the bmesh until it's ready.
+
+# Seconds to wait before building a catalog that was asked for while hovering
+CATALOG_BUILD_DELAY = 0.1
+
+def union_pairs(count, a, b):
+    """ Union-find over the pairs (a[i], b[i]) for the elements 0 ... count-1.
+        Roots are hooked to the smaller root and the paths are compressed after every round.
+
+        Returns:
+            The component id of each element. Ids are 0 ... number of components - 1
+    """
+    parent = np.arange(count, dtype=np.int64)
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    while len(a):
+        root_a = parent[a]
+        root_b = parent[b]
+        unjoined = root_a != root_b
+        if not unjoined.any():
+            break
+
+        a = a[unjoined]
+        b = b[unjoined]
+        root_a = root_a[unjoined]
+        root_b = root_b[unjoined]
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+
+        while True:
+            grand_parent = parent[parent]
+            if np.array_equal(grand_parent, parent):
+                break
+            parent = grand_parent
+
+    _, component_ids = np.unique(parent, return_inverse=True)
+    return component_ids.reshape(-1)
+
+
+class EdgeCatalog():
+    _catalogs: Dict[str, EdgeCatalog] = {}
+    _scheduled: Dict[str, BMesh] = {}
+
+    def __init__(self, snapshot: MeshSnapshot):
+        self.bm = snapshot.bm
+        self.mesh_name = snapshot.mesh_name
+        self.stamp = MeshRevision.stamp(snapshot.bm, snapshot.mesh_name)
+
+        ring_ids = self._build_rings(snapshot)
+        loop_ids = self._build_loops(snapshot)
+        self.ring_count = int(ring_ids.max()) + 1 if len(ring_ids) else 0
+        self.loop_count = int(loop_ids.max()) + 1 if len(loop_ids) else 0
+        self.ring_ids = ring_ids.tolist()
+        self.loop_ids = loop_ids.tolist()
+        self._ring_members = None
+        self._loop_members = None
+
+    @classmethod
+    def get(cls, bm: BMesh, mesh_name) -> EdgeCatalog:
+        """ Returns the catalog for the mesh, building a new one when the topology changed.
+            Don't call this while hovering. Use get_current() there.
+        """
+        catalog = cls._catalogs.get(mesh_name)
+        if catalog is None or not catalog.is_current(bm):
+            catalog = EdgeCatalog(MeshSnapshot.get(bm, mesh_name))
+            cls._catalogs[mesh_name] = catalog
+        return catalog
+
+    @classmethod
+    def get_current(cls, bm: BMesh, mesh_name) -> EdgeCatalog:
+        """ Returns the cached catalog only if it is still up to date. Never builds one.
+            A new catalog is scheduled instead.
+        """
+        catalog = cls._catalogs.get(mesh_name)
+        if catalog is not None and catalog.is_current(bm):
+            return catalog
+
+        scheduled = cls._scheduled.get(mesh_name)
+        cls._scheduled[mesh_name] = bm
+        if scheduled is None:
+            bpy.app.timers.register(partial(cls._build_scheduled, mesh_name), first_interval=CATALOG_BUILD_DELAY)
+        return None
+
+    @classmethod
+    def _build_scheduled(cls, mesh_name):
+        bm = cls._scheduled.pop(mesh_name, None)
+        try:
+            if bm is not None and bm.is_valid:
+                cls.get(bm, mesh_name)
+        except ReferenceError:
+            pass
+        return None
+
+    @classmethod
+    def invalidate(cls, mesh_name=None):
+        if mesh_name is None:
+            cls._catalogs.clear()
+            cls._scheduled.clear()
+        else:
+            cls._catalogs.pop(mesh_name, None)
+            cls._scheduled.pop(mesh_name, None)
+
+    def is_current(self, bm: BMesh):
+        return bm is self.bm and bm.is_valid and self.stamp == MeshRevision.stamp(bm, self.mesh_name)
+
+    def ring_id(self, edge_index):
+        return self.ring_ids[edge_index]
+
+    def loop_id(self, edge_index):
+        return self.loop_ids[edge_index]
+
+    def ring_edges(self, ring_id):
+        """ Indices of the edges in the ring. Unordered.
+        """
+        if self._ring_members is None:
+            self._ring_members = self._group(self.ring_ids, self.ring_count)
+        return self._ring_members[ring_id]
+
+    def loop_edges(self, loop_id):
+        """ Indices of the edges in the loop. Unordered.
+        """
+        if self._loop_members is None:
+            self._loop_members = self._group(self.loop_ids, self.loop_count)
+        return self._loop_members[loop_id]
+
+    @staticmethod
+    def _group(ids, count):
+        ids = np.asarray(ids, dtype=np.int64)
+        order = np.argsort(ids, kind='stable')
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ids, minlength=count), out=offsets[1:])
+        return [order[offsets[i]:offsets[i + 1]].tolist() for i in range(count)]
+
+    @staticmethod
+    def _build_rings(snapshot: MeshSnapshot):
+        num_edges = len(snapshot.edge_verts)
+        quad_starts = snapshot.face_loop_start[snapshot.face_sizes == 4]
+        quad_edges = snapshot.loop_edge[quad_starts[:, None] + np.arange(4)]
+
+        a = np.concatenate((quad_edges[:, 0], quad_edges[:, 1]))
+        b = np.concatenate((quad_edges[:, 2], quad_edges[:, 3]))
+
+        # The ring walker doesn't step onto hidden edges or edges with more than two faces
+        valid_edge = ~snapshot.edge_hide & (snapshot.edge_face_count <= 2)
+        valid = valid_edge[a] & valid_edge[b]
+        return union_pairs(num_edges, a[valid], b[valid])
+
+    @staticmethod
+    def _build_loops(snapshot: MeshSnapshot):
+        links = snapshot.links
+        num_edges = len(snapshot.edge_verts)
+        loop_vert = snapshot.loop_vert
+        loop_edge = snapshot.loop_edge
+        loop_next = snapshot.loop_next
+        loop_prev = snapshot.loop_prev
+        loop_radial_next = snapshot.loop_radial_next
+        face_sizes = snapshot.face_sizes
+        edge_loop = snapshot.edge_loop
+        is_boundary = snapshot.edge_is_boundary
+        is_manifold = snapshot.edge_is_manifold
+        hidden = snapshot.edge_hide
+        nonwire_count = np.asarray(links.vert_nonwire_edge_count, dtype=np.int64)
+        edge_count = np.asarray(links.vert_edge_count, dtype=np.int64)
+        face_count = np.asarray(links.vert_face_count, dtype=np.int64)
+
+        # One directed step for each edge and each of its verts. Same rules as bmesh_edge_loop_walker.
+        edges = np.repeat(np.arange(num_edges, dtype=np.int64), 2)
+        verts = snapshot.edge_verts.ravel().astype(np.int64)
+        start = edge_loop[edges].astype(np.int64)
+        has_faces = start >= 0
+        safe_start = np.where(has_faces, start, 0)
+
+        def other_edge_loop(loops, verts):
+            return np.where(loop_vert[loops] == verts, loop_prev[loops], loop_next[loops])
+
+        def is_single(edge_indices):
+            loops = edge_loop[edge_indices]
+            safe = np.where(loops >= 0, loops, 0)
+            return is_boundary[edge_indices] & (face_sizes[snapshot.loop_face[safe]] > 4) \
+                & (is_boundary[loop_edge[loop_next[safe]]] | is_boundary[loop_edge[loop_prev[safe]]])
+
+        count = nonwire_count[verts]
+        loop = safe_start.copy()
+        valid = has_faces & ~hidden[edges]
+
+        # Normal edges with faces. Step over to the opposite edge of verts with 2 or 4 edges.
+        interior = valid & ~is_boundary[edges]
+        steps = np.where(count == 4, 2, np.where(count == 2, 1, 0))
+        interior &= steps > 0
+        for i in range(2):
+            active = interior & (steps > i)
+            other = other_edge_loop(loop, verts)
+            interior &= ~active | is_manifold[loop_edge[other]]
+            loop = np.where(active, loop_radial_next[other], loop)
+
+        # Boundary edges. Walk around the vert until the next boundary edge.
+        boundary = valid & is_boundary[edges]
+        single = is_single(edges)
+        boundary &= (~single & (count > 2)) | (single & (count == 2))
+        pending = boundary.copy()
+        for _ in range(int(count.max()) + 1 if len(count) else 0):
+            if not pending.any():
+                break
+            other = np.where(pending, other_edge_loop(loop, verts), loop)
+            other_edge = loop_edge[other]
+            step = pending & is_manifold[other_edge]
+            found = pending & ~is_manifold[other_edge] & is_boundary[other_edge]
+            failed = pending & ~step & ~found
+            loop = np.where(step, loop_radial_next[other], np.where(found, other, loop))
+            boundary &= ~failed
+            pending = step
+        boundary &= ~pending
+        boundary &= single | ~is_single(loop_edge[loop])
+
+        stepped = (interior | boundary) & (loop != safe_start)
+        next_edge = loop_edge[loop].astype(np.int64)
+        stepped &= ~hidden[next_edge]
+
+        # The walker uses an ngon hub for these edges, so they don't follow the rules above
+        hub_vert = (edge_count == 3) & (face_count == 3)
+        hub_edge = ~is_boundary & (hub_vert[snapshot.edge_verts[:, 0]] | hub_vert[snapshot.edge_verts[:, 1]])
+        stepped &= ~hub_edge[edges] & ~hub_edge[next_edge]
+
+        # Keep only the steps that are taken in both directions between edges of the same kind
+        step_to = np.where(stepped, next_edge, -1)
+        safe_next = np.where(stepped, next_edge, 0)
+        other_side = np.where(snapshot.edge_verts[safe_next, 0] == verts, 0, 1)
+        mutual = stepped & (step_to[safe_next * 2 + other_side] == edges) & (is_boundary[edges] == is_boundary[safe_next])
+
+        return union_pairs(num_edges, edges[mutual], next_edge[mutual])
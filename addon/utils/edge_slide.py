@@ -1,14 +1,17 @@
+from __future__ import annotations
 from typing import *
 from collections import namedtuple
 from dataclasses import dataclass, field
 from math import cos, isclose
 
+import numpy as np
 import bpy
 from bmesh.types import *
 from mathutils import Vector
 from mathutils.geometry import intersect_point_line, intersect_line_plane
 
 from .. import utils
+from .mesh_revision import MeshRevision
 
 
 from enum import Enum
@@ -42,6 +45,172 @@ class EdgeVertexSlideData():
     #     return string
 
 
+FACE_SLIDE_TYPES = {VertSlideType.FACE_INSET, VertSlideType.FACE_OUTSET, VertSlideType.FACE_NGON}
+
+# The slide data of every vert packed into NumPy arrays, one row per vert and one column per side.
+# Packed once after calculate_edge_slide_directions() so a mouse move computes the new position of
+# every slid vert in one pass instead of branching on the slide type of each vert in python.
+# Slide type codes are VertSlideType values, 0 when the side has no slide data.
+
+class EdgeSlideArrays():
+    def __init__(self, bm: BMesh, slide_verts: Dict[int, EdgeVertexSlideData]):
+        bm.verts.ensure_lookup_table()
+        slide_data = [data for data in slide_verts.values() if data is not None]
+        count = len(slide_data)
+
+        self.vert_indices = [data.vert for data in slide_data]
+        self.bm_verts = [bm.verts[index] for index in self.vert_indices]
+        self.rows = {index: row for row, index in enumerate(self.vert_indices)}
+
+        self.orig_co = np.array([data.vert_orig_co for data in slide_data], dtype=np.float64).reshape(count, 3)
+        self.side_co = np.zeros((count, 2, 3), dtype=np.float64)
+        self.dir_side = np.zeros((count, 2, 3), dtype=np.float64)
+        self.edge_len = np.zeros((count, 2), dtype=np.float64)
+        self.slide_type = np.zeros((count, 2), dtype=np.int8)
+        self.has_side = np.zeros((count, 2), dtype=bool)
+
+        for row, data in enumerate(slide_data):
+            for side in range(2):
+                if data.dir_side[side] is None or data.vert_side[side] is None:
+                    continue
+                self.side_co[row, side] = bm.verts[data.vert_side[side]].co
+                self.dir_side[row, side] = data.dir_side[side]
+                self.edge_len[row, side] = data.edge_len[side]
+                self.slide_type[row, side] = data.slide_type[side].value if data.slide_type[side] is not None else 0
+                self.has_side[row, side] = True
+
+        self.face_slide = np.isin(self.slide_type, [slide_type.value for slide_type in FACE_SLIDE_TYPES])
+
+        # Sides that slide straight towards the side vert. Their direction only depends on the two vertex positions.
+        rail_dir = self.side_co - self.orig_co[:, None]
+        self.is_rail = self.has_side & np.all(np.isclose(self.dir_side, rail_dir, rtol=1e-5, atol=1e-6), axis=2)
+
+    def __len__(self):
+        return len(self.vert_indices)
+
+    def refresh_rails(self):
+        """ Re-read the positions of the slid verts and update the directions of the rail sides.
+        """
+        orig_co = np.array([vert.co for vert in self.bm_verts], dtype=np.float64).reshape(-1, 3)
+        rail_dir = self.side_co - orig_co[:, None]
+        self.orig_co = orig_co
+        self.dir_side = np.where(self.is_rail[:, :, None], rail_dir, self.dir_side)
+        self.edge_len = np.where(self.is_rail, np.sqrt(np.einsum('ijk,ijk->ij', rail_dir, rail_dir)), self.edge_len)
+
+    def positions(self, side, distance, factor, even, keep_shape, slide_edge_len):
+        """ New local coordinates of every vert when sliding towards side.
+
+            Args:
+                distance: Distance of the slide along the edge of the vert under the mouse.
+                factor: Slide factor along the edge of the vert under the mouse. Used by the normal mode.
+                slide_edge_len: Length of the side of the vert under the mouse. Used by the even mode.
+
+            Returns:
+                A bool array with the rows that can slide towards side and a (N, 3) array with the coordinates.
+        """
+        orig_co = self.orig_co
+        dir_vec = self.dir_side[:, side]
+        face_slide = self.face_slide[:, side][:, None]
+
+        target = self.side_co[:, side]
+        if keep_shape:
+            target = orig_co + dir_vec * distance
+        else:
+            target = np.where(face_slide, orig_co + dir_vec * distance, target)
+
+        if even:
+            vec_len = self.edge_len[:, side]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                # utils.math.remap(0.0, vec_len, 0.0, slide_edge_len, 1)
+                l2 = np.where(vec_len == 0.0, 1.0, slide_edge_len / np.where(vec_len == 0.0, 1.0, vec_len))[:, None]
+            co = target + (orig_co - target) * l2 + _normalized(target - orig_co) * distance
+
+        elif keep_shape:
+            co = np.where(face_slide, target, orig_co + _normalized(dir_vec) * distance)
+
+        else:
+            co = np.where(face_slide, target, orig_co + (target - orig_co) * factor)
+
+        return self.has_side[:, side], co
+
+
+def _normalized(vectors):
+    lengths = np.sqrt(np.einsum('ij,ij->i', vectors, vectors))[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(lengths > 0.0, vectors / np.where(lengths > 0.0, lengths, 1.0), 0.0)
+
+
+# The result of calculate_edge_slide_directions() for the last slid edge selection of each mesh.
+# An entry is reused as long as the selection and the topology stay the same.
+# When the only thing that changed is the position of the verts it slid, the rail sides are refreshed
+# from the new vertex positions instead of walking the faces again.
+# Entries with face slides (inset, outset, ngon) depend on the face tangents and are recalculated instead.
+
+class EdgeSlideCache():
+    _entries: Dict[str, EdgeSlideCache] = {}
+
+    def __init__(self, bm: BMesh, mesh_name, edge_key, slide_verts: Dict[int, EdgeVertexSlideData], edges):
+        self.bm = bm
+        self.mesh_name = mesh_name
+        self.edge_key = edge_key
+        self.stamp = MeshRevision.stamp(bm, mesh_name)
+        self.geometry = MeshRevision.geometry(mesh_name)
+        self.slide_verts = slide_verts
+        self.edges = edges
+        self.arrays = EdgeSlideArrays(bm, slide_verts)
+        self.verts_moved = False
+
+    @classmethod
+    def get(cls, bm: BMesh, mesh_name, current_edge: BMEdge, selected_edge_indices) -> EdgeSlideCache:
+        edge_key = frozenset(selected_edge_indices)
+        entry = cls._entries.get(mesh_name)
+        if entry is not None and entry.is_current(bm, edge_key):
+            if entry.verts_moved:
+                entry._refresh()
+            return entry
+
+        slide_verts, edges = calculate_edge_slide_directions(bm, current_edge, selected_edge_indices, return_edges=True)
+        entry = EdgeSlideCache(bm, mesh_name, edge_key, slide_verts, edges)
+        cls._entries[mesh_name] = entry
+        return entry
+
+    @classmethod
+    def invalidate(cls, mesh_name=None):
+        if mesh_name is None:
+            cls._entries.clear()
+        else:
+            cls._entries.pop(mesh_name, None)
+
+    def is_current(self, bm: BMesh, edge_key):
+        return bm is self.bm and bm.is_valid and edge_key == self.edge_key \
+            and self.stamp == MeshRevision.stamp(bm, self.mesh_name) and self.geometry == MeshRevision.geometry(self.mesh_name)
+
+    def slide_finished(self):
+        """ Called after the verts of this entry were slid and the geometry change was declared.
+            Only the slid verts moved, so the next slide can refresh the rails instead of recalculating.
+        """
+        arrays = self.arrays
+        if not np.all(arrays.is_rail | ~arrays.has_side):
+            self.invalidate(self.mesh_name)
+            return
+
+        self.geometry = MeshRevision.geometry(self.mesh_name)
+        self.verts_moved = True
+
+    def _refresh(self):
+        arrays = self.arrays
+        arrays.refresh_rails()
+        for row, index in enumerate(arrays.vert_indices):
+            data = self.slide_verts[index]
+            data.vert_orig_co = Vector(arrays.orig_co[row])
+            for side in range(2):
+                if arrays.is_rail[row, side]:
+                    data.dir_side[side] = Vector(arrays.dir_side[row, side])
+                    data.edge_len[side] = float(arrays.edge_len[row, side])
+
+        self.verts_moved = False
+
+
 class EdgeSlideReturnData():
     def  __init__(self):
         self.loop = None
@@ -5,9 +5,12 @@ from dataclasses import dataclass
 from functools import reduce
 from typing import *
 
+import bmesh
 from bmesh.types import *
 from mathutils import Vector
 
+from .mesh_revision import MeshRevision
+
 @dataclass
 class WalkerMetadata():
     active_loop: BMLoop = None
@@ -760,8 +763,6 @@ def get_active_vert(bm):
             return element
     return None
 
-import itertools
-global_loop_index_counter = itertools.count()
 def bmesh_loop_index_update(bm: BMesh, loops=None):
     if loops is None:
         #Slow ASF
@@ -770,10 +771,49 @@ def bmesh_loop_index_update(bm: BMesh, loops=None):
             for loop in face.loops:
                 loop.index = index
                 index += 1
+        MeshRevision.loop_indices_updated(bm, index)
     else:
-    #Update Loops directly
-       for loop in loops:
-            loop.index = next(global_loop_index_counter)
+        counter = MeshRevision.loop_counter(bm)
+        if counter is None:
+            # Neither a full update nor a snapshot has counted the loops of this bmesh yet. Only happens once per bmesh.
+            MeshRevision.loop_indices_updated(bm, sum(len(face.loops) for face in bm.faces))
+            counter = MeshRevision.loop_counter(bm)
+
+        #Update Loops directly
+        for loop in loops:
+            loop.index = next(counter)
+
+def refresh_edit_bmesh(bm: BMesh, mesh_data, changed_faces=(), destructive=True):
+    """ Make the edit bmesh consistent again after elements were added or removed: indices, lookup tables, 
+        loop indices of the changed faces and the selection. Avoids toggling object mode to rebuild the edit mesh.
+    """
+    bm.verts.index_update()
+    bm.edges.index_update()
+    bm.faces.index_update()
+    ensure(bm)
+    bmesh_loop_index_update(bm, [loop for face in changed_faces if face.is_valid for loop in face.loops])
+
+    bm.select_flush_mode()
+    MeshRevision.indices_updated(bm, mesh_data.name)
+    bmesh.update_edit_mesh(mesh_data, loop_triangles=True, destructive=destructive)
+
+def ensure_indices(bm: BMesh, mesh_name):
+    """ Renumber the verts, edges, faces and loops of the bmesh, but only if the topology changed since the last time.
+        Moving vertices never invalidates the indices, so this is free for operators that only change coordinates.
+
+        Returns:
+            True if the indices had to be updated
+    """
+    if MeshRevision.indices_current(bm, mesh_name):
+        return False
+
+    bm.verts.index_update()
+    bm.edges.index_update()
+    bm.faces.index_update()
+    ensure(bm)
+    bmesh_loop_index_update(bm)
+    MeshRevision.indices_updated(bm, mesh_name)
+    return True
 
 def face_has_edges(face: BMFace, edges) -> bool:
     return len(set(edges).intersection(set(face.edges))) == len(edges)
@@ -0,0 +1,169 @@
+from collections import defaultdict
+import itertools
+
+import bpy
+
+# Revision counters for edit meshes, keyed by the mesh datablock name.
+# The topology revision changes whenever elements are added, removed or hidden.
+# The geometry revision changes whenever vertex positions change (and with every topology change).
+# Operators that edit the mesh call topology_changed() or geometry_changed() before calling update_edit_mesh(). 
+# The depsgraph update that follows is then absorbed instead of being counted as a second (unknown) topology change.
+# The topology stamp at the last index maintenance of a bmesh is recorded as well,
+# so code that only moves vertices can skip renumbering the elements of the whole mesh.
+# Operators that move vertices can pass the moved vertex indices to geometry_changed(). 
+# Caches of vertex positions then only need to read those back. Any other geometry change counts as every vertex moved.
+# Loops that get numbered directly (see bmesh_loop_index_update) take their indices from a counter per bmesh.
+# It's reset by every full loop index update and seeded from the loop count of a snapshot, so the loops only have to be counted for a bmesh that neither has seen.
+
+class MeshRevision():
+    _topology = defaultdict(int)
+    _geometry = defaultdict(int)
+    _state = defaultdict(int)
+    _declared = set()
+    _indexed = {}
+    # Per mesh: vertex index -> geometry revision of its last declared move
+    _moved = defaultdict(dict)
+    # Per mesh: geometry revision of the last change with unknown moved vertices
+    _all_moved = defaultdict(int)
+    # Per bmesh (by id): (bmesh, counter of the next loop index to give out)
+    _loop_counters = {}
+
+    @classmethod
+    def topology(cls, mesh_name):
+        return cls._topology[mesh_name]
+
+    @classmethod
+    def geometry(cls, mesh_name):
+        return cls._geometry[mesh_name]
+
+    @classmethod
+    def state(cls, mesh_name):
+        return cls._state[mesh_name]
+
+    @classmethod
+    def stamp(cls, bm, mesh_name):
+        return (cls._topology[mesh_name], len(bm.verts), len(bm.edges), len(bm.faces))
+
+    @classmethod
+    def topology_changed(cls, mesh_name):
+        cls._topology[mesh_name] += 1
+        cls._geometry[mesh_name] += 1
+        cls._state[mesh_name] += 1
+        cls._declared.add(mesh_name)
+        cls._all_verts_moved(mesh_name)
+
+    @classmethod
+    def geometry_changed(cls, mesh_name, verts=None):
+        """ Args:
+                verts: Indices of the moved vertices. Every vertex is considered moved when it's None.
+        """
+        geometry = cls._geometry[mesh_name] + 1
+        cls._geometry[mesh_name] = geometry
+        cls._state[mesh_name] += 1
+        cls._declared.add(mesh_name)
+
+        if verts is None:
+            cls._all_verts_moved(mesh_name)
+        else:
+            cls._moved[mesh_name].update(dict.fromkeys(verts, geometry))
+
+    @classmethod
+    def moved_verts(cls, mesh_name, since_geometry):
+        """ Indices of the vertices moved after the geometry revision since_geometry.
+
+            Returns:
+                A set of vertex indices or None when it isn't known which vertices moved.
+        """
+        if cls._all_moved[mesh_name] > since_geometry:
+            return None
+        return {vert for vert, geometry in cls._moved[mesh_name].items() if geometry > since_geometry}
+
+    @classmethod
+    def _all_verts_moved(cls, mesh_name):
+        cls._all_moved[mesh_name] = cls._geometry[mesh_name]
+        cls._moved.pop(mesh_name, None)
+
+    @classmethod
+    def indices_updated(cls, bm, mesh_name):
+        cls._indexed[mesh_name] = (bm, cls.stamp(bm, mesh_name))
+
+    @classmethod
+    def indices_current(cls, bm, mesh_name):
+        indexed = cls._indexed.get(mesh_name)
+        return indexed is not None and indexed[0] is bm and bm.is_valid and indexed[1] == cls.stamp(bm, mesh_name)
+
+    @classmethod
+    def loop_indices_updated(cls, bm, num_loops):
+        """ Every loop of bm has an index below num_loops. Loops numbered directly continue from there.
+        """
+        cls._loop_counters = {key: entry for key, entry in cls._loop_counters.items() if entry[0].is_valid}
+        cls._loop_counters[id(bm)] = (bm, itertools.count(num_loops))
+
+    @classmethod
+    def loops_counted(cls, bm, num_loops):
+        """ Seed the loop counter of bm with num_loops, unless it already has one.
+        """
+        if cls.loop_counter(bm) is None:
+            cls.loop_indices_updated(bm, num_loops)
+
+    @classmethod
+    def loop_counter(cls, bm):
+        entry = cls._loop_counters.get(id(bm))
+        if entry is None or entry[0] is not bm or not bm.is_valid:
+            return None
+        return entry[1]
+
+    @classmethod
+    def clear(cls):
+        cls._topology.clear()
+        cls._geometry.clear()
+        cls._state.clear()
+        cls._declared.clear()
+        cls._indexed.clear()
+        cls._moved.clear()
+        cls._all_moved.clear()
+        cls._loop_counters.clear()
+
+    @classmethod
+    def _on_mesh_updated(cls, mesh_name, geometry_updated):
+        cls._state[mesh_name] += 1
+        if not geometry_updated:
+            return
+
+        if mesh_name in cls._declared:
+            cls._declared.discard(mesh_name)
+        else:
+            cls._topology[mesh_name] += 1
+            cls._geometry[mesh_name] += 1
+            cls._all_verts_moved(mesh_name)
+
+
+def depsgraph_update_handler(scene, depsgraph):
+    if not (depsgraph.id_type_updated('MESH') or depsgraph.id_type_updated('OBJECT')):
+        return
+
+    updated_meshes = {}
+    for update in depsgraph.updates:
+        id_data = update.id
+        mesh_name = None
+        if isinstance(id_data, bpy.types.Mesh):
+            mesh_name = id_data.name
+        elif isinstance(id_data, bpy.types.Object) and id_data.type == 'MESH':
+            mesh_name = id_data.data.name
+
+        if mesh_name is not None:
+            updated_meshes[mesh_name] = updated_meshes.get(mesh_name, False) or update.is_updated_geometry
+
+    for mesh_name, geometry_updated in updated_meshes.items():
+        MeshRevision._on_mesh_updated(mesh_name, geometry_updated)
+
+
+def register():
+    if depsgraph_update_handler not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(depsgraph_update_handler)
+
+
+def unregister():
+    if depsgraph_update_handler in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update_handler)
+    MeshRevision.clear()
@@ -0,0 +1,343 @@
+from __future__ import annotations
+from collections import namedtuple
+from functools import partial
+from itertools import chain
+from typing import Dict
+
+import numpy as np
+import bpy
+from bmesh.types import BMesh
+
+from .mesh_revision import MeshRevision
+
+# Flat NumPy copies of an edit bmesh: vertex coordinates, edge -> vert, loop links and face sizes.
+# A snapshot is extracted once per topology revision and shared by everything that only needs to read the mesh,
+# so the hot paths don't have to go through the BMesh python proxies (and allocate a Vector for every .co).
+# The arrays are read in bulk from a scratch mesh that the bmesh is written to. The loop indices of the bmesh are left alone.
+# Snapshot loop indices are only valid in the snapshot. Use bm_loops() to get the BMLoops.
+#
+# Extracting a snapshot still copies the whole bmesh, so it is never done while hovering.
+# get_current() returns None when the topology changed and builds the new snapshot on a timer instead.
+# Moved vertices don't need a new snapshot. Only the coordinates that MeshRevision reports as moved are read back.
+# The select flags are read the first time they are asked for after the state revision changed.
+# Hiding elements changes the topology revision, so the hide flags are extracted with the topology.
+#
+# Loops are stored in face order. The loops of face f are face_loop_start[f] ... face_loop_start[f] + face_sizes[f] - 1
+
+# Plain python lists of the snapshot arrays used by the index walkers.
+# Indexing a list is a lot cheaper than indexing a NumPy array one element at a time.
+# vert_edge_offsets/vert_edges is the vert -> edge adjacency in CSR form: 
+# the edges of vert v are vert_edges[vert_edge_offsets[v]:vert_edge_offsets[v + 1]]
+SnapshotLinks = namedtuple('SnapshotLinks', 'loop_vert loop_edge loop_face loop_next loop_prev loop_radial_next '
+                                            'face_sizes face_loop_start edge_verts edge_loop edge_hide '
+                                            'edge_is_boundary edge_is_manifold '
+                                            'vert_edge_offsets vert_edges vert_edge_count vert_nonwire_edge_count vert_face_count')
+
+# Seconds to wait before building a snapshot that was asked for while hovering
+SNAPSHOT_BUILD_DELAY = 0.1
+
+# Hidden mesh the edit bmesh is written to when a snapshot is extracted. Its geometry is cleared right after.
+SCRATCH_MESH_NAME = ".FastLoop Snapshot"
+
+def _scratch_mesh():
+    mesh = bpy.data.meshes.get(SCRATCH_MESH_NAME)
+    if mesh is None:
+        mesh = bpy.data.meshes.new(SCRATCH_MESH_NAME)
+    return mesh
+
+def _remove_scratch_mesh():
+    mesh = bpy.data.meshes.get(SCRATCH_MESH_NAME)
+    if mesh is not None:
+        bpy.data.meshes.remove(mesh)
+
+class MeshSnapshot():
+    _snapshots: Dict[str, MeshSnapshot] = {}
+    _scheduled: Dict[str, BMesh] = {}
+
+    def __init__(self, bm: BMesh, mesh_name):
+        self.bm = bm
+        self.mesh_name = mesh_name
+        self.key = MeshSnapshot.make_key(bm, mesh_name)
+        self.geometry = MeshRevision.geometry(mesh_name)
+
+        bm.verts.index_update()
+        bm.edges.index_update()
+        bm.faces.index_update()
+
+        # Copy the bmesh to the scratch mesh in C and read the arrays back in bulk with foreach_get.
+        # The elements are written in the bmesh's order, so the indices match.
+        mesh = _scratch_mesh()
+        bm.to_mesh(mesh)
+
+        num_verts = len(mesh.vertices)
+        num_edges = len(mesh.edges)
+        num_faces = len(mesh.polygons)
+        num_loops = len(mesh.loops)
+
+        vert_co = np.empty(num_verts * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", vert_co)
+        self._vert_co = vert_co.reshape(-1, 3).astype(np.float64)
+
+        self.face_sizes = np.empty(num_faces, dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", self.face_sizes)
+        self.face_loop_start = np.empty(num_faces, dtype=np.int32)
+        mesh.polygons.foreach_get("loop_start", self.face_loop_start)
+        self.face_hide = np.empty(num_faces, dtype=bool)
+        mesh.polygons.foreach_get("hide", self.face_hide)
+
+        self.loop_vert = np.empty(num_loops, dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", self.loop_vert)
+        self.loop_edge = np.empty(num_loops, dtype=np.int32)
+        mesh.loops.foreach_get("edge_index", self.loop_edge)
+
+        self.edge_verts = np.empty(num_edges * 2, dtype=np.int32)
+        mesh.edges.foreach_get("vertices", self.edge_verts)
+        self.edge_verts = self.edge_verts.reshape(-1, 2)
+        self.edge_hide = np.empty(num_edges, dtype=bool)
+        mesh.edges.foreach_get("hide", self.edge_hide)
+
+        mesh.clear_geometry()
+        MeshRevision.loops_counted(bm, num_loops)
+
+        self.loop_face = np.repeat(np.arange(num_faces, dtype=np.int32), self.face_sizes)
+        offset = np.arange(num_loops, dtype=np.int32) - self.face_loop_start[self.loop_face]
+        sizes = self.face_sizes[self.loop_face]
+        self.loop_next = self.face_loop_start[self.loop_face] + (offset + 1) % sizes
+        self.loop_prev = self.face_loop_start[self.loop_face] + (offset - 1) % sizes
+
+        # A Mesh has no radial links. Rebuild them from the loops of each edge in face order.
+        # That is the order a bmesh loaded from a mesh has. There the first loop of an edge (BMEdge.link_loops[0])
+        # is the loop of the last face, so that's used for edge_loop (-1 for wire edges).
+        # After the topology was edited in edit mode the bmesh order can differ, which only changes
+        # the side a walk starts from on edges with more than one face.
+        edge_face_count = np.bincount(self.loop_edge, minlength=num_edges).astype(np.int32)
+        edge_loop_end = np.cumsum(edge_face_count)
+        edge_loop_start = edge_loop_end - edge_face_count
+        radial = np.argsort(self.loop_edge, kind='stable').astype(np.int32)
+        radial_next = np.arange(1, num_loops + 1)
+        last = edge_loop_end[edge_face_count > 0] - 1
+        radial_next[last] = edge_loop_start[edge_face_count > 0]
+        last_loops = radial[last]
+        self.loop_radial_next = np.empty(num_loops, dtype=np.int32)
+        self.loop_radial_next[radial] = radial[radial_next]
+        self.edge_loop = np.full(num_edges, -1, dtype=np.int32)
+        self.edge_loop[edge_face_count > 0] = last_loops
+
+        self.edge_face_count = edge_face_count
+        self.edge_is_boundary = self.edge_face_count == 1
+        self.edge_is_manifold = self.edge_face_count == 2
+
+        self._edge_lengths = None
+        self._edge_length_list = None
+        self._links = None
+
+        self._select_state = None
+        self._vert_select = None
+        self._edge_select = None
+        self._edge_select_list = None
+
+    @staticmethod
+    def make_key(bm: BMesh, mesh_name):
+        return MeshRevision.stamp(bm, mesh_name)
+
+    @classmethod
+    def get(cls, bm: BMesh, mesh_name) -> MeshSnapshot:
+        """ Returns the snapshot for the mesh, extracting a new one only when the topology changed.
+            Don't call this while hovering. Use get_current() there.
+        """
+        snapshot = cls._snapshots.get(mesh_name)
+        if snapshot is None or not snapshot.is_current(bm):
+            snapshot = MeshSnapshot(bm, mesh_name)
+            cls._snapshots[mesh_name] = snapshot
+        return snapshot
+
+    @classmethod
+    def get_current(cls, bm: BMesh, mesh_name) -> MeshSnapshot:
+        """ Returns the cached snapshot only if its topology is still up to date. Never extracts a new one.
+            A new snapshot is scheduled instead, so callers should fall back to the bmesh until it's built.
+        """
+        snapshot = cls._snapshots.get(mesh_name)
+        if snapshot is not None and snapshot.is_current(bm):
+            return snapshot
+
+        cls.schedule(bm, mesh_name)
+        return None
+
+    @classmethod
+    def schedule(cls, bm: BMesh, mesh_name):
+        """ Build the snapshot from a timer, outside of the modal event that asked for it.
+        """
+        scheduled = cls._scheduled.get(mesh_name)
+        cls._scheduled[mesh_name] = bm
+        if scheduled is None:
+            bpy.app.timers.register(partial(cls._build_scheduled, mesh_name), first_interval=SNAPSHOT_BUILD_DELAY)
+
+    @classmethod
+    def _build_scheduled(cls, mesh_name):
+        bm = cls._scheduled.pop(mesh_name, None)
+        try:
+            if bm is not None and bm.is_valid:
+                cls.get(bm, mesh_name)
+        except ReferenceError:
+            pass
+        return None
+
+    @classmethod
+    def invalidate(cls, mesh_name=None):
+        if mesh_name is None:
+            cls._snapshots.clear()
+            cls._scheduled.clear()
+            _remove_scratch_mesh()
+        else:
+            cls._snapshots.pop(mesh_name, None)
+            cls._scheduled.pop(mesh_name, None)
+
+    def is_current(self, bm: BMesh):
+        return bm is self.bm and bm.is_valid and self.key == MeshSnapshot.make_key(bm, self.mesh_name)
+
+    @staticmethod
+    def _read_vert_co(bm: BMesh):
+        return np.fromiter(chain.from_iterable(vert.co for vert in bm.verts), dtype=np.float64, count=len(bm.verts) * 3).reshape(-1, 3)
+
+    def _sync_geometry(self):
+        """ Read back the coordinates of the vertices moved since the last sync.
+        """
+        geometry = MeshRevision.geometry(self.mesh_name)
+        if geometry == self.geometry:
+            return
+
+        moved = MeshRevision.moved_verts(self.mesh_name, self.geometry)
+        if moved is None:
+            self._vert_co = self._read_vert_co(self.bm)
+            self._edge_lengths = None
+        elif moved:
+            bm_verts = self.bm.verts
+            bm_verts.ensure_lookup_table()
+            moved = np.fromiter(moved, dtype=np.int64, count=len(moved))
+            self._vert_co[moved] = np.fromiter(chain.from_iterable(bm_verts[index].co for index in moved.tolist()), dtype=np.float64, count=len(moved) * 3).reshape(-1, 3)
+
+            if self._edge_lengths is not None:
+                moved_edges = np.flatnonzero(np.isin(self.edge_verts, moved).any(axis=1))
+                vecs = self._vert_co[self.edge_verts[moved_edges, 1]] - self._vert_co[self.edge_verts[moved_edges, 0]]
+                self._edge_lengths[moved_edges] = np.sqrt(np.einsum('ij,ij->i', vecs, vecs))
+
+        self._edge_length_list = None
+        self.geometry = geometry
+
+    def _sync_select(self):
+        state = MeshRevision.state(self.mesh_name)
+        if state == self._select_state:
+            return
+
+        bm = self.bm
+        self._vert_select = np.fromiter((vert.select for vert in bm.verts), dtype=bool, count=len(bm.verts))
+        self._edge_select = np.fromiter((edge.select for edge in bm.edges), dtype=bool, count=len(bm.edges))
+        self._edge_select_list = None
+        self._select_state = state
+
+    @property
+    def vert_co(self):
+        self._sync_geometry()
+        return self._vert_co
+
+    @property
+    def vert_select(self):
+        self._sync_select()
+        return self._vert_select
+
+    @property
+    def edge_select(self):
+        self._sync_select()
+        return self._edge_select
+
+    @property
+    def edge_select_list(self):
+        """ edge_select as a list, for the index walkers.
+        """
+        self._sync_select()
+        if self._edge_select_list is None:
+            self._edge_select_list = self._edge_select.tolist()
+        return self._edge_select_list
+
+    @property
+    def edge_lengths(self):
+        self._sync_geometry()
+        if self._edge_lengths is None:
+            vecs = self._vert_co[self.edge_verts[:, 1]] - self._vert_co[self.edge_verts[:, 0]]
+            self._edge_lengths = np.sqrt(np.einsum('ij,ij->i', vecs, vecs))
+        return self._edge_lengths
+
+    @property
+    def edge_length_list(self):
+        """ edge_lengths as a list, for the index walkers.
+        """
+        edge_lengths = self.edge_lengths
+        if self._edge_length_list is None:
+            self._edge_length_list = edge_lengths.tolist()
+        return self._edge_length_list
+
+    @property
+    def links(self) -> SnapshotLinks:
+        if self._links is None:
+            num_verts = len(self._vert_co)
+            edge_vert_flat = self.edge_verts.ravel()
+            vert_edge_count = np.bincount(edge_vert_flat, minlength=num_verts)
+            vert_edge_offsets = np.zeros(num_verts + 1, dtype=np.int64)
+            np.cumsum(vert_edge_count, out=vert_edge_offsets[1:])
+            vert_edges = np.argsort(edge_vert_flat, kind='stable') // 2
+
+            is_wire = self.edge_face_count == 0
+            vert_nonwire_edge_count = np.bincount(self.edge_verts[~is_wire].ravel(), minlength=num_verts)
+            vert_face_count = np.bincount(self.loop_vert, minlength=num_verts)
+
+            self._links = SnapshotLinks(
+                self.loop_vert.tolist(), self.loop_edge.tolist(), self.loop_face.tolist(),
+                self.loop_next.tolist(), self.loop_prev.tolist(), self.loop_radial_next.tolist(),
+                self.face_sizes.tolist(), self.face_loop_start.tolist(),
+                self.edge_verts.tolist(), self.edge_loop.tolist(), self.edge_hide.tolist(),
+                self.edge_is_boundary.tolist(), self.edge_is_manifold.tolist(),
+                vert_edge_offsets.tolist(), vert_edges.tolist(), vert_edge_count.tolist(), vert_nonwire_edge_count.tolist(), vert_face_count.tolist())
+
+        return self._links
+
+    def bm_loops(self, loops):
+        """ The BMLoops for a list of loop indices. None stays None.
+        """
+        bm_faces = self.bm.faces
+        bm_faces.ensure_lookup_table()
+        face_loop_start = self.face_loop_start
+        loop_face = self.loop_face
+
+        bm_loops = []
+        for loop in loops:
+            if loop is None or loop < 0:
+                bm_loops.append(None)
+                continue
+            face = int(loop_face[loop])
+            bm_loops.append(bm_faces[face].loops[loop - int(face_loop_start[face])])
+        return bm_loops
+
+    def bm_loop(self, loop):
+        return self.bm_loops((loop,))[0]
+
+    def edge_cos(self, vert_pairs):
+        """ Coordinates for pairs of vertex indices.
+
+            Returns:
+                (N, 2, 3) array containing the local start and end coordinates of each pair.
+        """
+        return self.vert_co[np.asarray(vert_pairs, dtype=np.int32).reshape(-1, 2)]
+
+    def loop_edge_cos(self, loops):
+        """ Coordinates of the edge of each loop, starting at the loop's vertex.
+
+            Returns:
+                (N, 2, 3) array
+        """
+        loops = np.asarray(loops, dtype=np.int32)
+        return self.vert_co[np.stack((self.loop_vert[loops], self.loop_vert[self.loop_next[loops]]), axis=-1)]
+
+    def shortest_edge_len(self, edge_indices):
+        if len(edge_indices) == 0:
+            return float('INF')
+        return float(self.edge_lengths[np.asarray(edge_indices, dtype=np.int32)].min())
@@ -0,0 +1,112 @@
+from collections import deque, namedtuple
+import json
+import time
+
+# Scoped timers for the modal hot paths (snapping, ring walking, point computation, drawing, ...).
+# Nothing is recorded unless Profiler.enabled is set. Operators enable it from the addon preferences when they start.
+# Counters (cache hits, misses, ...) are recorded with Profiler.increment(name) and are written out by dump() too.
+# Usage:
+#   with Profiler.scope("Snapping"):
+#       ...
+
+ScopeStats = namedtuple('ScopeStats', 'count p50 p95 max')
+
+class _Scope():
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        Profiler.add_sample(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullScope():
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_null_scope = _NullScope()
+
+
+class Profiler():
+    enabled = False
+    # Number of samples kept for each scope
+    window_size = 120
+    _samples = {}
+    _counters = {}
+
+    @classmethod
+    def scope(cls, name):
+        if not cls.enabled:
+            return _null_scope
+        return _Scope(name)
+
+    @classmethod
+    def add_sample(cls, name, duration):
+        samples = cls._samples.get(name)
+        if samples is None:
+            samples = cls._samples[name] = deque(maxlen=cls.window_size)
+        samples.append(duration)
+
+    @classmethod
+    def increment(cls, name, amount=1):
+        if cls.enabled:
+            cls._counters[name] = cls._counters.get(name, 0) + amount
+
+    @classmethod
+    def get_counter(cls, name):
+        return cls._counters.get(name, 0)
+
+    @classmethod
+    def reset(cls):
+        cls._samples.clear()
+        cls._counters.clear()
+
+    @classmethod
+    def get_stats(cls, name)-> ScopeStats:
+        """ Rolling statistics for a scope in milliseconds. Returns None if the scope has no samples.
+        """
+        samples = cls._samples.get(name)
+        if not samples:
+            return None
+
+        values = sorted(samples)
+        def percentile(p):
+            return values[min(len(values) - 1, int(round(p * (len(values) - 1))))] * 1000.0
+
+        return ScopeStats(len(values), percentile(0.5), percentile(0.95), values[-1] * 1000.0)
+
+    @classmethod
+    def get_all_stats(cls):
+        return {name: cls.get_stats(name) for name in cls._samples}
+
+    @classmethod
+    def format_stats(cls, name)-> str:
+        stats = cls.get_stats(name)
+        if stats is None:
+            return "-"
+        return f"{stats.p50:.2f} / {stats.p95:.2f} / {stats.max:.2f} ms"
+
+    @classmethod
+    def dump(cls, filepath, label=""):
+        """ Append the current statistics to a file as a single line of JSON.
+        """
+        entry = {
+            'time': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'label': label,
+            'scopes': {name: stats._asdict() for name, stats in cls.get_all_stats().items() if stats is not None},
+            'counters': dict(cls._counters),
+        }
+        with open(filepath, 'a') as file:
+            file.write(json.dumps(entry) + "\n")
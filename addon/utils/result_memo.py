@@ -0,0 +1,42 @@
+from .profiler import Profiler
+
+# Remembers the inputs of the last pass of an expensive computation.
+# The caller builds a key from everything the result depends on and skips the work when lookup() finds the same key.
+# The result itself stays wherever the computation left it (usually on the operator).
+# Usage:
+#   if not memo.lookup(key):
+#       ...
+#       memo.store(key)
+
+class ResultMemo():
+    def __init__(self, name):
+        self.name = name
+        self.key = None
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key)-> bool:
+        if key is not None and key == self.key:
+            self.hits += 1
+            Profiler.increment(f"{self.name} hits")
+            return True
+
+        self.misses += 1
+        Profiler.increment(f"{self.name} misses")
+        return False
+
+    def store(self, key):
+        self.key = key
+
+    def clear(self):
+        self.key = None
+
+    def reset(self):
+        self.key = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
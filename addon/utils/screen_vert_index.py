@@ -0,0 +1,91 @@
+from __future__ import annotations
+from itertools import chain
+from typing import Dict
+
+import numpy as np
+from bmesh.types import BMesh
+from mathutils import Matrix, Vector, kdtree
+
+from .mesh_revision import MeshRevision
+
+# Region pixel positions of the selected verts of an edit mesh, stored in a mathutils KDTree.
+# The selected verts are read from the bmesh and projected in one NumPy pass, the same way location_3d_to_region_2d() does it.
+# The tree is only rebuilt when the view, the object matrix, the region size or the mesh (including its selection) changes.
+# Verts behind the view are left out, location_3d_to_region_2d() returns None for them.
+
+def _matrix_key(matrix: Matrix):
+    return tuple(value for row in matrix for value in row)
+
+
+class ScreenVertIndex():
+    _indices: Dict[str, ScreenVertIndex] = {}
+
+    def __init__(self, bm: BMesh, key, object_matrix: Matrix, persp_matrix: Matrix, region_size):
+        self.bm = bm
+        self.key = key
+
+        bm.verts.index_update()
+        selected_verts = [vert for vert in bm.verts if vert.select]
+        selected = np.fromiter((vert.index for vert in selected_verts), dtype=np.int64, count=len(selected_verts))
+        co = np.fromiter(chain.from_iterable(vert.co for vert in selected_verts), dtype=np.float64, count=len(selected_verts) * 3).reshape(-1, 3)
+        mvp = np.array(persp_matrix @ object_matrix, dtype=np.float64)
+        clip = co @ mvp[:, :3].T + mvp[:, 3]
+        in_front = clip[:, 3] > 0.0
+
+        clip = clip[in_front]
+        half_size = np.array(region_size, dtype=np.float64) * 0.5
+        co_2d = half_size + half_size * (clip[:, :2] / clip[:, 3:4])
+
+        self.vert_indices = selected[in_front].tolist()
+        self.co_2d = co_2d.tolist()
+
+        self.tree = kdtree.KDTree(len(self.vert_indices))
+        for i, (x, y) in enumerate(self.co_2d):
+            self.tree.insert((x, y, 0.0), i)
+        self.tree.balance()
+
+    @staticmethod
+    def make_key(bm: BMesh, mesh_name, object_matrix: Matrix, persp_matrix: Matrix, region_size):
+        # The state revision changes with selection updates too
+        mesh_key = (MeshRevision.stamp(bm, mesh_name), MeshRevision.geometry(mesh_name), MeshRevision.state(mesh_name))
+        return (mesh_key, _matrix_key(object_matrix), _matrix_key(persp_matrix), tuple(region_size))
+
+    @classmethod
+    def get(cls, bm: BMesh, mesh_name, object_matrix: Matrix, region, rv3d) -> ScreenVertIndex:
+        region_size = (region.width, region.height)
+        key = cls.make_key(bm, mesh_name, object_matrix, rv3d.perspective_matrix, region_size)
+
+        index = cls._indices.get(mesh_name)
+        if index is None or index.bm is not bm or index.key != key:
+            index = ScreenVertIndex(bm, key, object_matrix, rv3d.perspective_matrix, region_size)
+            cls._indices[mesh_name] = index
+        return index
+
+    @classmethod
+    def invalidate(cls, mesh_name=None):
+        if mesh_name is None:
+            cls._indices.clear()
+        else:
+            cls._indices.pop(mesh_name, None)
+
+    def find_nearest(self, mouse_coords, vert_indices=None):
+        """ The selected vert closest to mouse_coords in region space.
+
+            Args:
+                vert_indices: Only consider these verts when given.
+
+            Returns:
+                The index of the vert and its region coordinates, or (None, None)
+        """
+        if not self.vert_indices:
+            return None, None
+
+        vert_filter = None
+        if vert_indices is not None:
+            vert_indices = set(vert_indices)
+            vert_filter = lambda i: self.vert_indices[i] in vert_indices
+
+        _, i, _ = self.tree.find((mouse_coords[0], mouse_coords[1], 0.0), filter=vert_filter)
+        if i is None:
+            return None, None
+        return self.vert_indices[i], Vector(self.co_2d[i])
@@ -0,0 +1,581 @@
+from __future__ import annotations
+from dataclasses import dataclass
+
+from .mesh_snapshot import MeshSnapshot
+
+# Index based versions of the walkers in utils.mesh. They run over the SnapshotLinks of a MeshSnapshot
+# and yield loop (or edge) indices instead of BMesh elements, but otherwise follow the same rules
+# for boundaries, ngons, tri fans and selected only walks.
+# Use MeshSnapshot.bm_loops() to get the BMLoops back for the results.
+
+@dataclass
+class IndexWalkerMetadata():
+    active_loop: int = None
+    is_loop: bool = False
+    shortest_edge_len: float = float('INF')
+
+
+def edge_ring_walker(snapshot: MeshSnapshot, edge, selected_only=False, metadata: IndexWalkerMetadata=None, loop=None):
+    """ Same as utils.mesh.bmesh_edge_ring_walker. Yields loop indices.
+    """
+    links = snapshot.links
+    loop_next = links.loop_next
+    loop_radial_next = links.loop_radial_next
+    loop_edge = links.loop_edge
+    loop_face = links.loop_face
+    face_sizes = links.face_sizes
+    edge_is_manifold = links.edge_is_manifold
+    edge_is_boundary = links.edge_is_boundary
+    edge_hide = links.edge_hide
+    edge_select = snapshot.edge_select_list if selected_only else None
+    edge_lengths = snapshot.edge_length_list if metadata is not None else None
+
+    if loop is None:
+        loop = links.edge_loop[edge]
+        if loop < 0:
+            return
+    edge = loop_edge[loop]
+
+    def is_valid_edge(edge):
+        if not selected_only:
+            return not edge_hide[edge]
+        else:
+            return (not edge_hide[edge]) and edge_select[edge]
+
+    def step(next_loop, visited):
+        l = loop_next[loop_next[loop_radial_next[next_loop]]]
+        l_edge = loop_edge[l]
+        if face_sizes[loop_face[l]] != 4 and (not edge_is_manifold[l_edge] or not edge_is_boundary[l_edge]) and is_valid_edge(l_edge):
+            l = loop_next[loop_next[next_loop]]
+            l_edge = loop_edge[l]
+
+        if face_sizes[loop_face[l]] == 4 and (edge_is_manifold[l_edge] or edge_is_boundary[l_edge]) and l_edge not in visited and is_valid_edge(l_edge):
+            return l
+        return -1
+
+    def rewind(loop):
+        visited = {loop_edge[loop]}
+        next_loop = loop
+        while True:
+            l = step(next_loop, visited)
+            if l < 0:
+                break
+            next_loop = l
+            visited.add(loop_edge[l])
+
+        return next_loop
+
+    next_loop = loop_radial_next[rewind(loop)]
+    visited = {loop_edge[next_loop]}
+
+    active_loop = None
+    shortest_edge_len = float('INF')
+
+    while True:
+        if metadata is not None:
+            edge_len = edge_lengths[loop_edge[next_loop]]
+            if edge_len < shortest_edge_len:
+                shortest_edge_len = edge_len
+            if loop_edge[next_loop] == edge:
+                active_loop = next_loop
+
+        yield next_loop
+        l = step(next_loop, visited)
+        if l >= 0:
+            next_loop = l
+            visited.add(loop_edge[l])
+        else:
+            if metadata is not None:
+                if loop_edge[loop_next[loop_next[loop_radial_next[next_loop]]]] in visited and not edge_is_boundary[loop_edge[next_loop]]:
+                    metadata.is_loop = True
+                metadata.active_loop = active_loop
+                metadata.shortest_edge_len = shortest_edge_len
+            break
+
+
+def edge_ring_walker_sel_only(snapshot: MeshSnapshot, edge, metadata: IndexWalkerMetadata=None):
+    """ Same as utils.mesh.bmesh_edge_ring_walker_sel_only. Yields loop indices.
+    """
+    links = snapshot.links
+    loop_next = links.loop_next
+    loop_radial_next = links.loop_radial_next
+    loop_edge = links.loop_edge
+    loop_face = links.loop_face
+    face_sizes = links.face_sizes
+    face_loop_start = links.face_loop_start
+    edge_is_manifold = links.edge_is_manifold
+    edge_is_boundary = links.edge_is_boundary
+    edge_hide = links.edge_hide
+    edge_select = snapshot.edge_select_list
+    edge_lengths = snapshot.edge_length_list if metadata is not None else None
+
+    def is_valid_edge(edge):
+        return not edge_hide[edge] and edge_select[edge]
+
+    def get_next_sel_loop(first_loop, visited=None):
+        next_loop = first_loop
+        while True:
+            next_loop = loop_next[next_loop]
+            next_edge = loop_edge[next_loop]
+            if edge_select[next_edge] and (visited is None or next_edge not in visited):
+                return next_loop
+            if next_loop == first_loop:
+                break
+
+        return -1
+
+    def face_selected_edge_count(loop):
+        face = loop_face[loop]
+        start = face_loop_start[face]
+        return sum(1 for l in range(start, start + face_sizes[face]) if edge_select[loop_edge[l]])
+
+    def rewind(loop):
+        visited = {loop_edge[loop]}
+        next_loop = loop
+
+        while True:
+            l = loop_next[loop_next[loop_radial_next[next_loop]]]
+            l_edge = loop_edge[l]
+            sel_loop = get_next_sel_loop(l, visited)
+            if sel_loop >= 0:
+                next_loop = sel_loop
+                visited.add(loop_edge[sel_loop])
+
+            elif l_edge == loop_edge[loop]:
+                return next_loop
+
+            # Breaks edge slice rings
+            elif face_selected_edge_count(l) == 2:
+                next_loop = get_next_sel_loop(l)
+                break
+
+            elif face_sizes[loop_face[l]] == 4 and (edge_is_manifold[l_edge] or edge_is_boundary[l_edge]) and l_edge not in visited and is_valid_edge(l_edge):
+                next_loop = l
+                visited.add(l_edge)
+            else:
+                break
+
+        return next_loop
+
+    loop = links.edge_loop[edge]
+    if loop < 0:
+        return
+
+    next_loop = loop_radial_next[rewind(loop)]
+    visited = {loop_edge[next_loop]}
+
+    active_loop = None
+    shortest_edge_len = float('INF')
+
+    def finish(is_loop):
+        if metadata is not None:
+            if is_loop:
+                metadata.is_loop = True
+            metadata.active_loop = active_loop
+            metadata.shortest_edge_len = shortest_edge_len
+
+    while True:
+        next_edge = loop_edge[next_loop]
+        if edge_select[next_edge]:
+            if metadata is not None:
+                edge_len = edge_lengths[next_edge]
+                if edge_len < shortest_edge_len:
+                    shortest_edge_len = edge_len
+                if next_edge == edge:
+                    active_loop = next_loop
+            yield next_loop
+        else:
+            finish(loop_edge[loop_next[loop_next[loop_radial_next[next_loop]]]] in visited)
+            break
+
+        l = loop_next[loop_next[loop_radial_next[next_loop]]]
+        l_edge = loop_edge[l]
+        sel_loop = get_next_sel_loop(l, visited)
+        if sel_loop >= 0:
+            next_loop = sel_loop
+            visited.add(loop_edge[sel_loop])
+
+        elif face_selected_edge_count(l) == 2:
+            next_loop = get_next_sel_loop(l)
+            finish(loop_edge[next_loop] in visited)
+            break
+
+        elif face_sizes[loop_face[l]] == 4 and (edge_is_manifold[l_edge] or edge_is_boundary[l_edge]) and l_edge not in visited and is_valid_edge(l_edge):
+            next_loop = l
+            visited.add(l_edge)
+
+        else:
+            finish(loop_edge[loop_next[loop_next[loop_radial_next[next_loop]]]] in visited)
+            break
+
+
+def face_loop_for_edge(snapshot: MeshSnapshot, face, edge):
+    links = snapshot.links
+    start = links.face_loop_start[face]
+    for loop in range(start, start + links.face_sizes[face]):
+        if links.loop_edge[loop] == edge:
+            return loop
+    return -1
+
+
+def tri_fan_walker(snapshot: MeshSnapshot, face, edge, metadata: IndexWalkerMetadata):
+    """ Same as utils.mesh.bm_tri_fan_walker. Yields loop indices (and None when the fan ends on a boundary).
+    """
+    links = snapshot.links
+    loop_vert = links.loop_vert
+    loop_edge = links.loop_edge
+    loop_next = links.loop_next
+    loop_prev = links.loop_prev
+    loop_radial_next = links.loop_radial_next
+    edge_is_manifold = links.edge_is_manifold
+    edge_lengths = snapshot.edge_length_list
+
+    def get_edge_other_loop(edge, loop):
+        other_loop = loop if loop_edge[loop] == edge else loop_prev[loop]
+        other_loop = loop_radial_next[other_loop]
+
+        if loop_vert[other_loop] == loop_vert[loop]:
+            pass
+        elif loop_vert[loop_next[other_loop]] == loop_vert[loop]:
+            other_loop = loop_next[other_loop]
+        else:
+            return -1
+
+        return other_loop
+
+    def vert_step_fan_loop(loop, edge_step):
+        if loop >= 0:
+            if loop_edge[loop] == edge_step:
+                next_edge = loop_edge[loop_prev[loop]]
+            elif loop_edge[loop_prev[loop]] == edge_step:
+                next_edge = loop_edge[loop]
+            else:
+                return -1, -1
+
+            if edge_is_manifold[next_edge]:
+                return get_edge_other_loop(next_edge, loop), next_edge
+
+        return -1, -1
+
+    def get_edge_other_loop_r(edge, loop):
+        other_loop = loop if loop_edge[loop] != edge else loop_next[loop]
+        other_loop = loop_radial_next[other_loop]
+
+        if loop_vert[other_loop] == loop_vert[loop]:
+            pass
+        elif loop_vert[loop_prev[loop_prev[other_loop]]] == loop_vert[loop]:
+            other_loop = loop_prev[loop_prev[other_loop]]
+        else:
+            return -1
+
+        return other_loop
+
+    def vert_step_fan_loop_r(loop, edge_step):
+        if loop >= 0:
+            if loop_edge[loop] == edge_step:
+                next_edge = loop_edge[loop_next[loop_radial_next[loop]]]
+            elif loop_edge[loop_prev[loop]] == edge_step:
+                next_edge = loop_edge[loop]
+            else:
+                return -1, -1
+
+            if edge_is_manifold[next_edge]:
+                return get_edge_other_loop_r(next_edge, loop), next_edge
+
+        return -1, -1
+
+    def rewind(loop):
+        next_edge = loop_edge[loop]
+        while True:
+            next_loop, next_edge = vert_step_fan_loop(loop, next_edge)
+            if next_loop < 0:
+                return loop_next[loop_next[loop]] if loop_edge[loop] != next_edge else loop
+
+            loop = next_loop
+
+            if next_edge == loop_edge[orig_start_loop]:
+                return loop
+
+    orig_start_loop = face_loop_for_edge(snapshot, face, edge)
+    if orig_start_loop < 0:
+        return
+
+    start_loop = rewind(orig_start_loop)
+    shortest_edge_len = float('INF')
+
+    yield start_loop
+
+    if loop_edge[start_loop] == loop_edge[orig_start_loop]:
+        start_loop = loop_radial_next[orig_start_loop]
+
+    if edge_is_manifold[loop_edge[loop_next[start_loop]]]:
+        start_loop = loop_next[start_loop]
+    else:
+        yield None
+        return
+
+    loop = start_loop
+    next_edge = loop_edge[start_loop]
+    done = False
+    while True:
+        edge_len = edge_lengths[loop_edge[loop]]
+        if edge_len < shortest_edge_len:
+            shortest_edge_len = edge_len
+
+        yield loop
+
+        if done:
+            metadata.active_loop = orig_start_loop
+            metadata.shortest_edge_len = shortest_edge_len
+            break
+
+        next_loop, next_edge = vert_step_fan_loop_r(loop, next_edge)
+        if next_loop < 0:
+            next_loop = loop_next[loop_radial_next[loop]] if loop_edge[loop] != next_edge else loop
+            done = True
+
+        loop = next_loop
+
+        if next_edge == loop_edge[start_loop]:
+            metadata.is_loop = True
+            metadata.active_loop = orig_start_loop
+            metadata.shortest_edge_len = shortest_edge_len
+            break
+
+
+def edge_loop_walker(snapshot: MeshSnapshot, edge, selected_edges_only=False, skip_rewind=False, yield_loop=False):
+    """ Same as utils.mesh.bmesh_edge_loop_walker. Yields edge indices, or loop indices (and None) when yield_loop is set.
+    """
+    links = snapshot.links
+    loop_vert = links.loop_vert
+    loop_edge = links.loop_edge
+    loop_face = links.loop_face
+    loop_next = links.loop_next
+    loop_prev = links.loop_prev
+    loop_radial_next = links.loop_radial_next
+    face_sizes = links.face_sizes
+    face_loop_start = links.face_loop_start
+    edge_verts = links.edge_verts
+    edge_loop = links.edge_loop
+    edge_select = snapshot.edge_select_list if selected_edges_only else None
+    edge_hide = links.edge_hide
+    edge_is_boundary = links.edge_is_boundary
+    edge_is_manifold = links.edge_is_manifold
+    vert_edge_offsets = links.vert_edge_offsets
+    vert_edges = links.vert_edges
+    vert_nonwire_edge_count = links.vert_nonwire_edge_count
+
+    def other_vert(edge, vert):
+        vert_a, vert_b = edge_verts[edge]
+        return vert_b if vert == vert_a else vert_a
+
+    def link_edges(vert):
+        return vert_edges[vert_edge_offsets[vert]:vert_edge_offsets[vert + 1]]
+
+    def first_loop(edge):
+        loop = edge_loop[edge]
+        return loop if loop >= 0 else None
+
+    def get_loop_other_edge_loop(loop, vert):
+        return loop_prev[loop] if loop_vert[loop] == vert else loop_next[loop]
+
+    def get_shared_edge_for_verts(vert_a, vert_b):
+        edges_b = link_edges(vert_b)
+        for edge in link_edges(vert_a):
+            if edge in edges_b:
+                return edge
+        return None
+
+    def get_face_other_vert_loop(face, vert_prev, vert):
+        start = face_loop_start[face]
+        for loop in range(start, start + face_sizes[face]):
+            if loop_vert[loop] == vert:
+                if loop_vert[loop_prev[loop]] == vert_prev:
+                    return loop_next[loop]
+                elif loop_vert[loop_next[loop]] == vert_prev:
+                    return loop_prev[loop]
+                return None
+        return None
+
+    def edge_is_single(edge):
+        loop = edge_loop[edge]
+        return edge_is_boundary[edge] and face_sizes[loop_face[loop]] > 4 \
+            and (edge_is_boundary[loop_edge[loop_next[loop]]] or edge_is_boundary[loop_edge[loop_prev[loop]]])
+
+    def step(edge, last_vert, face_hub, is_boundry, is_single, visited_edges, in_rewind):
+        """ One step of the walker.
+            Returns (reached_end, stop, curr_edge, last_vert, face_hub, next_loop).
+            stop is set when a selected only walk stops inside the rewind.
+        """
+        reached_end = True
+        curr_edge = edge
+        next_loop = None
+        loop = first_loop(edge)
+
+        if face_hub is not None: # Ngon Edge
+            vert = other_vert(edge, last_vert)
+            if vert_nonwire_edge_count[vert] == 3:
+                loop = get_face_other_vert_loop(face_hub, last_vert, vert)
+                next_edge = get_shared_edge_for_verts(vert, loop_vert[loop])
+
+                if selected_edges_only and not edge_select[next_edge]:
+                    return True, in_rewind, curr_edge, last_vert, face_hub, next_loop
+
+                if next_edge not in visited_edges and not edge_is_boundary[next_edge] and not edge_hide[next_edge]:
+                    reached_end = False
+                    curr_edge = next_edge
+                    last_vert = vert
+                    if not in_rewind:
+                        next_loop = loop
+                    visited_edges.add(next_edge)
+            else: # Escape out of the ngon face loop.
+                reached_end = False
+                face_hub = None
+
+        elif loop is None: # wire edge
+            # The rewind keeps the last wire edge it finds, the walk the first one for each vert
+            for vert in edge_verts[edge]:
+                for next_edge in link_edges(vert):
+                    if next_edge not in visited_edges and edge_loop[next_edge] < 0 and not edge_hide[next_edge]:
+                        reached_end = False
+                        curr_edge = next_edge
+                        last_vert = vert
+                        visited_edges.add(next_edge)
+                        if not in_rewind:
+                            break
+
+        elif not is_boundry: # normal edge with faces
+            vert = other_vert(edge, last_vert)
+            vert_edge_total = vert_nonwire_edge_count[vert]
+
+            if vert_edge_total == 4 or vert_edge_total == 2:
+                i_opposite = vert_edge_total // 2
+                i = 0
+                while True:
+                    loop = get_loop_other_edge_loop(loop, vert)
+                    if edge_is_manifold[loop_edge[loop]]:
+                        loop = loop_radial_next[loop]
+                    else:
+                        loop = None
+                        break
+
+                    i += 1
+                    if i == i_opposite:
+                        break
+            else:
+                loop = None
+
+            if loop is not None:
+                if in_rewind and selected_edges_only and not edge_select[loop_edge[loop]]:
+                    return True, True, curr_edge, last_vert, face_hub, next_loop
+
+                if loop != edge_loop[edge] and loop_edge[loop] not in visited_edges and not edge_hide[loop_edge[loop]]:
+                    reached_end = False
+                    curr_edge = loop_edge[loop]
+                    last_vert = vert
+                    next_loop = loop
+                    visited_edges.add(loop_edge[loop])
+
+                if not in_rewind and selected_edges_only and not edge_select[loop_edge[loop]]:
+                    reached_end = True
+
+        else: # Boundry edge with faces
+            vert = other_vert(edge, last_vert)
+            vert_edge_total = vert_nonwire_edge_count[vert]
+
+            # Walk over boundary of faces but stop at corners.
+            if (not is_single and vert_edge_total > 2) or \
+                (is_single and vert_edge_total == 2 and edge_is_boundary[edge]):
+
+                while True:
+                    loop = get_loop_other_edge_loop(loop, vert)
+                    if edge_is_manifold[loop_edge[loop]]:
+                        loop = loop_radial_next[loop]
+                    elif edge_is_boundary[loop_edge[loop]]:
+                        break
+                    else:
+                        loop = None
+                        break
+
+            if not is_single and loop is not None and edge_is_single(loop_edge[loop]):
+                loop = None
+
+            if loop is not None:
+                if in_rewind and selected_edges_only and not edge_select[loop_edge[loop]]:
+                    return True, True, curr_edge, last_vert, face_hub, next_loop
+
+                if loop != edge_loop[edge] and loop_edge[loop] not in visited_edges and not edge_hide[loop_edge[loop]]:
+                    reached_end = False
+                    curr_edge = loop_edge[loop]
+                    last_vert = vert
+                    next_loop = loop
+                    visited_edges.add(loop_edge[loop])
+                elif in_rewind and yield_loop:
+                    next_loop = loop
+
+                if not in_rewind and selected_edges_only and not edge_select[loop_edge[loop]]:
+                    reached_end = True
+
+        return reached_end, False, curr_edge, last_vert, face_hub, next_loop
+
+    def rewind(edge, face_hub):
+        last_vert = edge_verts[edge][0]
+        visited_edges = {edge}
+        curr_edge = edge
+        current_loop = None
+
+        is_boundry = edge_is_boundary[edge]
+        is_single = is_boundry and edge_is_single(edge)
+
+        reached_end = False
+        while not reached_end:
+            current_loop = first_loop(curr_edge)
+            reached_end, stop, curr_edge, last_vert, face_hub, next_loop = step(curr_edge, last_vert, face_hub, is_boundry, is_single, visited_edges, True)
+            if next_loop is not None:
+                current_loop = next_loop
+            if stop:
+                break
+
+        return curr_edge, last_vert, current_loop
+
+    vert_a, vert_b = edge_verts[edge]
+    is_boundry = edge_is_boundary[edge]
+    is_single = is_boundry and edge_is_single(edge)
+
+    face_hub = None
+    if not is_boundry and any(links.vert_edge_count[vert] == 3 and links.vert_face_count[vert] == 3 for vert in (vert_a, vert_b)):
+        face_best = None
+        loop = edge_loop[edge]
+        if loop >= 0:
+            l = loop
+            while True:
+                face = loop_face[l]
+                if face_best is None or face_sizes[face] > face_sizes[face_best]:
+                    face_best = face
+                l = loop_radial_next[l]
+                if l == loop:
+                    break
+
+        if face_best is not None and face_sizes[face_best] > 4:
+            face_hub = face_best
+
+    # Rewind
+    # insert last edge in rewind to visited set
+    curr_edge, last_vert = edge, vert_a
+    if not skip_rewind:
+        curr_edge, last_vert, rewind_loop = rewind(edge, face_hub)
+        if yield_loop:
+            yield rewind_loop
+
+    visited_edges = {curr_edge}
+    last_vert = other_vert(curr_edge, last_vert)
+
+    reached_end = False
+    while not reached_end:
+        edge = curr_edge
+        reached_end, _, curr_edge, last_vert, face_hub, next_loop = step(edge, last_vert, face_hub, is_boundry, is_single, visited_edges, False)
+
+        if not yield_loop:
+            yield edge
+        else:
+            yield next_loop
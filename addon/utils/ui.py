@@ -66,7 +66,8 @@ def get_ordered_fl_keymap_actions():
         "lock_snap_points": "Lock Snap Points",
         "increase_loop_count": "Increase Loop Count", 
         "decrease_loop_count": "Decrease Loop Count",
-        "insert_midpoint": "Insert Loop At Midpoint"}
+        "insert_midpoint": "Insert Loop At Midpoint",
+        "insert_on_selected_rings": "Insert On Selected Rings"}
 
 def append_modifier_keys(key_string, ctrl, shift, alt):
         if ctrl:
@@ -0,0 +1,583 @@
+""" Headless benchmarks for the loop preview and commit hot paths.
+
+    Generates synthetic meshes (grids, cylinders, tri fans and n-gons) and times each stage
+    the Fast Loop operator runs while previewing and inserting loops:
+        ring_walk               bmesh_edge_ring_walker
+        edge_data_factory       EdgeDataFactory.create (cold and warm ring index)
+        edge_points             EdgeData point computation for each edge position algorithm
+        create_geometry         FastLoopCommon.create_geometry
+        edge_slide_directions   calculate_edge_slide_directions
+        snap                    SnapContext.do_snap_objects
+        snapshot                MeshSnapshot.get, EdgeCatalog and the snapshot walkers
+
+    Usage:
+        blender --background --factory-startup --python benchmarks/run_benchmarks.py -- --output results.json
+        blender --background --factory-startup --python benchmarks/run_benchmarks.py -- --baseline results.json
+
+    The addon folder is imported by its folder name (it should be named "Fast Loop") unless --module is passed.
+    With --baseline, the medians are compared against a previous results file and the script
+    exits with a non zero status if any stage is slower than the allowed tolerance.
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from math import cos, sin, pi, tan
+from pathlib import Path
+from statistics import mean, median
+from types import SimpleNamespace
+
+import bpy
+import bmesh
+from bmesh.types import BMVert
+from mathutils import Matrix, Vector
+
+ADDON_DIR = Path(__file__).resolve().parent.parent
+
+# Mesh sizes used for each generator. (name, builder args)
+MESH_SIZES = {
+    'small': {
+        'grid': (32,),
+        'cylinder': (64, 16),
+        'tri_fan': (64,),
+        'ngon': (64,),
+    },
+    'large': {
+        'grid': (160,),
+        'cylinder': (512, 64),
+        'tri_fan': (2048,),
+        'ngon': (2048,),
+    },
+}
+
+REGION_SIZE = (1920, 1080)
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description="Fast Loop benchmarks")
+    parser.add_argument('--output', type=Path, default=None, help="Write the results to this JSON file")
+    parser.add_argument('--baseline', type=Path, default=None, help="Compare the results against this JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown of a median compared to the baseline (0.25 = 25%%)")
+    parser.add_argument('--module', default=ADDON_DIR.name, help="Module name of the addon")
+    parser.add_argument('--sizes', default='small,large', help="Comma separated mesh sizes to run")
+    parser.add_argument('--meshes', default=','.join(MESH_SIZES['small']), help="Comma separated meshes to run")
+    parser.add_argument('--samples', type=int, default=16, help="Number of start edges per mesh")
+    parser.add_argument('--repeat', type=int, default=5, help="Number of times each sample is timed")
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def load_addon(module_name):
+    """ Enable the addon so that its properties and preferences are registered, then return the modules used by the benchmarks.
+    """
+    import addon_utils
+
+    if str(ADDON_DIR.parent) not in sys.path:
+        sys.path.insert(0, str(ADDON_DIR.parent))
+
+    if addon_utils.enable(module_name, default_set=True) is None:
+        raise RuntimeError(f"Unable to enable the addon {module_name}")
+
+    def get(name):
+        return importlib.import_module(f"{module_name}.addon.{name}")
+
+    return SimpleNamespace(
+        mesh=get('utils.mesh'),
+        mesh_revision=get('utils.mesh_revision'),
+        mesh_snapshot=get('utils.mesh_snapshot'),
+        snapshot_walkers=get('utils.snapshot_walkers'),
+        edge_catalog=get('utils.edge_catalog'),
+        edge_slide=get('utils.edge_slide'),
+        edge_ring=get('ops.edge_ring'),
+        edge_data=get('ops.edge_data'),
+        algorithms=get('ops.fast_loop_algorithms'),
+        common=get('ops.fast_loop_common'),
+        multi_object_edit=get('ops.multi_object_edit'),
+        fl_properties=get('props.fl_properties'),
+        snapping=get('snapping.snapping'),
+        ops_utils=get('utils.ops'),
+    )
+
+# region -Mesh Generators
+
+def build_grid(bm, size):
+    bmesh.ops.create_grid(bm, x_segments=size, y_segments=size, size=1.0)
+
+
+def build_cylinder(bm, segments, rings):
+    rows = []
+    for ring in range(rings + 1):
+        z = -1.0 + 2.0 * ring / rings
+        rows.append([bm.verts.new((cos(2.0 * pi * i / segments), sin(2.0 * pi * i / segments), z)) for i in range(segments)])
+
+    for ring in range(rings):
+        for i in range(segments):
+            j = (i + 1) % segments
+            bm.faces.new((rows[ring][i], rows[ring][j], rows[ring + 1][j], rows[ring + 1][i]))
+
+    # N-gon caps
+    bm.faces.new(list(reversed(rows[0])))
+    bm.faces.new(rows[-1])
+
+
+def build_tri_fan(bm, segments):
+    bmesh.ops.create_cone(bm, cap_ends=True, cap_tris=True, segments=segments, radius1=1.0, radius2=0.0, depth=1.0)
+
+
+def build_ngon(bm, segments):
+    bmesh.ops.create_circle(bm, cap_ends=True, cap_tris=False, segments=segments, radius=1.0)
+    rim = [edge for edge in bm.edges if edge.is_boundary]
+    ret = bmesh.ops.extrude_edge_only(bm, edges=rim)
+    new_verts = [elem for elem in ret['geom'] if isinstance(elem, BMVert)]
+    bmesh.ops.scale(bm, vec=(1.5, 1.5, 1.0), verts=new_verts)
+
+
+BUILDERS = {
+    'grid': build_grid,
+    'cylinder': build_cylinder,
+    'tri_fan': build_tri_fan,
+    'ngon': build_ngon,
+}
+
+
+def pick_start_edge(mesh_name, face):
+    """ Return the edge of the face the mouse would be over for this kind of mesh.
+    """
+    if mesh_name == 'tri_fan':
+        # The edge that goes to the center of the fan
+        return max(face.edges, key=lambda edge: max(len(vert.link_edges) for vert in edge.verts))
+    if mesh_name == 'cylinder':
+        # Horizontal edge so that the ring goes around the cylinder
+        return min(face.edges, key=lambda edge: abs(edge.verts[0].co.z - edge.verts[1].co.z))
+    return face.edges[0]
+
+
+def pick_start_faces(mesh_name, bm, count, rng):
+    if mesh_name == 'tri_fan':
+        faces = [face for face in bm.faces if len(face.verts) == 3]
+    elif mesh_name == 'ngon':
+        faces = [face for face in bm.faces if len(face.verts) > 4]
+    else:
+        faces = [face for face in bm.faces if len(face.verts) == 4]
+    return [faces[rng.randrange(len(faces))] for _ in range(count)]
+# endregion
+
+# region -Harness
+
+def create_object(name, builder, args):
+    mesh = bpy.data.meshes.new(name)
+    bm = bmesh.new()
+    builder(bm, *args)
+    bm.to_mesh(mesh)
+    bm.free()
+
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+def enter_edit_mode(obj):
+    view_layer = bpy.context.view_layer
+    if bpy.context.object is not None and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    for other in view_layer.objects:
+        other.select_set(False)
+    obj.select_set(True)
+    view_layer.objects.active = obj
+    bpy.ops.object.mode_set(mode='EDIT')
+
+
+def remove_object(obj):
+    bpy.ops.object.mode_set(mode='OBJECT')
+    mesh = obj.data
+    bpy.data.objects.remove(obj)
+    bpy.data.meshes.remove(mesh)
+
+
+def make_loop_operator(fl, edit_object_data):
+    class BenchmarkLoopOperator(fl.common.FastLoopCommon):
+        """ Stands in for FastLoopOperator. Holds the state that the loop algorithms read from the operator.
+        """
+        def __init__(self):
+            self.active_object = edit_object_data
+            self.selected_editable_objects = {edit_object_data.get_bl_object.name: edit_object_data}
+            self.loop_draw_points = []
+            self.loop_data = None
+            self.edge_data = None
+            self.edge_pos_algorithm = None
+            self.current_edge = None
+            self.current_face_index = None
+            self.current_position = None
+            self.is_snapping = False
+            self.snap_position = None
+            self.force_offset_value = -1
+            self.is_loop = False
+            self.segments = 1
+            self.insert_verts = False
+            self.insert_on_selected_edges = False
+
+        def report(self, type, message):
+            print(f"{type}: {message}")
+
+        def cancel(self, context):
+            raise RuntimeError("create_geometry failed")
+
+    return BenchmarkLoopOperator()
+
+
+def make_snap_context(fl, region, rv3d):
+    class BenchmarkSnapContext(fl.snapping.SnapContext):
+        """ Snap context that uses a fixed region and view instead of looking them up from the window under the mouse.
+        """
+        def update_screen_data(self, mvals_win):
+            self.is_perpective = self.rv3d.is_perspective
+            self.win_size = Vector((self.region.width, self.region.height))
+            self.mvals = Vector(mvals_win)
+            self.mvals_win = mvals_win
+            self.proj_matrix = self.rv3d.perspective_matrix.copy()
+            return True
+
+    return BenchmarkSnapContext(bpy.context, bpy.context.evaluated_depsgraph_get(), None, rv3d, region)
+
+
+def make_view(obj):
+    """ A perspective view looking at the object from above and to the side.
+    """
+    corners = [obj.matrix_world @ Vector(corner) for corner in obj.bound_box]
+    center = sum(corners, Vector()) / len(corners)
+    radius = max((corner - center).length for corner in corners)
+
+    eye = center + Vector((1.0, -1.0, 1.0)).normalized() * radius * 2.5
+    rotation = (center - eye).to_track_quat('-Z', 'Y').to_matrix().to_4x4()
+    view_matrix = (Matrix.Translation(eye) @ rotation).inverted()
+
+    width, height = REGION_SIZE
+    near, far = 0.01, radius * 10.0
+    f = 1.0 / tan(pi / 8.0)
+    window_matrix = Matrix((
+        (f * height / width, 0.0, 0.0, 0.0),
+        (0.0, f, 0.0, 0.0),
+        (0.0, 0.0, (far + near) / (near - far), 2.0 * far * near / (near - far)),
+        (0.0, 0.0, -1.0, 0.0),
+    ))
+
+    region = SimpleNamespace(width=width, height=height, x=0, y=0)
+    rv3d = SimpleNamespace(is_perspective=True, view_matrix=view_matrix, window_matrix=window_matrix,
+                           perspective_matrix=window_matrix @ view_matrix)
+    return region, rv3d
+
+
+def project_to_region(region, rv3d, co):
+    clip = rv3d.perspective_matrix @ co.to_4d()
+    if clip.w <= 0.0:
+        return None
+    return Vector(((clip.x / clip.w + 1.0) * 0.5 * region.width, (clip.y / clip.w + 1.0) * 0.5 * region.height))
+
+
+def time_call(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def summarize(durations):
+    values = sorted(durations)
+    ms = 1000.0
+    return {
+        'count': len(values),
+        'mean_ms': mean(values) * ms,
+        'median_ms': median(values) * ms,
+        'p95_ms': values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))] * ms,
+        'min_ms': values[0] * ms,
+        'max_ms': values[-1] * ms,
+    }
+# endregion
+
+# region -Stages
+
+def set_loop_options(fl, segments=1, use_even=False, mirrored=False, perpendicular=False, use_multi_loop_offset=False):
+    fl.ops_utils.set_option('flipped', False)
+    fl.ops_utils.set_option('use_even', use_even)
+    fl.ops_utils.set_option('mirrored', mirrored)
+    fl.ops_utils.set_option('perpendicular', perpendicular)
+    fl.ops_utils.set_option('use_multi_loop_offset', use_multi_loop_offset)
+    fl.ops_utils.set_option('insert_verts', False)
+    fl.ops_utils.set_option('insert_on_selected_edges', False)
+    fl.ops_utils.set_option('segments', segments)
+
+
+def prepare_loop_data(fl, operator, edge, face):
+    operator.current_edge = edge
+    operator.current_face_index = face.index
+    # Put the mouse a third of the way along the edge
+    position = operator.world_mat @ edge.verts[0].co.lerp(edge.verts[1].co, 1.0 / 3.0)
+    operator.current_position = fl.common.CurrentPos(position, operator.world_inv @ position)
+    loop_data = fl.edge_ring.EdgeDataFactory.create(edge, operator)
+    operator.loop_data = loop_data
+    if loop_data is not None:
+        operator.is_loop = loop_data.get_is_loop()
+    return loop_data
+
+
+class _PerEdgeMultiAlgorithm():
+    """ The multi loop algorithm without its batch path. Used as a reference for execute_batch.
+    """
+    execute = None
+
+
+def edge_position_algorithms(fl):
+    _PerEdgeMultiAlgorithm.execute = staticmethod(fl.algorithms.ComputeEdgePostitonsMultiAlgorithm.execute)
+    single = fl.algorithms.ComputeEdgePostitonsSingleAlgorithm()
+    multi = fl.algorithms.ComputeEdgePostitonsMultiAlgorithm()
+    return {
+        'single': (single, {}),
+        'single_even_mirrored': (single, {'use_even': True, 'mirrored': True}),
+        'multi_3': (multi, {'segments': 3}),
+        'multi_9': (multi, {'segments': 9}),
+        'multi_9_per_edge': (_PerEdgeMultiAlgorithm(), {'segments': 9}),
+        'multi_9_even_perpendicular': (multi, {'segments': 9, 'use_even': True, 'perpendicular': True}),
+        'multi_9_offset': (multi, {'segments': 9, 'use_multi_loop_offset': True}),
+    }
+
+
+def reset_mesh(fl, obj, template):
+    """ Replace the edit mesh with the original geometry without leaving edit mode.
+    """
+    bm = bmesh.from_edit_mesh(obj.data)
+    bm.clear()
+    bm.from_mesh(template)
+    fl.mesh.ensure(bm, update_loops=True)
+    bm.select_mode = {'EDGE'}
+    fl.mesh_revision.MeshRevision.topology_changed(obj.data.name)
+    bmesh.update_edit_mesh(obj.data)
+    return bm
+
+
+def run_case(fl, args, mesh_name, size_name, rng):
+    builder_args = MESH_SIZES[size_name][mesh_name]
+    obj = create_object(f"bench_{mesh_name}_{size_name}", BUILDERS[mesh_name], builder_args)
+    template = obj.data.copy()
+    enter_edit_mode(obj)
+
+    results = []
+    def add_result(stage, variant, durations, **extra):
+        if durations:
+            results.append({'mesh': mesh_name, 'size': size_name, 'stage': stage, 'variant': variant, **extra, **summarize(durations)})
+
+    try:
+        bm = reset_mesh(fl, obj, template)
+        counts = {'verts': len(bm.verts), 'edges': len(bm.edges), 'faces': len(bm.faces)}
+        print(f"{mesh_name} ({size_name}): {counts}")
+
+        edit_object_data = fl.multi_object_edit.EditObjectData(obj, bm, obj.matrix_world.copy(), obj.matrix_world.inverted_safe())
+        operator = make_loop_operator(fl, edit_object_data)
+        props = fl.fl_properties.AllPropsNoSnap(fl.fl_properties.CommonProps(), fl.fl_properties.MultiLoopProps(), fl.fl_properties.SubProps())
+        set_loop_options(fl)
+
+        face_indices = [face.index for face in pick_start_faces(mesh_name, bm, args.samples, rng)]
+        def samples():
+            bm.faces.ensure_lookup_table()
+            for index in face_indices:
+                face = bm.faces[index]
+                yield pick_start_edge(mesh_name, face), face
+
+        # Edge ring walker
+        durations = []
+        for _ in range(args.repeat):
+            for edge, _face in samples():
+                duration, _ = time_call(lambda: list(fl.mesh.bmesh_edge_ring_walker(edge, False, fl.mesh.WalkerMetadata())))
+                durations.append(duration)
+        add_result('ring_walk', 'default', durations)
+
+        # EdgeDataFactory.create
+        cold, warm = [], []
+        for _ in range(args.repeat):
+            for edge, face in samples():
+                fl.edge_ring.EdgeRingIndex.invalidate()
+                cold.append(time_call(prepare_loop_data, fl, operator, edge, face)[0])
+                warm.append(time_call(prepare_loop_data, fl, operator, edge, face)[0])
+        add_result('edge_data_factory', 'cold', cold)
+        add_result('edge_data_factory', 'warm', warm)
+
+        # EdgeData point computation
+        for variant, (algorithm, options) in edge_position_algorithms(fl).items():
+            set_loop_options(fl, **options)
+            operator.segments = options.get('segments', 1)
+            operator.edge_pos_algorithm = algorithm
+            durations = []
+            for edge, face in samples():
+                loop_data = prepare_loop_data(fl, operator, edge, face)
+                if loop_data is None:
+                    continue
+                for _ in range(args.repeat):
+                    durations.append(time_call(fl.edge_data.EdgeData, loop_data, props)[0])
+            add_result('edge_points', variant, durations)
+
+        # create_geometry
+        for segments in (1, 9):
+            set_loop_options(fl, segments=segments)
+            operator.segments = segments
+            operator.edge_pos_algorithm = fl.algorithms.ComputeEdgePostitonsMultiAlgorithm()
+            durations = []
+            for sample in range(min(args.samples, 8)):
+                bm = reset_mesh(fl, obj, template)
+                edit_object_data.bm = bm
+                bm.faces.ensure_lookup_table()
+                face = bm.faces[face_indices[sample]]
+                edge = pick_start_edge(mesh_name, face)
+                loop_data = prepare_loop_data(fl, operator, edge, face)
+                if loop_data is None:
+                    continue
+                edge_data = fl.edge_data.EdgeData(loop_data, props)
+                duration, _ = time_call(operator.create_geometry, edge_data.edges, edge_data.points, edge_data.edge_verts, len(loop_data.get_loops()))
+                durations.append(duration)
+            add_result('create_geometry', f"segments_{segments}", durations)
+
+        bm = reset_mesh(fl, obj, template)
+        edit_object_data.bm = bm
+
+        # calculate_edge_slide_directions
+        durations = []
+        for edge, _face in samples():
+            for bm_edge in bm.edges:
+                bm_edge.select = False
+            selected_edges = []
+            for loop_edge in fl.mesh.bmesh_edge_loop_walker(edge):
+                loop_edge.select = True
+                selected_edges.append(loop_edge.index)
+            bm.select_flush(True)
+
+            for _ in range(args.repeat):
+                duration, _ = time_call(fl.edge_slide.calculate_edge_slide_directions, bm, edge, selected_edges, return_edges=True)
+                durations.append(duration)
+        add_result('edge_slide_directions', 'edge_loop', durations)
+
+        # SnapContext.do_snap_objects
+        region, rv3d = make_view(obj)
+        snap_context = make_snap_context(fl, region, rv3d)
+        fl.snapping.GlobalSnapContext.snap_context = snap_context
+        try:
+            duration, _ = time_call(snap_context.add_object, obj)
+            add_result('snap', 'build', [duration])
+
+            mouse_positions = []
+            for _edge, face in samples():
+                position = project_to_region(region, rv3d, obj.matrix_world @ face.calc_center_median())
+                if position is not None:
+                    mouse_positions.append(position)
+            # And some that miss the mesh
+            mouse_positions.extend(Vector((rng.uniform(0, region.width), rng.uniform(0, region.height))) for _ in range(len(mouse_positions) // 4))
+
+            hits = 0
+            durations = []
+            for _ in range(args.repeat):
+                for mvals in mouse_positions:
+                    duration, result = time_call(snap_context.do_snap_objects, [obj], mvals, mvals)
+                    durations.append(duration)
+                    hits += result is not None
+            add_result('snap', 'do_snap_objects', durations, hit_rate=hits / max(len(durations), 1))
+        finally:
+            fl.snapping.GlobalSnapContext.del_snap_context()
+
+        # MeshSnapshot and the walkers that run on it
+        # The operator builds snapshots from a timer, which never fires in the background. Build them here instead.
+        MeshSnapshot = fl.mesh_snapshot.MeshSnapshot
+        walkers = fl.snapshot_walkers
+        build, links = [], []
+        for _ in range(args.repeat):
+            MeshSnapshot.invalidate(obj.data.name)
+            duration, snapshot = time_call(MeshSnapshot.get, bm, obj.data.name)
+            build.append(duration)
+            links.append(time_call(lambda: snapshot.links)[0])
+        add_result('snapshot', 'build', build)
+        add_result('snapshot', 'links', links)
+
+        add_result('snapshot', 'edge_catalog', [time_call(fl.edge_catalog.EdgeCatalog, snapshot)[0] for _ in range(args.repeat)])
+
+        ring_walk, loop_walk, tri_fan = [], [], []
+        for _ in range(args.repeat):
+            for edge, face in samples():
+                ring_walk.append(time_call(lambda: list(walkers.edge_ring_walker(snapshot, edge.index, False, walkers.IndexWalkerMetadata())))[0])
+                loop_walk.append(time_call(lambda: list(walkers.edge_loop_walker(snapshot, edge.index)))[0])
+                if mesh_name == 'tri_fan':
+                    tri_fan.append(time_call(lambda: list(walkers.tri_fan_walker(snapshot, face.index, edge.index, walkers.IndexWalkerMetadata())))[0])
+        add_result('snapshot', 'ring_walk', ring_walk)
+        add_result('snapshot', 'loop_walk', loop_walk)
+        add_result('snapshot', 'tri_fan', tri_fan)
+        MeshSnapshot.invalidate(obj.data.name)
+    finally:
+        remove_object(obj)
+        bpy.data.meshes.remove(template)
+
+    return results
+# endregion
+
+def compare(results, baseline, tolerance):
+    """ Return the results whose median is slower than the baseline by more than the tolerance.
+    """
+    def key(result):
+        return (result['mesh'], result['size'], result['stage'], result['variant'])
+
+    baseline_results = {key(result): result for result in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        old = baseline_results.get(key(result))
+        if old is None or old['median_ms'] <= 0.0:
+            continue
+
+        ratio = result['median_ms'] / old['median_ms']
+        if ratio > 1.0 + tolerance:
+            regressions.append((key(result), old['median_ms'], result['median_ms'], ratio))
+    return regressions
+
+
+def main():
+    args = parse_args()
+    fl = load_addon(args.module)
+    rng = random.Random(args.seed)
+
+    results = []
+    for size_name in args.sizes.split(','):
+        for mesh_name in args.meshes.split(','):
+            results.extend(run_case(fl, args, mesh_name, size_name, rng))
+
+    for result in results:
+        print(f"{result['mesh']:>9} {result['size']:>6} {result['stage']:>22} {result['variant']:>27} "
+              f"median {result['median_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  max {result['max_ms']:9.3f} ms")
+
+    addon_module = sys.modules[args.module]
+    report = {
+        'meta': {
+            'addon_version': list(addon_module.bl_info['version']),
+            'blender_version': bpy.app.version_string,
+            'python_version': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'samples': args.samples,
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.output}")
+
+    if args.baseline is not None:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for (mesh_name, size_name, stage, variant), old, new, ratio in regressions:
+            print(f"REGRESSION {mesh_name} {size_name} {stage} {variant}: {old:.3f} ms -> {new:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()